@@ -0,0 +1,126 @@
+"""
+Schema upgrades for existing databases.
+
+create_all only creates missing tables, so columns added to a model later
+are added here with ALTER TABLE, followed by data backfills and then the
+indexes (a unique index can only be built once duplicates are gone). Every
+step is idempotent; migrate() runs on startup in each worker.
+
+create_all and index creation check-then-create, so workers starting
+together would race on them. For a SQLite file, migrate() holds an exclusive
+lock on <database>.migrate.lock throughout: the first worker migrates, the
+others wait and then find nothing left to do.
+"""
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Dict, List, Tuple
+import fcntl
+import logging
+from sqlalchemy import exists, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from database.db import Base, engine as default_engine
+from database.models import Schedule, ScheduleEvent
+from repositories.schedule_repository import replace_events
+from services.address_normalizer import normalize_address
+
+logger = logging.getLogger(__name__)
+
+UNIQUE_ADDRESS_INDEX = "ux_schedules_zip_code_address_key"
+
+def _add_missing_columns(engine: Engine) -> None:
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl_type = column.type.compile(dialect=engine.dialect)
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {ddl_type}"))
+                logger.info("Added column %s.%s", table.name, column.name)
+            except OperationalError as e:
+                # Another worker starting at the same time got there first
+                if "duplicate column" not in str(e).lower():
+                    raise
+
+def _backfill_address_keys(engine: Engine) -> None:
+    """
+    Fill address_key for rows stored before it existed, and store a missing
+    zip_code as "" (the unique index treats NULLs as distinct, so NULL-ZIP
+    rows would never collide). Until the unique index exists, or while
+    NULL-ZIP rows remain, also collapse rows that now share a
+    (zip_code, address_key): the row with a schedule and the latest fetch wins.
+    """
+    indexed = UNIQUE_ADDRESS_INDEX in {ix["name"] for ix in inspect(engine).get_indexes(Schedule.__tablename__)}
+    with Session(engine) as session:
+        for row in session.query(Schedule).filter(Schedule.address_key.is_(None)):
+            row.address_key = normalize_address(row.address or "")
+        session.flush()
+        if indexed and not session.query(exists().where(Schedule.zip_code.is_(None))).scalar():
+            session.commit()
+            return
+
+        groups: Dict[Tuple, List[Schedule]] = {}
+        for row in session.query(Schedule):
+            groups.setdefault(((row.zip_code or "").strip(), row.address_key), []).append(row)
+        removed = 0
+        for rows in groups.values():
+            if len(rows) < 2:
+                continue
+            rows.sort(key=lambda r: (bool(r.schedule), r.fetched_at or r.created_at or datetime.min, r.id), reverse=True)
+            for duplicate in rows[1:]:
+                session.delete(duplicate)
+                removed += 1
+        # Deletes first, so the survivors' new ZIPs cannot collide with them
+        session.flush()
+        for row in session.query(Schedule).filter(Schedule.zip_code.is_(None)):
+            row.zip_code = ""
+        session.commit()
+    if removed:
+        logger.info("Removed %d duplicate schedule rows", removed)
+
+def _backfill_events(engine: Engine) -> None:
+    """Split the JSON event lists of rows stored before the events table existed."""
+    with Session(engine) as session:
+        has_events = exists().where(ScheduleEvent.schedule_id == Schedule.id)
+        filled = 0
+        for row in session.query(Schedule).filter(Schedule.schedule.is_not(None), ~has_events):
+            if isinstance(row.schedule, list) and row.schedule:
+                replace_events(session, row.id, row.schedule)
+                filled += 1
+        session.commit()
+    if filled:
+        logger.info("Backfilled events for %d schedules", filled)
+
+def _create_indexes(engine: Engine) -> None:
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+@contextmanager
+def _file_lock(path: str):
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def _migration_lock(engine: Engine):
+    database = engine.url.database
+    if engine.url.get_backend_name() != "sqlite" or not database or database == ":memory:":
+        return nullcontext()
+    return _file_lock(f"{database}.migrate.lock")
+
+def migrate(engine: Engine = default_engine) -> None:
+    with _migration_lock(engine):
+        Base.metadata.create_all(bind=engine, checkfirst=True)
+        _add_missing_columns(engine)
+        # Data fixes run before indexes, so unique indexes can be created
+        _backfill_address_keys(engine)
+        _backfill_events(engine)
+        _create_indexes(engine)
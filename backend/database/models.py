@@ -1,12 +1,70 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, func
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, JSON, Index, func
 from database.db import Base
 
 class Schedule(Base):
     __tablename__ = "schedules"
+    __table_args__ = (
+        # One row per address per ZIP; also the lookup index
+        Index("ux_schedules_zip_code_address_key", "zip_code", "address_key", unique=True),
+    )
     id = Column(Integer, primary_key=True, index=True)
     address = Column(String)
+    # USPS-style normalized address (services.address_normalizer)
+    address_key = Column(String)
     city = Column(String)
     state = Column(String)
     zip_code = Column(String)
     schedule = Column(JSON)
-    created_at = Column(DateTime, default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime, default=func.now())
+    # Freshness: rows past expires_at are served stale while a refresh runs
+    fetched_at = Column(DateTime)
+    expires_at = Column(DateTime, index=True)
+    # "ok", or a cached negative outcome: "not_found" / "error" (NULL on older rows means ok)
+    status = Column(String)
+class ScheduleEvent(Base):
+    """One pickup from a schedule's event list, so date ranges read only the rows they need."""
+    __tablename__ = "events"
+    __table_args__ = (
+        Index("ix_events_schedule_id_date", "schedule_id", "date"),
+    )
+    id = Column(Integer, primary_key=True)
+    schedule_id = Column(Integer, ForeignKey("schedules.id", ondelete="CASCADE"), nullable=False)
+    date = Column(Date, nullable=False)
+    type = Column(String)
+
+class RecollectPlace(Base):
+    """Recollect address -> place_id, so a known address skips the suggest call."""
+    __tablename__ = "recollect_places"
+    address_key = Column(String, primary_key=True)  # "<area id>:<normalized address>"
+    place_id = Column(String, nullable=False)
+    fetched_at = Column(DateTime)
+    expires_at = Column(DateTime)
+
+class RecollectCalendar(Base):
+    """Recollect place_id -> upcoming events, shared by every address on the route."""
+    __tablename__ = "recollect_calendars"
+    place_id = Column(String, primary_key=True)
+    events = Column(JSON)
+    fetched_at = Column(DateTime)
+    expires_at = Column(DateTime)
+
+class BarcodeResult(Base):
+    """Final recycling info for a scanned barcode, keyed by GTIN-14 (services.barcode_cache)."""
+    __tablename__ = "barcode_results"
+    gtin = Column(String, primary_key=True)
+    result = Column(JSON, nullable=False)
+    data_source = Column(String)
+    # Upstream requests (product databases + Gemini) it took to build the result
+    upstream_calls = Column(Integer)
+    fetched_at = Column(DateTime)
+    expires_at = Column(DateTime, index=True)
+
+class ImageResult(Base):
+    """Gemini identification of a photo, found again by perceptual hash (services.image_cache)."""
+    __tablename__ = "image_results"
+    id = Column(Integer, primary_key=True)
+    # 64-bit dHash as 16 hex digits; SQLite integers are signed
+    dhash = Column(String, nullable=False, index=True)
+    result = Column(JSON, nullable=False)
+    fetched_at = Column(DateTime)
+    expires_at = Column(DateTime)
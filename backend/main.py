@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+import logging
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -6,8 +8,37 @@ from routers.rules import router as rule_router # rules
 from routers.collection import router as collection_router
 from routers.scanner import router as scanner_router
 from routers.bin import router as bin_router
+from services.rules_service import get_rules_table, start_baseline_watcher, stop_baseline_watcher
+from services.zip_index import get_zip_index
+from scrapers.browser_pool import close_browser_pool
+from scrapers.http_client import close_http_clients
+from services.image_pool import close_image_pool
+from database.migrations import migrate
+from services.schedule_service import start_schedule_sweeper, stop_schedule_sweeper
 
-app = FastAPI(title="Eco Hero API", version="1.0.0")
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Bring the database schema up to date before anything reads it
+    migrate()
+    # Load every state baseline once per worker before serving requests
+    get_rules_table()
+    start_baseline_watcher()
+    try:
+        get_zip_index()
+    except Exception as e:
+        # Retried lazily on the first lookup
+        logger.warning("ZIP index unavailable at startup: %s", e)
+    start_schedule_sweeper()
+    yield
+    stop_baseline_watcher()
+    await stop_schedule_sweeper()
+    await close_browser_pool()
+    await close_http_clients()
+    close_image_pool()
+
+app = FastAPI(title="Eco Hero API", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
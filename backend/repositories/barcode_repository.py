@@ -0,0 +1,15 @@
+from datetime import datetime
+from sqlalchemy.orm import Session
+from database.models import BarcodeResult
+from sqlalchemy.exc import SQLAlchemyError
+
+def get_result(db: Session, gtin: str, now: datetime):
+    try:
+        row = db.get(BarcodeResult, gtin)
+    except SQLAlchemyError:
+        return None
+    return row if row is not None and row.expires_at > now else None
+
+def save_result(db: Session, gtin: str, data: dict):
+    db.merge(BarcodeResult(gtin=gtin, **data))
+    db.commit()
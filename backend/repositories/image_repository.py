@@ -0,0 +1,23 @@
+from datetime import datetime
+from sqlalchemy.orm import Session
+from database.models import ImageResult
+from sqlalchemy.exc import SQLAlchemyError
+
+def get_results_since(db: Session, after_id: int, now: datetime):
+    """Unexpired results stored after after_id, oldest first (incremental index loads)."""
+    try:
+        return (
+            db.query(ImageResult)
+            .filter(ImageResult.id > after_id, ImageResult.expires_at > now)
+            .order_by(ImageResult.id)
+            .all()
+        )
+    except SQLAlchemyError:
+        return []
+
+def save_result(db: Session, data: dict):
+    row = ImageResult(**data)
+    db.add(row)
+    db.commit()
+    db.refresh(row)
+    return row
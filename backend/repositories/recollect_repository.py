@@ -0,0 +1,26 @@
+from datetime import datetime
+from sqlalchemy.orm import Session
+from database.models import RecollectCalendar, RecollectPlace
+from sqlalchemy.exc import SQLAlchemyError
+
+def get_place(db: Session, address_key: str, now: datetime):
+    try:
+        row = db.get(RecollectPlace, address_key)
+    except SQLAlchemyError:
+        return None
+    return row if row is not None and row.expires_at > now else None
+
+def save_place(db: Session, address_key: str, place_id: str, fetched_at: datetime, expires_at: datetime):
+    db.merge(RecollectPlace(address_key=address_key, place_id=place_id, fetched_at=fetched_at, expires_at=expires_at))
+    db.commit()
+
+def get_calendar(db: Session, place_id: str, now: datetime):
+    try:
+        row = db.get(RecollectCalendar, place_id)
+    except SQLAlchemyError:
+        return None
+    return row if row is not None and row.expires_at > now else None
+
+def save_calendar(db: Session, place_id: str, events: list, fetched_at: datetime, expires_at: datetime):
+    db.merge(RecollectCalendar(place_id=place_id, events=events, fetched_at=fetched_at, expires_at=expires_at))
+    db.commit()
@@ -0,0 +1,70 @@
+"""
+Benchmark for stored schedule reads: the full JSON blob vs. the next pickups
+from the indexed events table.
+
+    python -m repositories.schedule_bench [--schedules 500] [--runs 200]
+
+Runs on a throwaway SQLite database; bench() takes any session factory.
+"""
+from datetime import date, timedelta
+from typing import Callable
+import argparse
+import json
+import random
+import statistics
+import tempfile
+import time
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from database.migrations import migrate
+from repositories import schedule_repository
+from services.address_normalizer import normalize_address
+
+ZIP_CODE = "95113"
+
+def bench(session_factory: Callable[[], Session], schedules: int = 500, runs: int = 200) -> None:
+    start = date.today() - timedelta(days=180)
+    year = [{"date": (start + timedelta(days=d)).isoformat(), "type": "Garbage, Recycling"} for d in range(0, 365, 2)]
+    for i in range(schedules):
+        address = f"{i} Main St"
+        with session_factory() as db:
+            schedule_repository.create_schedule(db, {
+                "address": address, "address_key": normalize_address(address), "zip_code": ZIP_CODE, "schedule": year,
+            })
+
+    def blob(db, key):
+        return schedule_repository.get_by_address_key(db, key, ZIP_CODE).schedule
+
+    def next_five(db, key):
+        rows = schedule_repository.get_events_by_address_key(db, key, ZIP_CODE, date.today(), None, 5)
+        return [{"date": r.date.isoformat(), "type": r.type} for r in rows]
+
+    def measure(read):
+        timings, size = [], 0
+        for _ in range(runs):
+            key = normalize_address(f"{random.randrange(schedules)} Main St")
+            started = time.perf_counter()
+            with session_factory() as db:
+                size = len(json.dumps(read(db, key)))
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), size
+
+    blob_ms, blob_bytes = measure(blob)
+    range_ms, range_bytes = measure(next_five)
+    print(f"  blob: {blob_ms:.3f} ms median, {blob_bytes} bytes ({len(year)} events)")
+    print(f"events: {range_ms:.3f} ms median, {range_bytes} bytes (from=today, limit=5)")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--schedules", type=int, default=500)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bench.db")
+        migrate(engine)
+        bench(sessionmaker(autocommit=False, autoflush=False, bind=engine), args.schedules, args.runs)
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,139 @@
-from sqlalchemy.orm import Session
-from database.models import Schedule
-from sqlalchemy.orm import Session
-from database.models import Schedule
-from sqlalchemy.exc import SQLAlchemyError
+from datetime import date, datetime
+from typing import Optional
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, load_only
+from database.models import Schedule, ScheduleEvent
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
-def get_by_address_and_zip(db: Session, address: str, zip_code: str):
+def get_by_address_key(db: Session, address_key: str, zip_code: str):
     try:
-        return db.query(Schedule).filter(Schedule.address == address, Schedule.zip_code == zip_code).first()
+        return db.query(Schedule).filter(Schedule.zip_code == zip_code, Schedule.address_key == address_key).first()
     except SQLAlchemyError:
         return None
 
+def _event_rows(schedule_id: int, schedule) -> list:
+    if not isinstance(schedule, list):
+        return []
+    rows = []
+    for event in schedule:
+        try:
+            rows.append(ScheduleEvent(schedule_id=schedule_id, date=date.fromisoformat(event["date"]), type=event.get("type")))
+        except (KeyError, TypeError, ValueError, AttributeError):
+            continue
+    return rows
+
+def replace_events(db: Session, schedule_id: int, schedule) -> None:
+    db.query(ScheduleEvent).filter(ScheduleEvent.schedule_id == schedule_id).delete(synchronize_session=False)
+    db.add_all(_event_rows(schedule_id, schedule))
+
+def get_events_by_address_key(
+    db: Session, address_key: str, zip_code: str,
+    start: Optional[date] = None, end: Optional[date] = None, limit: Optional[int] = None,
+):
+    """
+    One indexed query for a stored schedule's metadata and its events in
+    [start, end]: a list of (id, city, state, expires_at, date, type) rows,
+    date and type None when nothing falls in the range. Empty if the address
+    is not stored.
+    """
+    on = [ScheduleEvent.schedule_id == Schedule.id]
+    if start is not None:
+        on.append(ScheduleEvent.date >= start)
+    if end is not None:
+        on.append(ScheduleEvent.date <= end)
+    try:
+        query = (
+            db.query(Schedule.id, Schedule.city, Schedule.state, Schedule.expires_at, ScheduleEvent.date, ScheduleEvent.type)
+            .outerjoin(ScheduleEvent, and_(*on))
+            .filter(Schedule.zip_code == zip_code, Schedule.address_key == address_key)
+            .order_by(ScheduleEvent.date)
+        )
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+    except SQLAlchemyError:
+        return []
+
+def has_events(db: Session, schedule_id: int) -> bool:
+    try:
+        return db.query(ScheduleEvent.id).filter(ScheduleEvent.schedule_id == schedule_id).first() is not None
+    except SQLAlchemyError:
+        return False
+
 def create_schedule(db: Session, data: dict):
     new_schedule = Schedule(
         address=data.get("address"),
+        address_key=data.get("address_key"),
         city=data.get("city"),
         state=data.get("state"),
         zip_code=data.get("zip_code"),
         schedule=data.get("schedule"),
+        fetched_at=data.get("fetched_at"),
+        expires_at=data.get("expires_at"),
+        status=data.get("status", "ok"),
     )
     db.add(new_schedule)
+    try:
+        db.flush()
+    except IntegrityError:
+        # Another worker stored the same address first; update its row instead
+        db.rollback()
+        existing = get_by_address_key(db, data.get("address_key"), data.get("zip_code"))
+        if existing is None:
+            raise
+        return update_schedule(db, existing.id, data)
+    replace_events(db, new_schedule.id, new_schedule.schedule)
     db.commit()
     db.refresh(new_schedule)
-    return new_schedule
\ No newline at end of file
+    return new_schedule
+
+def update_schedule(db: Session, schedule_id: int, data: dict):
+    row = db.get(Schedule, schedule_id)
+    if row is None:
+        return None
+    if row.schedule != data.get("schedule"):
+        replace_events(db, row.id, data.get("schedule"))
+    for field in ("schedule", "fetched_at", "expires_at"):
+        setattr(row, field, data.get(field))
+    row.status = data.get("status", "ok")
+    db.commit()
+    db.refresh(row)
+    return row
+
+def get_due_for_refresh(db: Session, before: datetime, limit: int):
+    """
+    Rows that expire before `before` (or never had freshness recorded), soonest
+    first. Cached negative outcomes are left to expire; they are only retried
+    when the address is requested again.
+    """
+    try:
+        return (
+            db.query(Schedule)
+            .options(load_only(Schedule.address, Schedule.zip_code, Schedule.city, Schedule.state, Schedule.expires_at))
+            .filter(or_(Schedule.expires_at.is_(None), Schedule.expires_at < before))
+            .filter(or_(Schedule.status.is_(None), Schedule.status == "ok"))
+            .order_by(Schedule.expires_at)
+            .limit(limit)
+            .all()
+        )
+    except SQLAlchemyError:
+        return []
+
+def claim_for_refresh(db: Session, schedule_id: int, expires_at: Optional[datetime], lease_until: datetime) -> bool:
+    """
+    Lease a due row to this worker by moving its expires_at to lease_until,
+    but only if expires_at is still what the caller read. A worker whose
+    sweep saw the same row finds it changed and gets False.
+    """
+    unchanged = Schedule.expires_at.is_(None) if expires_at is None else Schedule.expires_at == expires_at
+    try:
+        claimed = (
+            db.query(Schedule)
+            .filter(Schedule.id == schedule_id, unchanged)
+            .update({Schedule.expires_at: lease_until}, synchronize_session=False)
+        )
+        db.commit()
+        return claimed == 1
+    except SQLAlchemyError:
+        db.rollback()
+        return False
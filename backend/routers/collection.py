@@ -1,9 +1,13 @@
 from __future__ import annotations
-from fastapi import APIRouter, HTTPException
-from scrapers.san_jose import get_san_jose_schedule
-from scrapers.santa_clara import fetch_calendar as get_santa_clara_schedule
+from datetime import date
+from typing import Annotated
+from fastapi import APIRouter, HTTPException, Query
+from scrapers.browser_pool import get_browser_pool
+from scrapers.http_client import get_http_client_stats
+from scrapers.registry import get_adapter_stats
 from services.notification_service import send_notification
-import pgeocode
+from services.recollect_cache import get_recollect_cache_stats
+from services.zip_index import lookup_zip
 from pydantic import BaseModel
 from services.schedule_service import *
 
@@ -17,24 +21,44 @@ class NotifyRequest(BaseModel):
 
 
 # -------- Helpers --------
-def resolve_region(zip_code: str) -> str:
+def resolve_region(zip_code: str) -> tuple[str | None, str | None]:
     z = zip_code.strip()
     if not z.isdigit() or len(z) != 5:
-        return None
+        return None, None
 
-    # Geocode ZIP
-    rec = pgeocode.Nominatim("us").query_postal_code(z)
-    if rec is None or rec.empty:
-        return None
+    # Look up ZIP in the shared index
+    rec = lookup_zip(z)
+    if rec is None:
+        return None, None
 
-    city = rec.get("place_name") if "place_name" in rec else None
-    state = rec.get("state_code") if "state_code" in rec else None
-
-    return city, state
+    return rec.city, rec.state_code
 
 # -------- Routes --------
+@router.get("/stats")
+def get_collection_stats() -> dict:
+    return {
+        "scrapes": schedule_flights.stats(),
+        "browsers": get_browser_pool().stats(),
+        "refresh": get_refresh_stats(),
+        "http": get_http_client_stats(),
+        "recollect": get_recollect_cache_stats(),
+        "negative": get_negative_cache_stats(),
+    }
+
+@router.get("/adapters")
+def get_city_adapters() -> dict:
+    # Per-city health, limits and latency of the schedule scrapers
+    return get_adapter_stats()
+
 @router.get("/schedule")
-async def get_collection_schedule(address: str = None, zip_code: str = None) -> dict:
+async def get_collection_schedule(
+    address: str = None,
+    zip_code: str = None,
+    # Annotated so /notify can call this directly and get plain None defaults
+    from_date: Annotated[date | None, Query(alias="from")] = None,
+    to_date: Annotated[date | None, Query(alias="to")] = None,
+    limit: Annotated[int | None, Query(ge=1, le=1000)] = None,
+) -> dict:
     if not address or len(address.strip()) < 5:
         raise HTTPException(
             status_code=400,
@@ -50,49 +74,72 @@ async def get_collection_schedule(address: str = None, zip_code: str = None) ->
         city, state = resolve_region(zip_code)
         print(f"City: {city}")
 
+    # Date-range reads come straight from the events table
+    ranged = from_date is not None or to_date is not None or limit is not None
+    if ranged:
+        stored = get_stored_events(address, zip_code, from_date, to_date, limit)
+        if stored:
+            row, events = stored
+            stale = not is_fresh(row)
+            if stale:
+                refresh_in_background(address, zip_code, row.city or city, row.state or state)
+            return {
+                "address": address,
+                "schedule": events,
+                "city": city,
+                "state": state,
+                "status": STATUS_OK,
+                "stale": stale
+            }
+
     # Check if schedule already exists
+    stale = False
+    status = STATUS_OK
     cached_schedule = get_schedule_by_address_and_zip(address, zip_code)
-    if cached_schedule and cached_schedule.schedule:
+    negative = cached_negative_status(cached_schedule)
+    if negative:
+        # A recent scrape found nothing or failed; answer from that instead of scraping again
+        status = negative
+    elif cached_schedule and cached_schedule.schedule:
         schedule = cached_schedule.schedule
+        # Serve an expired schedule right away and re-scrape it in the background
+        if not is_fresh(cached_schedule):
+            stale = True
+            refresh_in_background(address, zip_code, cached_schedule.city or city, cached_schedule.state or state)
     else:
-        match city:
-            case "San Jose" | "san jose" | "San José":
-                schedule = await get_san_jose_schedule(address)
-            case "Santa Clara" | "santa clara":
-                schedule = await get_santa_clara_schedule(address)
-            case "Cupertino" | "cupertino":
-                schedule = "https://www.recology.com/recology-south-bay/cupertino/collection-calendar/"
-            case "San Francisco" | "san francisco":
-                schedule = "https://www.recology.com/recology-san-francisco/collection-calendar/"
-            # TODO: Add more cities
-            case _:
-                raise HTTPException(
-                    status_code=400,
-                    detail="No available collection schedule found."
-                )
-    
+        # Concurrent requests for the same address share one scrape and one write
+        try:
+            schedule = await fetch_and_store_schedule(address, zip_code, city, state)
+        except UnsupportedCityError:
+            raise HTTPException(
+                status_code=400,
+                detail="No available collection schedule found."
+            )
+        except ScheduleUnavailableError as e:
+            status = e.status
+
     if not schedule:
+        if status == STATUS_ERROR:
+            message = f"The collection schedule for {city if city else 'this city'} could not be retrieved right now. Please try again in a few minutes."
+        else:
+            message = f"No collection schedule found for this address. Please verify the address is correct and in {city if city else 'a supported city'}, California."
         return {
             "address": address,
             "schedule": [],
-            "message": f"No collection schedule found for this address. Please verify the address is correct and in {city if city else 'a supported city'}, California."
+            "status": status if status != STATUS_OK else STATUS_NOT_FOUND,
+            "message": message
         }
 
-    # Add schedule to database only if it wasn't cached
-    if not cached_schedule:
-        add_schedule({
-            "address": address,
-            "city": city,
-            "state": state,
-            "zip_code": zip_code,
-            "schedule": schedule
-        })
+    if ranged:
+        schedule = filter_events(schedule, from_date, to_date, limit)
 
     return {
         "address": address,
         "schedule": schedule,
         "city": city,
-        "state": state
+        "state": state,
+        "status": STATUS_OK,
+        "stale": stale
     }
 
 @router.post("/notify")
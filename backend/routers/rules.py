@@ -1,18 +1,133 @@
-from fastapi import APIRouter, HTTPException
-from services.rules_service import extract_rules_for_zip 
+from fastapi import APIRouter, Header, Query, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from services.rules_service import extract_rules_for_zip, extract_rules_for_zips, get_rules_table, get_rules_table_stats, lookup_item_for_zip, rules_validators
+from services.cache_service import LRUCache
+from services.immutable import json_default
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Dict, Iterator, List, Optional
+import json
+import os
 
 router = APIRouter(prefix="/rules", tags=["rules"])
 
+# Finished JSON bodies keyed by (zip, rules table version)
+RULES_CACHE_SIZE = int(os.getenv("RULES_CACHE_SIZE", "4096"))
+rules_response_cache = LRUCache(maxsize=RULES_CACHE_SIZE)
+_cache_version = 0
+
+# Browsers and CDNs may reuse a rules response for this long before revalidating
+RULES_MAX_AGE = int(os.getenv("RULES_MAX_AGE", "3600"))
+RULES_STALE_WHILE_REVALIDATE = int(os.getenv("RULES_STALE_WHILE_REVALIDATE", "86400"))
+
+RULES_BATCH_MAX = int(os.getenv("RULES_BATCH_MAX", "10000"))
+BATCH_CHUNK_LINES = 256
+
+# -------- Models --------
+class BatchRulesRequest(BaseModel):
+    zips: List[str] = Field(..., max_length=RULES_BATCH_MAX)
+
+# -------- Helpers --------
+def _dumps(payload) -> bytes:
+    # Same encoding as FastAPI's JSONResponse
+    return json.dumps(payload, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=json_default).encode("utf-8")
+
+def _cache_headers(validators: Dict[str, Optional[str]]) -> Dict[str, str]:
+    headers = {
+        "ETag": validators["etag"],
+        "Cache-Control": f"public, max-age={RULES_MAX_AGE}, stale-while-revalidate={RULES_STALE_WHILE_REVALIDATE}",
+    }
+    # last_verified_at is when the baseline was last checked against its sources
+    try:
+        verified = datetime.strptime(validators.get("last_verified_at") or "", "%Y-%m-%d")
+        headers["Last-Modified"] = format_datetime(verified.replace(tzinfo=timezone.utc), usegmt=True)
+    except ValueError:
+        pass
+    return headers
+
+def _etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag.removeprefix("W/") in candidates
+
+def _render_rules(zip_code: str, table) -> tuple[int, bytes, Dict[str, str]]:
+    result = extract_rules_for_zip(zip_code, table)
+    if not result.get("rules"):
+        return 404, _dumps({"detail": {
+            "message": "No rules found for zip code ",
+            "payload": result
+        }}), {}
+    return 200, _dumps(result), _cache_headers(rules_validators(zip_code, table))
+
+def _batch_lines(zip_codes: List[str]) -> Iterator[bytes]:
+    """NDJSON lines for a batch lookup, flushed in chunks of BATCH_CHUNK_LINES."""
+    # Each state's rules object is encoded once and spliced into every line for that state
+    encoded_rules: Dict[int, bytes] = {}
+    chunk: List[bytes] = []
+    for result in extract_rules_for_zips(zip_codes, get_rules_table()):
+        rules_obj = result.get("rules")
+        if not rules_obj:
+            chunk.append(_dumps({"zip": result["zip"], "error": result["summary"]}))
+        else:
+            if id(rules_obj) not in encoded_rules:
+                encoded_rules[id(rules_obj)] = _dumps(rules_obj)
+            head = _dumps({k: v for k, v in result.items() if k != "rules"})
+            chunk.append(head[:-1] + b',"rules":' + encoded_rules[id(rules_obj)] + b"}")
+        if len(chunk) >= BATCH_CHUNK_LINES:
+            yield b"\n".join(chunk) + b"\n"
+            chunk = []
+    if chunk:
+        yield b"\n".join(chunk) + b"\n"
+
+# -------- Routes --------
 @router.get("/status")
 def get_status():
     return {"status": "ok"}
 
-@router.get("/{zip_code}")
-def get_rules_by_zip(zip_code: str):
-    result = extract_rules_for_zip(zip_code)
-    if not result.get("rules"):
-        raise HTTPException(status_code=404, detail={
+@router.get("/stats")
+def get_stats():
+    return {**get_rules_table_stats(), "response_cache": rules_response_cache.stats()}
+
+@router.post("/batch")
+def get_rules_batch(req: BatchRulesRequest):
+    return StreamingResponse(_batch_lines(req.zips), media_type="application/x-ndjson")
+
+@router.get("/{zip_code}/lookup")
+def lookup_item(zip_code: str, item: str = Query(..., min_length=2, max_length=100), limit: int = Query(3, ge=1, le=10)):
+    result = lookup_item_for_zip(zip_code, item, limit)
+    if result["matches"] is None:
+        return Response(content=_dumps({"detail": {
             "message": "No rules found for zip code ",
             "payload": result
-        })
-    return result
\ No newline at end of file
+        }}), status_code=404, media_type="application/json")
+    return Response(content=_dumps(result), media_type="application/json")
+
+@router.get("/{zip_code}")
+def get_rules_by_zip(zip_code: str, if_none_match: Optional[str] = Header(None)):
+    global _cache_version
+    table = get_rules_table()
+    if table.version != _cache_version:
+        # Baselines were reloaded; drop bodies rendered from the old table
+        rules_response_cache.clear()
+        _cache_version = table.version
+    key = (zip_code, table.version)
+    cached = rules_response_cache.get(key)
+
+    # Conditional GET: answer 304 without building or serializing the payload
+    if cached is None and if_none_match:
+        validators = rules_validators(zip_code, table)
+        if validators and _etag_matches(if_none_match, validators["etag"]):
+            return Response(status_code=304, headers=_cache_headers(validators))
+
+    if cached is None:
+        cached = _render_rules(zip_code, table)
+        rules_response_cache.put(key, cached)
+    status_code, body, headers = cached
+    if status_code == 200 and _etag_matches(if_none_match, headers.get("ETag")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, status_code=status_code, headers=headers, media_type="application/json")
\ No newline at end of file
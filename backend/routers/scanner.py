@@ -1,18 +1,53 @@
-from fastapi import APIRouter, HTTPException, File, UploadFile
-from services.gemini_scanner_service import identify_product_with_gemini, get_recycling_info_from_barcode
+from fastapi import APIRouter, HTTPException, File, Response, UploadFile
+from starlette.concurrency import run_in_threadpool
+from services.barcode_cache import get_barcode_cache_stats, get_recycling_info
+from services.barcode_reader import get_preprocess_stats, read_barcode
+from services.gemini_scanner_service import identify_product_with_gemini
 from services.bin_service import find_recycling_places
-import cv2
-import numpy as np
-import zxingcpp
+from services.image_cache import find_similar, get_image_cache_stats, store_result
+from services.image_pool import ImagePoolBusyError, get_image_pool
+import asyncio
+import time
 
 router = APIRouter(prefix="/scanner", tags=["scanner"])
 
+# -------- Helpers --------
+async def _timed(timings: dict, stage: str, fn, *args):
+    # Blocking Gemini and places calls run on the default thread pool so they
+    # hold neither the event loop nor an image worker; coroutines are awaited
+    started = time.perf_counter()
+    try:
+        if asyncio.iscoroutinefunction(fn):
+            return await fn(*args)
+        return await run_in_threadpool(fn, *args)
+    finally:
+        _record(timings, stage, (time.perf_counter() - started) * 1000)
+
+def _record(timings: dict, stage: str, ms: float) -> None:
+    timings[stage] = ms
+    get_image_pool().record_stage(stage, ms)
+
+def _server_timing(timings: dict) -> str:
+    return ", ".join(f"{stage};dur={ms:.1f}" for stage, ms in timings.items())
+
+# -------- Routes --------
 @router.get("/status")
 def get_status():
     return {"status": "ok"}
 
+@router.get("/stats")
+def get_scanner_stats():
+    # Image pool load and per-stage timings (queue, decode, detect, lookup, gemini, places),
+    # plus decode time, detection hit rate per pyramid level and bytes sent to Gemini
+    return {
+        **get_image_pool().stats(),
+        "preprocess": get_preprocess_stats(),
+        "barcode_cache": get_barcode_cache_stats(),
+        "image_cache": get_image_cache_stats(),
+    }
+
 @router.post("/uploadfile/")
-async def create_upload_file(zip_code: str = None, file: UploadFile = None):
+async def create_upload_file(response: Response, zip_code: str = None, file: UploadFile = None):
     if not file or 'image' not in file.content_type:
         raise HTTPException(status_code=400, detail={
             "message": "Invalid or missing file type",
@@ -24,43 +59,61 @@ async def create_upload_file(zip_code: str = None, file: UploadFile = None):
             "payload": zip_code
         })
     
+    print(f"Processing image upload for zip {zip_code}")
+    timings = {}
+
+    # Read image bytes
+    image_bytes = await file.read()
+    print(f"Image size: {len(image_bytes)} bytes")
+
+    # Try to detect barcode first; decoding and detection run on the image pool
+    barcode_text = None
+    gemini_image = image_bytes
+    image_hash = None
     try:
-        print(f"Processing image upload for zip {zip_code}")
-        
-        # Read image bytes
-        image_bytes = await file.read()
-        print(f"Image size: {len(image_bytes)} bytes")
-        
-        # Try to detect barcode first
-        barcode_text = None
-        try:
-            nparr = np.frombuffer(image_bytes, np.uint8)
-            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            if img is not None:
-                print("Image decoded successfully")
-                barcode_data = zxingcpp.read_barcodes(img)
-                if barcode_data:
-                    barcode_text = barcode_data[0].text
-                    print(f"Detected barcode: {barcode_text}")
-                    result = get_recycling_info_from_barcode(barcode_text)
-                    return result
-                else:
-                    print("No barcode detected in image")
-        except Exception as e:
-            print(f"Barcode detection failed: {e}")
-        
+        detection = await get_image_pool().run(read_barcode, image_bytes)
+        for stage, ms in detection["timings"].items():
+            _record(timings, stage, ms)
+        barcode_text = detection["barcode"]
+        # Downscaled, recompressed JPEG instead of the original upload
+        gemini_image = detection["jpeg"] or image_bytes
+        image_hash = detection["dhash"]
+        if barcode_text:
+            print(f"Detected barcode: {barcode_text} ({detection['level']})")
+        elif detection["decoded"]:
+            print("No barcode detected in image")
+    except ImagePoolBusyError:
+        raise HTTPException(status_code=503, detail={
+            "message": "Scanner is busy, please try again shortly"
+        }, headers={"Retry-After": "1"})
+    except Exception as e:
+        print(f"Barcode detection failed: {e}")
+
+    try:
+        if barcode_text:
+            return await _timed(timings, "lookup", get_recycling_info, barcode_text)
+
+        # A near-duplicate of an earlier photo reuses its identification
+        result = None
+        if image_hash is not None:
+            result = await _timed(timings, "image_cache", find_similar, image_hash)
+
         # If no barcode found, use Gemini
-        print("No barcode found, using Gemini Vision API...")
-        result = identify_product_with_gemini(image_bytes, barcode_text)
-        
+        if result is None:
+            print("No barcode found, using Gemini Vision API...")
+            result = await _timed(timings, "gemini", identify_product_with_gemini, gemini_image, barcode_text)
+            # Only structured answers; the parse-error fallback has no data_source
+            if image_hash is not None and result.get("data_source") == "Gemini Vision AI":
+                await run_in_threadpool(store_result, image_hash, result)
+
         # Find recycling places
         if result.get("material") or result.get("product_name"):
             query_term = result.get("material") or result.get("product_name")
-            places = find_recycling_places(f"recycling center for {query_term}", zip_code)
+            places = await _timed(timings, "places", find_recycling_places, f"recycling center for {query_term}", zip_code)
             result["places"] = places
-            
+
         return result
-        
+
     except Exception as e:
         import traceback
         print(f"Error processing image: {e}")
@@ -69,9 +122,11 @@ async def create_upload_file(zip_code: str = None, file: UploadFile = None):
             "message": "Failed to process image",
             "error": str(e)
         })
+    finally:
+        response.headers["Server-Timing"] = _server_timing(timings)
 
 @router.post("/scanbarcode/")
-async def scan_barcode_endpoint(zip_code: str = None, barcode: str = None):
+async def scan_barcode_endpoint(response: Response, zip_code: str = None, barcode: str = None):
     if not barcode:
         raise HTTPException(status_code=400, detail={
             "message": "Barcode code is required",
@@ -83,14 +138,15 @@ async def scan_barcode_endpoint(zip_code: str = None, barcode: str = None):
             "payload": zip_code
         })
     
+    timings = {}
     try:
-        # Use Gemini to get recycling info from barcode
-        result = get_recycling_info_from_barcode(barcode)
+        # Product databases + Gemini, cached per barcode
+        result = await _timed(timings, "lookup", get_recycling_info, barcode)
         
         # Find recycling places
         if result.get("material") or result.get("product_name"):
             query_term = result.get("material") or result.get("product_name")
-            places = find_recycling_places(f"recycling center for {query_term}", zip_code)
+            places = await _timed(timings, "places", find_recycling_places, f"recycling center for {query_term}", zip_code)
             result["places"] = places
             
         return result
@@ -100,3 +156,5 @@ async def scan_barcode_endpoint(zip_code: str = None, barcode: str = None):
             "message": "Failed to process barcode",
             "error": str(e)
         })
+    finally:
+        response.headers["Server-Timing"] = _server_timing(timings)
@@ -0,0 +1,173 @@
+"""
+Pool of long-lived headless Chromium browsers for the Playwright scrapers.
+
+Launching Chromium costs seconds and a few hundred MB, so browsers are kept
+alive and every scrape gets a fresh, isolated BrowserContext (own cookies,
+storage and cache) instead. A semaphore caps concurrent scrapes at the pool
+size; callers beyond that wait, and the wait is reported in stats(). A
+browser is closed and replaced after BROWSER_MAX_USES scrapes, or as soon
+as it disconnects (crash, OOM kill).
+
+    async with get_browser_pool().context(viewport=...) as context:
+        page = await context.new_page()
+"""
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# -------- Config --------
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+BROWSER_MAX_USES = int(os.getenv("BROWSER_MAX_USES", "50"))
+
+LAUNCH_ARGS = [
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-blink-features=AutomationControlled',
+    '--disable-web-security',
+    '--disable-features=IsolateOrigins,site-per-process',
+    '--disable-dev-shm-usage',
+]
+
+class _PooledBrowser:
+    __slots__ = ("browser", "uses")
+
+    def __init__(self, browser: Any):
+        self.browser = browser
+        self.uses = 0
+
+class BrowserPool:
+    def __init__(
+        self,
+        size: int = BROWSER_POOL_SIZE,
+        max_uses: int = BROWSER_MAX_USES,
+        launch: Optional[Callable[[], Awaitable[Any]]] = None,
+    ):
+        self.size = max(size, 1)
+        self.max_uses = max(max_uses, 1)
+        self._launch = launch or self._launch_chromium
+        self._playwright = None
+        self._semaphore = asyncio.Semaphore(self.size)
+        self._idle: List[_PooledBrowser] = []
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+        self.launched = 0
+        self.recycled = 0
+        self.crashed = 0
+        self.scrapes = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+
+    async def _launch_chromium(self) -> Any:
+        if self._playwright is None:
+            from playwright.async_api import async_playwright
+            self._playwright = await async_playwright().start()
+        return await self._playwright.chromium.launch(headless=True, args=LAUNCH_ARGS)
+
+    async def _checkout(self) -> _PooledBrowser:
+        while self._idle:
+            pooled = self._idle.pop()
+            if pooled.browser.is_connected():
+                return pooled
+            self.crashed += 1
+        pooled = _PooledBrowser(await self._launch())
+        self.launched += 1
+        return pooled
+
+    async def _checkin(self, pooled: _PooledBrowser) -> None:
+        pooled.uses += 1
+        if not pooled.browser.is_connected():
+            self.crashed += 1
+            logger.warning("Browser disconnected after %d uses, replacing it", pooled.uses)
+            return
+        if self._closed or pooled.uses >= self.max_uses:
+            self.recycled += 1
+            await self._close_browser(pooled)
+            return
+        self._idle.append(pooled)
+
+    @staticmethod
+    async def _close_browser(pooled: _PooledBrowser) -> None:
+        try:
+            await pooled.browser.close()
+        except Exception as e:
+            logger.debug("Ignoring error closing browser: %s", e)
+
+    @asynccontextmanager
+    async def context(self, **context_options) -> AsyncIterator[Any]:
+        """Borrow a browser and yield a fresh context on it; the context is always closed afterwards."""
+        if self._closed:
+            raise RuntimeError("Browser pool is closed")
+        started = time.perf_counter()
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        wait_ms = (time.perf_counter() - started) * 1000
+        self.wait_ms_total += wait_ms
+        self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+        self.scrapes += 1
+        self._in_use += 1
+
+        pooled = None
+        try:
+            pooled = await self._checkout()
+            context = await pooled.browser.new_context(**context_options)
+            try:
+                yield context
+            finally:
+                try:
+                    await context.close()
+                except Exception as e:
+                    logger.debug("Ignoring error closing context: %s", e)
+        finally:
+            if pooled is not None:
+                await self._checkin(pooled)
+            self._in_use -= 1
+            self._semaphore.release()
+
+    async def close(self) -> None:
+        self._closed = True
+        idle, self._idle = self._idle, []
+        for pooled in idle:
+            await self._close_browser(pooled)
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "max_uses": self.max_uses,
+            "in_use": self._in_use,
+            "idle": len(self._idle),
+            "waiting": self._waiting,
+            "launched": self.launched,
+            "recycled": self.recycled,
+            "crashed": self.crashed,
+            "scrapes": self.scrapes,
+            "avg_wait_ms": round(self.wait_ms_total / self.scrapes, 3) if self.scrapes else 0.0,
+            "max_wait_ms": round(self.wait_ms_max, 3),
+        }
+
+# -------- Shared instance --------
+_pool: Optional[BrowserPool] = None
+
+def get_browser_pool() -> BrowserPool:
+    """The worker's shared pool. Browsers are launched on first use, not here."""
+    global _pool
+    if _pool is None:
+        _pool = BrowserPool()
+    return _pool
+
+async def close_browser_pool() -> None:
+    global _pool
+    if _pool is not None:
+        pool, _pool = _pool, None
+        await pool.close()
@@ -0,0 +1,69 @@
+"""
+Process-wide pooled httpx clients for the HTTP scrapers.
+
+One AsyncClient per upstream origin, so connection limits are per host and
+a connection (TCP + TLS, HTTP/2 when the `h2` package is installed) is
+reused across lookups instead of being set up for every call. Clients are
+created on first use inside the worker's event loop and closed on shutdown.
+
+    client = get_http_client("https://api.recollect.net")
+    resp = await client.get("https://api.recollect.net/api/...")
+
+Limits come from HTTP_MAX_CONNECTIONS_PER_HOST / HTTP_MAX_KEEPALIVE_PER_HOST,
+with per-host overrides in HTTP_HOST_LIMITS, e.g. "api.recollect.net=20".
+"""
+from typing import Any, Dict
+import importlib.util
+import logging
+import os
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# -------- Config --------
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "15"))
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "10"))
+HTTP_MAX_KEEPALIVE_PER_HOST = int(os.getenv("HTTP_MAX_KEEPALIVE_PER_HOST", "5"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_HOST_LIMITS = os.getenv("HTTP_HOST_LIMITS", "")
+
+HTTP2 = importlib.util.find_spec("h2") is not None
+
+def _host_limits(spec: str) -> Dict[str, int]:
+    """Parse "host=max_connections,host=max_connections"."""
+    limits = {}
+    for item in spec.split(","):
+        host, _, value = item.partition("=")
+        if host.strip() and value.strip().isdigit():
+            limits[host.strip().lower()] = int(value)
+    return limits
+
+_limits_by_host = _host_limits(HTTP_HOST_LIMITS)
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+def limits_for(host: str) -> httpx.Limits:
+    max_connections = _limits_by_host.get(host.lower(), HTTP_MAX_CONNECTIONS_PER_HOST)
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=min(HTTP_MAX_KEEPALIVE_PER_HOST, max_connections),
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+
+def get_http_client(url: str) -> httpx.AsyncClient:
+    """The shared client for url's origin (scheme, host and port)."""
+    parsed = httpx.URL(url)
+    origin = f"{parsed.scheme}://{parsed.netloc.decode('ascii')}"
+    client = _clients.get(origin)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(http2=HTTP2, limits=limits_for(parsed.host), timeout=HTTP_TIMEOUT)
+        _clients[origin] = client
+    return client
+
+async def close_http_clients() -> None:
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
+
+def get_http_client_stats() -> Dict[str, Any]:
+    return {"http2": HTTP2, "clients": sorted(_clients)}
@@ -0,0 +1,187 @@
+"""
+City adapter registry for collection schedule scrapers.
+
+Each supported municipality registers one CityAdapter under its normalized
+(state, city) key. An adapter wraps a scraper with its own concurrency limit,
+timeout and result TTL, and keeps health and latency stats, so one slow
+upstream queues behind its own semaphore instead of tying up the worker.
+
+    adapter = get_adapter("San José", "CA")
+    schedule = await adapter.fetch("200 E Santa Clara St")
+
+Per-adapter settings can be overridden from the environment with
+SCRAPER_<NAME>_CONCURRENCY, SCRAPER_<NAME>_TIMEOUT and SCRAPER_<NAME>_TTL_HOURS,
+e.g. SCRAPER_SAN_JOSE_TIMEOUT=120.
+"""
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import asyncio
+import logging
+import os
+import time
+import unicodedata
+from scrapers.san_jose import get_san_jose_schedule
+from scrapers.santa_clara import fetch_calendar
+from services.timing_window import TimingWindow
+
+logger = logging.getLogger(__name__)
+
+# -------- Config --------
+SCRAPER_CONCURRENCY = int(os.getenv("SCRAPER_CONCURRENCY", "4"))
+SCRAPER_TIMEOUT = float(os.getenv("SCRAPER_TIMEOUT", "60"))
+SCRAPER_TTL_HOURS = float(os.getenv("SCHEDULE_TTL_HOURS", "168"))
+# Consecutive failures after which an adapter reports itself unhealthy
+SCRAPER_UNHEALTHY_AFTER = int(os.getenv("SCRAPER_UNHEALTHY_AFTER", "3"))
+LATENCY_WINDOW = 100
+
+Scraper = Callable[[str], Awaitable[Any]]
+
+def _env(name: str, setting: str, default):
+    value = os.getenv(f"SCRAPER_{name.upper()}_{setting}")
+    return type(default)(value) if value else default
+
+class ScrapeFailedError(RuntimeError):
+    """The upstream timed out or the scraper raised; distinct from an empty (not found) result."""
+
+class CityAdapter:
+    """One municipality's scraper with its own limits and stats."""
+    def __init__(
+        self, name: str, scraper: Scraper,
+        concurrency: int = SCRAPER_CONCURRENCY, timeout: float = SCRAPER_TIMEOUT, ttl_hours: float = SCRAPER_TTL_HOURS,
+    ):
+        self.name = name
+        self.scraper = scraper
+        self.concurrency = max(_env(name, "CONCURRENCY", concurrency), 1)
+        self.timeout = _env(name, "TIMEOUT", float(timeout))
+        self.ttl_hours = _env(name, "TTL_HOURS", float(ttl_hours))
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._latencies_ms = TimingWindow(LATENCY_WINDOW)
+        self.running = 0
+        self.waiting = 0
+        self.calls = 0
+        self.empty = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.consecutive_failures = 0
+        self.last_error: Optional[str] = None
+        self.last_success_at: Optional[float] = None
+
+    def _slots(self) -> asyncio.Semaphore:
+        # Created in the running loop; adapters are registered at import time
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore, self._loop = asyncio.Semaphore(self.concurrency), loop
+        return self._semaphore
+
+    async def _run(self, address: str):
+        slots = self._slots()
+        self.waiting += 1
+        try:
+            await slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        started = time.perf_counter()
+        try:
+            return await self.scraper(address)
+        finally:
+            self.running -= 1
+            slots.release()
+            self._latencies_ms.add((time.perf_counter() - started) * 1000)
+
+    async def fetch(self, address: str):
+        """
+        Scrape one address. The timeout covers the wait for a slot as well as
+        the scrape. Timeouts and scraper errors are recorded and raised as
+        ScrapeFailedError.
+        """
+        self.calls += 1
+        try:
+            result = await asyncio.wait_for(self._run(address), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self._failed(f"timed out after {self.timeout:g}s")
+            raise ScrapeFailedError(f"{self.name}: {self.last_error}") from None
+        except Exception as e:
+            self._failed(repr(e))
+            raise ScrapeFailedError(f"{self.name}: {self.last_error}") from e
+        if not result:
+            self.empty += 1
+        self.consecutive_failures = 0
+        self.last_success_at = time.time()
+        return result
+
+    def _failed(self, error: str) -> None:
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_error = error
+        logger.warning("%s scraper failed: %s", self.name, error)
+
+    @property
+    def healthy(self) -> bool:
+        return self.consecutive_failures < SCRAPER_UNHEALTHY_AFTER
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "healthy": self.healthy,
+            "concurrency": self.concurrency,
+            "timeout_s": self.timeout,
+            "ttl_hours": self.ttl_hours,
+            "running": self.running,
+            "waiting": self.waiting,
+            "calls": self.calls,
+            "empty": self.empty,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "last_success_at": self.last_success_at,
+            "latency_ms": {"p50": self._latencies_ms.percentile(0.5), "p95": self._latencies_ms.percentile(0.95)},
+        }
+
+# -------- Registry --------
+_adapters: Dict[Tuple[str, str], CityAdapter] = {}
+
+def region_key(city: str | None, state: str | None) -> Tuple[str, str]:
+    """("ca", "san jose") for "San José", "CA": accents stripped, case and spacing folded."""
+    def fold(text: str | None) -> str:
+        text = unicodedata.normalize("NFKD", text or "")
+        return " ".join("".join(c for c in text if not unicodedata.combining(c)).casefold().split())
+    return fold(state), fold(city)
+
+def register_adapter(city: str, state: str, adapter: CityAdapter) -> CityAdapter:
+    _adapters[region_key(city, state)] = adapter
+    return adapter
+
+def get_adapter(city: str | None, state: str | None = None) -> Optional[CityAdapter]:
+    """The adapter for a city; without a state, only if the city name is unambiguous."""
+    state_key, city_key = region_key(city, state)
+    if state_key:
+        return _adapters.get((state_key, city_key))
+    matches = [a for (_, c), a in _adapters.items() if c == city_key]
+    return matches[0] if len(matches) == 1 else None
+
+def get_adapter_stats() -> Dict[str, Any]:
+    return {adapter.name: adapter.stats() for adapter in _adapters.values()}
+
+# -------- Built-in cities --------
+def _static(url: str) -> Scraper:
+    # Cities that only publish a calendar page get its URL as the schedule
+    async def scrape(address: str) -> str:
+        return url
+    return scrape
+
+def _register_builtin() -> None:
+    # Concurrency matches the browser pool; extra scrapes would only queue for a browser
+    register_adapter("San Jose", "CA", CityAdapter(
+        "san_jose", get_san_jose_schedule, concurrency=int(os.getenv("BROWSER_POOL_SIZE", "2")), timeout=90,
+    ))
+    register_adapter("Santa Clara", "CA", CityAdapter("santa_clara", fetch_calendar, concurrency=8, timeout=20))
+    register_adapter("Cupertino", "CA", CityAdapter(
+        "cupertino", _static("https://www.recology.com/recology-south-bay/cupertino/collection-calendar/"), ttl_hours=720,
+    ))
+    register_adapter("San Francisco", "CA", CityAdapter(
+        "san_francisco", _static("https://www.recology.com/recology-san-francisco/collection-calendar/"), ttl_hours=720,
+    ))
+
+_register_builtin()
@@ -0,0 +1,76 @@
+"""
+Replay harness for the San Jose scraper.
+
+Serves the saved pages in mock_data/ from a local HTTP server and times
+get_san_jose_schedule against them on a warm browser pool. The fixed sleeps
+the old flow spent on every scrape are printed next to the measurements for
+comparison.
+
+    python -m scrapers.replay [--runs 5] [--delay 150] [--address "200 E Santa Clara St"]
+
+--delay is the stub page's simulated server latency (ms) for autocomplete and
+search. Needs Chromium (python -m playwright install chromium).
+"""
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+
+from scrapers import san_jose
+from scrapers.browser_pool import BrowserPool
+
+MOCK_DATA_DIR = Path(__file__).resolve().parents[1] / "mock_data"
+
+# wait_for_timeout pauses (1500 + 100 + 300 + 1500 + 300 + 800 + 2000 ms) plus
+# 80 ms per typed character in the flow this replaced
+LEGACY_FIXED_SLEEP_MS = 6500
+LEGACY_PER_CHAR_MS = 80
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+def serve_mock_data() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(_QuietHandler, directory=str(MOCK_DATA_DIR)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+async def replay(address: str, runs: int, delay_ms: int) -> list[float]:
+    server = serve_mock_data()
+    pool = BrowserPool(size=1)
+    san_jose.get_browser_pool = lambda: pool
+    url = f"http://127.0.0.1:{server.server_port}/san_jose_311.html?delay={delay_ms}"
+    timings = []
+    try:
+        # One untimed scrape so browser launch is not counted
+        await san_jose.get_san_jose_schedule(address, url=url)
+        for _ in range(runs):
+            started = time.perf_counter()
+            schedule = await san_jose.get_san_jose_schedule(address, url=url)
+            timings.append((time.perf_counter() - started) * 1000)
+            if not schedule:
+                raise RuntimeError("Scrape of the stub page returned no schedule")
+    finally:
+        await pool.close()
+        server.shutdown()
+    return timings
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--delay", type=int, default=150)
+    parser.add_argument("--address", default="200 E Santa Clara St")
+    args = parser.parse_args()
+
+    timings = asyncio.run(replay(args.address, args.runs, args.delay))
+    legacy_floor = LEGACY_FIXED_SLEEP_MS + LEGACY_PER_CHAR_MS * len(args.address)
+    print(f"scrape: median {statistics.median(timings):.0f} ms, max {max(timings):.0f} ms over {args.runs} runs "
+          f"(stub latency {args.delay} ms x 2)")
+    print(f"legacy flow: {legacy_floor} ms of fixed sleeps per scrape before any page work")
+
+if __name__ == "__main__":
+    main()
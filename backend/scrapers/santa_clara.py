@@ -1,60 +1,72 @@
 import asyncio
 import json
 import logging
-from datetime import datetime
+from datetime import date, timedelta
+import os
 import httpx
+from scrapers.http_client import get_http_client
+from services import recollect_cache
 
 API_BASE_URL = "https://api.recollect.net/api"
 AREA_ID = "recology-1052"
 SERVICE_ID = "293"
+CALENDAR_WINDOW_DAYS = int(os.getenv("RECOLLECT_WINDOW_DAYS", "365"))
 
 logger = logging.getLogger(__name__)
 
 async def try_recollect_api(address: str) -> list[dict]:
-    """Get schedule data directly from Recollect API."""
-    try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            suggestions = await _fetch_address_suggestions(client, address)
-            if not suggestions:
-                return []
-            first_match = suggestions[0]
-            place_id = first_match.get("place_id") or first_match.get("id")
-            if not place_id:
-                return []
-            return await _fetch_calendar_for_place(client, place_id)
-    except Exception as e:
-        logger.exception("API request failed: %s", e)
-    return []
+    """
+    Get schedule data directly from Recollect API. The address -> place_id
+    and place_id -> events lookups are cached separately (services.recollect_cache),
+    so a new address on a known route costs only the suggest call.
+
+    Returns [] only when Recollect does not know the address; HTTP and
+    network errors propagate so the caller can tell a failure from no match.
+    """
+    # Shared keep-alive client; both calls reuse the pooled connection
+    client = get_http_client(API_BASE_URL)
+    place_id = recollect_cache.get_place_id(AREA_ID, address)
+    if place_id is None:
+        suggestions = await _fetch_address_suggestions(client, address)
+        if not suggestions:
+            return []
+        first_match = suggestions[0]
+        place_id = first_match.get("place_id") or first_match.get("id")
+        if not place_id:
+            return []
+        place_id = str(place_id)
+        recollect_cache.put_place_id(AREA_ID, address, place_id)
+
+    events = recollect_cache.get_calendar(place_id)
+    if events is None:
+        events = await _fetch_calendar_for_place(client, place_id)
+        if events:
+            recollect_cache.put_calendar(place_id, events)
+    return events
 
 async def fetch_calendar(address: str, headless: bool = True):
     return await try_recollect_api(address)
 
 async def _fetch_address_suggestions(client: httpx.AsyncClient, address: str) -> list[dict]:
     url = f"{API_BASE_URL}/areas/{AREA_ID}/services/{SERVICE_ID}/address-suggest"
-    try:
-        resp = await client.get(url, params={"q": address})
-        resp.raise_for_status()
-    except httpx.HTTPError as exc:
-        logger.warning("Suggest request failed for %s: %s", address, exc)
-        return []
+    resp = await client.get(url, params={"q": address})
+    resp.raise_for_status()
     data = resp.json()
-    if isinstance(data, list):
-        return data
-    logger.debug("Unexpected suggest payload: %s", json.dumps(data))
-    return []
+    if not isinstance(data, list):
+        raise ValueError(f"Unexpected suggest payload: {json.dumps(data)[:200]}")
+    return data
 
 async def _fetch_calendar_for_place(client: httpx.AsyncClient, place_id: str) -> list[dict]:
-    year = datetime.now().year
-    params = {"after": f"{year}-01-01", "before": f"{year}-12-31"}
+    # Rolling window so schedules fetched in December still cover January
+    today = date.today()
+    params = {"after": today.isoformat(), "before": (today + timedelta(days=CALENDAR_WINDOW_DAYS)).isoformat()}
     url = f"{API_BASE_URL}/places/{place_id}/services/{SERVICE_ID}/events"
-    try:
-        resp = await client.get(url, params=params)
-        resp.raise_for_status()
-    except httpx.HTTPError as exc:
-        logger.warning("Calendar request failed for %s: %s", place_id, exc)
-        return []
+    resp = await client.get(url, params=params)
+    resp.raise_for_status()
     payload = resp.json()
-    events = payload.get("events", []) if isinstance(payload, dict) else []
+    if not isinstance(payload, dict):
+        raise ValueError(f"Unexpected calendar payload: {json.dumps(payload)[:200]}")
+    events = payload.get("events", [])
     items = []
     for event in events:
         event_date = event.get("day")
@@ -0,0 +1,142 @@
+"""
+Canonical keys for street addresses, following USPS Publication 28 style.
+
+"200 East Santa Clara Street, San Jose, CA 95113" and "200 e. santa clara st"
+both become "200 E SANTA CLARA ST": uppercase, punctuation dropped, standard
+abbreviations for directionals, street suffixes and unit designators, and the
+city/state/ZIP tail removed (the ZIP is keyed separately).
+
+The tail is removed when it is comma-separated, or when the address ends in a
+state code or ZIP ("200 Main St San Jose CA 95113"); then everything after
+the street suffix, a directional and a unit is taken as the city. A bare city
+with no comma, state or ZIP ("200 Main St San Jose") cannot be told from the
+street name and is kept.
+"""
+import re
+import unicodedata
+
+# -------- Tables (USPS Pub 28, appendix C) --------
+DIRECTIONALS = {
+    "NORTH": "N", "SOUTH": "S", "EAST": "E", "WEST": "W",
+    "NORTHEAST": "NE", "NORTHWEST": "NW", "SOUTHEAST": "SE", "SOUTHWEST": "SW",
+}
+
+STREET_SUFFIXES = {
+    "ALLEY": "ALY", "AVENUE": "AVE", "AV": "AVE", "AVEN": "AVE", "BOULEVARD": "BLVD", "BOUL": "BLVD",
+    "CIRCLE": "CIR", "CIRC": "CIR", "COURT": "CT", "CRT": "CT", "COVE": "CV", "CRESCENT": "CRES",
+    "DRIVE": "DR", "DRV": "DR", "EXPRESSWAY": "EXPY", "EXPRESS": "EXPY", "FREEWAY": "FWY",
+    "HIGHWAY": "HWY", "HIWAY": "HWY", "LANE": "LN", "LOOP": "LOOP", "PARKWAY": "PKWY", "PKY": "PKWY",
+    "PLACE": "PL", "PLAZA": "PLZ", "POINT": "PT", "ROAD": "RD", "ROUTE": "RTE", "SQUARE": "SQ",
+    "STREET": "ST", "STR": "ST", "TERRACE": "TER", "TRAIL": "TRL", "TURNPIKE": "TPKE",
+    "WAY": "WAY", "WALK": "WALK",
+}
+
+UNIT_DESIGNATORS = {
+    "APARTMENT": "APT", "APT": "APT", "SUITE": "STE", "STE": "STE", "UNIT": "UNIT",
+    "BUILDING": "BLDG", "BLDG": "BLDG", "FLOOR": "FL", "FL": "FL", "ROOM": "RM", "RM": "RM",
+    "SPACE": "SPC", "SPC": "SPC", "LOT": "LOT", "#": "#",
+}
+
+_SUFFIX_FORMS = set(STREET_SUFFIXES) | set(STREET_SUFFIXES.values())
+_DIRECTIONAL_FORMS = set(DIRECTIONALS) | set(DIRECTIONALS.values())
+STATE_CODES = {
+    "AL", "AK", "AZ", "AR", "CA", "CO", "CT", "DE", "DC", "FL", "GA", "HI", "ID", "IL", "IN", "IA", "KS",
+    "KY", "LA", "ME", "MD", "MA", "MI", "MN", "MS", "MO", "MT", "NE", "NV", "NH", "NJ", "NM", "NY", "NC",
+    "ND", "OH", "OK", "OR", "PA", "PR", "RI", "SC", "SD", "TN", "TX", "UT", "VT", "VA", "WA", "WV", "WI", "WY",
+}
+
+_PUNCTUATION = re.compile(r"[^\w\s#-]")
+_ZIP = re.compile(r"\d{5}(-\d{4})?")
+
+# -------- Helpers --------
+def _words(text: str) -> list[str]:
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = _PUNCTUATION.sub(" ", text.upper()).replace("#", " # ")
+    return text.split()
+
+def _is_tail(words: list[str]) -> bool:
+    """A comma-separated part that is a state and/or ZIP ("CA 95113", "95113")."""
+    return bool(words) and (words[0] in STATE_CODES or _ZIP.fullmatch(words[0]) is not None)
+
+def _drop_city_tail(words: list[str], has_tail: bool) -> list[str]:
+    """
+    "200 Main St Apt 5 San Jose CA 95113" -> "200 Main St Apt 5". Only for
+    addresses that end in a state or ZIP here or in a later part; the street
+    ends after its suffix, a directional and a unit.
+    """
+    end = len(words)
+    if end > 2 and _ZIP.fullmatch(words[end - 1]):
+        end -= 1
+    if end > 2 and words[end - 1] in STATE_CODES:
+        end -= 1
+    if end == len(words) and not has_tail:
+        return words
+    suffix_at = next((i for i in range(2, end) if words[i] in _SUFFIX_FORMS), None)
+    if suffix_at is None:
+        return words[:end]
+    i = suffix_at + 1
+    if i < end and words[i] in _DIRECTIONAL_FORMS:
+        i += 1
+    if i < end and words[i] in UNIT_DESIGNATORS:
+        i = min(i + 2, end)
+    return words[:i]
+
+def _is_unit_id(word: str) -> bool:
+    return any(c.isdigit() for c in word) or len(word) == 1
+
+def _is_unit_start(words: list[str], i: int) -> bool:
+    # "100 Space Park Dr": Space is part of the street name. A unit word
+    # starts the unit right after the suffix (or suffix + directional), or
+    # when only a unit number follows it ("200 Main Suite 5")
+    if words[i] == "#":
+        return i > 0
+    if words[i] not in UNIT_DESIGNATORS or i < 2:
+        return False
+    if i == len(words) - 2 and _is_unit_id(words[-1]):
+        return True
+    before = words[i - 1]
+    if before in _DIRECTIONAL_FORMS and i >= 3:
+        before = words[i - 2]
+    return before in _SUFFIX_FORMS
+
+def _street_line(words: list[str], unit: list[str]) -> list[str]:
+    # Everything from the first unit designator on is the unit; units from
+    # later comma-separated parts follow it
+    unit_at = next((i for i in range(len(words)) if _is_unit_start(words, i)), len(words))
+    street, unit = words[:unit_at], words[unit_at:] + unit
+
+    # "100 North Ave": North is the street name, not a directional
+    if len(street) >= 3 and street[1] in DIRECTIONALS and not (len(street) == 3 and street[2] in _SUFFIX_FORMS):
+        street[1] = DIRECTIONALS[street[1]]
+    if len(street) >= 3 and street[-1] in DIRECTIONALS:
+        street[-1] = DIRECTIONALS[street[-1]]
+        suffix_at = len(street) - 2
+    else:
+        suffix_at = len(street) - 1
+    # "100 Park" keeps Park; only a word after the street name is a suffix
+    if suffix_at >= 2 and street[suffix_at] in STREET_SUFFIXES:
+        street[suffix_at] = STREET_SUFFIXES[street[suffix_at]]
+
+    if unit:
+        unit[0] = UNIT_DESIGNATORS[unit[0]]
+        if unit[0] == "#" and len(unit) > 1:
+            unit = ["#" + "".join(unit[1:])]
+    return street + unit
+
+# -------- Public API --------
+def normalize_address(address: str) -> str:
+    """
+    Canonical key for the street part of an address. Comma-separated parts
+    after the first are kept only when they are a unit ("Apt 5", "#5").
+    """
+    parts = [p for p in (address or "").split(",") if p.strip()]
+    if not parts:
+        return ""
+    unit, has_tail = [], False
+    for part in parts[1:]:
+        part_words = _words(part)
+        if part_words and part_words[0] in UNIT_DESIGNATORS:
+            unit += part_words
+        has_tail = has_tail or _is_tail(part_words)
+    return " ".join(_street_line(_drop_city_tail(_words(parts[0]), has_tail), unit))
@@ -0,0 +1,113 @@
+"""
+Cache of recycling info per barcode, in front of the product databases and
+Gemini (services.gemini_scanner_service.get_recycling_info_from_barcode).
+
+Two tiers: an in-memory LRU per worker, then the barcode_results table shared
+by every worker, each entry living BARCODE_CACHE_TTL_HOURS. Keys are GTIN-14,
+so the UPC-A "049000050103" and the EAN-13 "0049000050103" printed on the
+same bottle share one entry.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+import copy
+import os
+import threading
+from database.db import SessionLocal
+from repositories import barcode_repository
+from services.cache_service import LRUCache
+from services.cache_store import best_effort_write, utcnow as _utcnow
+from services.gemini_scanner_service import get_recycling_info_from_barcode, product_sources
+
+# -------- Config --------
+BARCODE_CACHE_TTL_HOURS = float(os.getenv("BARCODE_CACHE_TTL_HOURS", "720"))
+BARCODE_CACHE_SIZE = int(os.getenv("BARCODE_CACHE_SIZE", "1024"))
+# Gemini guesses made while the product databases were failing; retried soon
+BARCODE_CACHE_ERROR_TTL_MINUTES = float(os.getenv("BARCODE_CACHE_ERROR_TTL_MINUTES", "10"))
+
+# Estimate, not a count: a miss sends a request to every product database
+# plus one Gemini call, though a hit may cancel some database requests early
+EST_UPSTREAM_CALLS_PER_MISS = len(product_sources("")) + 1
+# Fallback answers from a response Gemini could not structure; not worth keeping
+_UNCACHEABLE_SOURCES = {"Parse error"}
+
+_memory = LRUCache(maxsize=BARCODE_CACHE_SIZE)
+_lock = threading.Lock()
+_stats = {"lookups": 0, "memory_hits": 0, "db_hits": 0, "misses": 0, "est_upstream_calls": 0, "est_upstream_calls_saved": 0}
+
+def _count(**deltas: int) -> None:
+    with _lock:
+        for key, delta in deltas.items():
+            _stats[key] += delta
+
+# -------- Helpers --------
+def normalize_barcode(barcode: str) -> str:
+    """
+    GTIN-14 for EAN-8, UPC-A, EAN-13 and GTIN-14 codes (zero-padded digits);
+    other symbologies keep their stripped text. Eight digits are read as
+    EAN-8: the text alone cannot tell it from a UPC-E, so a UPC-E keeps a
+    key of its own rather than its UPC-A's.
+    """
+    text = (barcode or "").strip()
+    digits = text.replace(" ", "").replace("-", "")
+    if digits.isdigit() and len(digits) in (8, 12, 13, 14):
+        return digits.zfill(14)
+    return text
+
+def _load(gtin: str) -> Optional[Dict[str, Any]]:
+    db = SessionLocal()
+    try:
+        row = barcode_repository.get_result(db, gtin, _utcnow())
+        return None if row is None else {"result": row.result, "expires_at": row.expires_at, "upstream_calls": row.upstream_calls}
+    finally:
+        db.close()
+
+def _store(gtin: str, entry: Dict[str, Any], fetched_at: datetime) -> None:
+    row = {
+        "result": entry["result"],
+        "data_source": entry["result"].get("data_source"),
+        "upstream_calls": entry["upstream_calls"],
+        "fetched_at": fetched_at,
+        "expires_at": entry["expires_at"],
+    }
+    best_effort_write(SessionLocal, lambda db: barcode_repository.save_result(db, gtin, row), f"barcode {gtin}")
+
+# -------- Public API --------
+async def get_recycling_info(barcode: str, fetch: Optional[Callable[[str], Awaitable[Dict[str, Any]]]] = None) -> Dict[str, Any]:
+    """
+    Recycling info for a barcode from memory, then the database, then
+    upstream. Returns a copy the caller may modify (e.g. to add places).
+    """
+    fetch = fetch or get_recycling_info_from_barcode
+    gtin = normalize_barcode(barcode)
+    now = _utcnow()
+    _count(lookups=1)
+
+    entry = _memory.get(gtin)
+    if entry is not None and entry["expires_at"] > now:
+        _count(memory_hits=1, est_upstream_calls_saved=entry["upstream_calls"])
+        return copy.deepcopy(entry["result"])
+
+    entry = _load(gtin)
+    if entry is not None:
+        _memory.put(gtin, entry)
+        _count(db_hits=1, est_upstream_calls_saved=entry["upstream_calls"])
+        return copy.deepcopy(entry["result"])
+
+    result = await fetch(barcode)
+    calls = EST_UPSTREAM_CALLS_PER_MISS
+    _count(misses=1, est_upstream_calls=calls)
+    if result.get("data_source") not in _UNCACHEABLE_SOURCES:
+        # A guess made while the databases were down must not stand in for a month
+        ttl = timedelta(minutes=BARCODE_CACHE_ERROR_TTL_MINUTES) if result.get("lookup_error") else timedelta(hours=BARCODE_CACHE_TTL_HOURS)
+        entry = {"result": copy.deepcopy(result), "expires_at": now + ttl, "upstream_calls": calls}
+        _memory.put(gtin, entry)
+        _store(gtin, entry, now)
+    return result
+
+def get_barcode_cache_stats() -> Dict[str, Any]:
+    with _lock:
+        stats = dict(_stats)
+    hits = stats["memory_hits"] + stats["db_hits"]
+    stats["hit_ratio"] = round(hits / stats["lookups"], 4) if stats["lookups"] else 0.0
+    stats["memory"] = _memory.stats()
+    return stats
@@ -0,0 +1,218 @@
+"""
+Decode an uploaded photo once, look for a barcode, and prepare the image
+for Gemini. Blocking; run it on the image pool (services.image_pool), not on
+the event loop.
+
+Phone photos are 3-12 MB, far more pixels than zxing or Gemini need:
+
+1. Decode once with cv2.IMREAD_REDUCED_COLOR_{2,4,8}, picking the factor
+   from the size in the JPEG/PNG header so the longest side is at most
+   IMAGE_DETECT_MAX_SIDE. The libjpeg decoder scales while decoding, so
+   this is much cheaper than a full decode.
+2. Detect on a grayscale pyramid, coarsest level first, and only when
+   every level misses, decode the original at full resolution and retry.
+3. With no barcode found, recompress the decoded image to a JPEG of at most
+   GEMINI_IMAGE_MAX_SIDE pixels and GEMINI_IMAGE_MAX_BYTES for Gemini, and
+   take its dHash so services.image_cache can find an earlier photo of the
+   same product.
+
+Decode time, detection attempts/hits per level and bytes sent are kept in
+get_preprocess_stats().
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import os
+import threading
+import time
+import cv2
+import numpy as np
+import zxingcpp
+from services.timing_window import TimingWindow
+
+# -------- Config --------
+IMAGE_DETECT_MAX_SIDE = int(os.getenv("IMAGE_DETECT_MAX_SIDE", "1600"))
+IMAGE_PYRAMID_LEVELS = int(os.getenv("IMAGE_PYRAMID_LEVELS", "2"))
+GEMINI_IMAGE_MAX_SIDE = int(os.getenv("GEMINI_IMAGE_MAX_SIDE", "1024"))
+GEMINI_IMAGE_MAX_BYTES = int(os.getenv("GEMINI_IMAGE_MAX_BYTES", str(300 * 1024)))
+GEMINI_JPEG_QUALITY = int(os.getenv("GEMINI_JPEG_QUALITY", "85"))
+
+_REDUCED_COLOR = {1: cv2.IMREAD_COLOR, 2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+
+# -------- Stats --------
+_lock = threading.Lock()
+_decode_ms: Dict[str, TimingWindow] = {}
+_levels: Dict[str, Dict[str, int]] = {}
+_bytes = {"images": 0, "received": 0, "sent_to_gemini": 0, "gemini_images": 0}
+
+def _record_decode(mode: str, ms: float) -> None:
+    with _lock:
+        _decode_ms.setdefault(mode, TimingWindow()).add(ms)
+
+def _record_level(level: str, hit: bool) -> None:
+    with _lock:
+        counts = _levels.setdefault(level, {"attempts": 0, "hits": 0})
+        counts["attempts"] += 1
+        counts["hits"] += int(hit)
+
+def get_preprocess_stats() -> Dict[str, Any]:
+    with _lock:
+        decode = {mode: {"count": len(v), "median_ms": v.percentile(0.5)} for mode, v in sorted(_decode_ms.items())}
+        levels = {
+            level: {**counts, "hit_rate": round(counts["hits"] / counts["attempts"], 3) if counts["attempts"] else None}
+            for level, counts in _levels.items()
+        }
+        return {"decode": decode, "levels": levels, "bytes": dict(_bytes)}
+
+# -------- Helpers --------
+def image_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """(width, height) from a PNG or JPEG header without decoding, else None."""
+    if data[:8] == b"\x89PNG\r\n\x1a\n" and len(data) >= 24:
+        return int.from_bytes(data[16:20], "big"), int.from_bytes(data[20:24], "big")
+    if data[:2] != b"\xff\xd8":
+        return None
+    i = 2
+    while i + 9 <= len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:  # fill byte
+            i += 1
+            continue
+        # SOF0-SOF15 carry the frame size; C4 (DHT), C8 and CC (arithmetic coding) do not
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            return int.from_bytes(data[i + 7:i + 9], "big"), int.from_bytes(data[i + 5:i + 7], "big")
+        i += 2 + int.from_bytes(data[i + 2:i + 4], "big")
+    return None
+
+def reduction_factor(size: Optional[Tuple[int, int]], max_side: int = IMAGE_DETECT_MAX_SIDE) -> int:
+    """The smallest of 1, 2, 4, 8 that brings the longest side within max_side."""
+    if size is None:
+        return 1
+    longest = max(size)
+    return next((f for f in (1, 2, 4, 8) if longest / f <= max_side), 8)
+
+def _pyramid(gray: np.ndarray, levels: int) -> List[Tuple[str, np.ndarray]]:
+    images = [gray]
+    for _ in range(max(levels, 1) - 1):
+        if min(images[-1].shape[:2]) < 200:
+            break
+        images.append(cv2.pyrDown(images[-1]))
+    # Coarsest first: cheapest, and most barcodes in product photos are large
+    return [(f"level_{i}", img) for i, img in reversed(list(enumerate(images)))]
+
+def _detect(image: np.ndarray) -> Optional[str]:
+    results = zxingcpp.read_barcodes(image)
+    return results[0].text if results else None
+
+def dhash(img: np.ndarray) -> int:
+    """
+    64-bit difference hash: shrink to 9x8 grayscale and set a bit wherever a
+    pixel is brighter than its right neighbour. Re-encoding, resizing and
+    small lighting changes flip few bits; a different product flips many.
+    """
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+def encode_for_gemini(img: np.ndarray) -> bytes:
+    """JPEG of at most GEMINI_IMAGE_MAX_SIDE px, lowering quality until it fits GEMINI_IMAGE_MAX_BYTES."""
+    height, width = img.shape[:2]
+    scale = GEMINI_IMAGE_MAX_SIDE / max(height, width)
+    if scale < 1:
+        img = cv2.resize(img, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+    quality = GEMINI_JPEG_QUALITY
+    while True:
+        ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ok:
+            raise ValueError("Could not encode image as JPEG")
+        if buf.size <= GEMINI_IMAGE_MAX_BYTES or quality <= 40:
+            return buf.tobytes()
+        quality -= 15
+
+# -------- Public API --------
+def read_barcode(image_bytes: bytes, prepare_for_gemini: bool = True) -> Dict[str, Any]:
+    """
+    {"barcode": text or None, "level": pyramid level that found it, "decoded": bool,
+     "jpeg": bounded JPEG for Gemini and "dhash": its perceptual hash (both only
+     when no barcode was found), "timings": {stage: ms}}.
+    "decoded" is False when the bytes are not an image cv2 can read.
+    """
+    timings: Dict[str, float] = {}
+    with _lock:
+        _bytes["images"] += 1
+        _bytes["received"] += len(image_bytes)
+
+    factor = reduction_factor(image_size(image_bytes))
+    started = time.perf_counter()
+    img = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), _REDUCED_COLOR[factor])
+    timings["decode"] = (time.perf_counter() - started) * 1000
+    _record_decode(f"reduced_{factor}", timings["decode"])
+    if img is None:
+        return {"barcode": None, "level": None, "decoded": False, "jpeg": None, "dhash": None, "timings": timings}
+
+    started = time.perf_counter()
+    barcode = level = None
+    for name, image in _pyramid(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY), IMAGE_PYRAMID_LEVELS):
+        barcode = _detect(image)
+        _record_level(name, barcode is not None)
+        if barcode:
+            level = name
+            break
+    timings["detect"] = (time.perf_counter() - started) * 1000
+
+    # Small or distant barcodes may only resolve at the original resolution
+    if barcode is None and factor > 1:
+        started = time.perf_counter()
+        full = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_GRAYSCALE)
+        timings["decode_full"] = (time.perf_counter() - started) * 1000
+        _record_decode("full", timings["decode_full"])
+        started = time.perf_counter()
+        barcode = _detect(full)
+        timings["detect_full"] = (time.perf_counter() - started) * 1000
+        _record_level("full", barcode is not None)
+        level = "full" if barcode else None
+
+    jpeg = image_hash = None
+    if barcode is None and prepare_for_gemini:
+        started = time.perf_counter()
+        image_hash = dhash(img)
+        jpeg = encode_for_gemini(img)
+        timings["encode"] = (time.perf_counter() - started) * 1000
+        with _lock:
+            _bytes["gemini_images"] += 1
+            _bytes["sent_to_gemini"] += len(jpeg)
+    return {"barcode": barcode, "level": level, "decoded": True, "jpeg": jpeg, "dhash": image_hash, "timings": timings}
+
+# -------- Bench --------
+def _bench(runs: int = 5) -> None:
+    """Full-resolution decode + detect vs. this pipeline, on a 12 MP photo built from the test barcode."""
+    import statistics
+    from pathlib import Path
+
+    barcode = cv2.imread(str(Path(__file__).resolve().parents[1] / "data" / "barcodes" / "test_bc.png"))
+    rng = np.random.default_rng(0)
+    photo = rng.integers(90, 160, (3000, 4000, 3), dtype=np.uint8)
+    photo = cv2.GaussianBlur(photo, (0, 0), 3)
+    photo[1200:1200 + 900, 1500:1500 + 1350] = cv2.resize(barcode, (1350, 900))
+    ok, buf = cv2.imencode(".jpg", photo, [cv2.IMWRITE_JPEG_QUALITY, 92])
+    data = buf.tobytes()
+
+    def baseline():
+        img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        return zxingcpp.read_barcodes(img)[0].text
+
+    def measure(fn):
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    print(f"photo: {photo.shape[1]}x{photo.shape[0]}, {len(data)} bytes")
+    print(f"  full: {measure(baseline):.1f} ms median (decode + detect)")
+    print(f"  pipeline: {measure(lambda: read_barcode(data)):.1f} ms median, found at {read_barcode(data)['level']}")
+    print(f"  gemini upload: {len(data)} bytes -> {len(encode_for_gemini(cv2.imdecode(buf, cv2.IMREAD_REDUCED_COLOR_4)))} bytes")
+
+if __name__ == "__main__":
+    _bench()
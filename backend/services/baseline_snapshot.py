@@ -0,0 +1,261 @@
+"""
+Compiled snapshot of data/state_baselines/*.json.
+
+All baselines go into one versioned binary file with a shared string table,
+so every repeated string ("Blue (Recycling)", "Common statewide curbside
+guidance", ...) is stored once and decoded into a single Python object per
+worker. Each worker reads the file once through mmap and decodes all of it
+into its own Python objects, then closes the mapping; no pages stay shared
+between workers.
+
+Each state entry also carries its precomputed item index (building it is most
+of the JSON load time) and the (mtime_ns, size) signature and SHA-256 of the
+JSON it was compiled from. The rules loader only uses an entry while the JSON
+file on disk still has that signature, so an edited baseline falls back to
+the JSON path (and hot reload) without rebuilding the snapshot.
+
+    python -m services.baseline_snapshot build   # compile the snapshot
+    python -m services.baseline_snapshot bench   # compare startup time / RSS with the JSON path
+"""
+from collections.abc import Mapping
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, List, Optional, Tuple
+import mmap
+import os
+import struct
+
+# -------- Paths --------
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+# Set BASELINE_SNAPSHOT_PATH to an empty string to always load the JSON files
+SNAPSHOT_PATH = os.getenv("BASELINE_SNAPSHOT_PATH", str(DATA_DIR / "state_baselines.snapshot"))
+
+# -------- Format --------
+# header:  magic, format version, string count, state count
+# strings: (count + 1) end offsets, utf-8 blob
+# state:   code string id, mtime_ns, size, sha256, encoded baseline, item index
+# value:   tag byte then payload
+# index:   term count, then per term: term id, posting count, (category id, weight) postings
+MAGIC = b"EHBS"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sHII")
+_U32 = struct.Struct("<I")
+_STATE = struct.Struct("<Iqq32s")
+_I64 = struct.Struct("<q")
+_F64 = struct.Struct("<d")
+_TERM = struct.Struct("<IH")
+_POSTING = struct.Struct("<IB")
+
+_DICT, _LIST, _STR, _INT, _FLOAT, _TRUE, _FALSE, _NONE = b"DLSIRTFN"
+
+Signature = Tuple[int, int]
+
+class SnapshotEntry:
+    def __init__(self, data: Any, item_index: Any, content_hash: str, signature: Signature):
+        self.data = data
+        self.item_index = item_index
+        self.content_hash = content_hash
+        self.signature = signature
+
+# -------- Build --------
+def _encode(value: Any, out: bytearray, intern) -> None:
+    if isinstance(value, Mapping):
+        out += bytes([_DICT]) + _U32.pack(len(value))
+        for k, v in value.items():
+            out += _U32.pack(intern(k))
+            _encode(v, out, intern)
+    elif isinstance(value, (list, tuple)):
+        out += bytes([_LIST]) + _U32.pack(len(value))
+        for v in value:
+            _encode(v, out, intern)
+    elif isinstance(value, str):
+        out += bytes([_STR]) + _U32.pack(intern(value))
+    elif value is True:
+        out.append(_TRUE)
+    elif value is False:
+        out.append(_FALSE)
+    elif value is None:
+        out.append(_NONE)
+    elif isinstance(value, int):
+        out += bytes([_INT]) + _I64.pack(value)
+    elif isinstance(value, float):
+        out += bytes([_FLOAT]) + _F64.pack(value)
+    else:
+        raise TypeError(f"Cannot encode {type(value).__name__} in a baseline snapshot")
+
+def build_snapshot(baselines: Dict[str, Tuple[Any, Any, str, Signature]], path: Path) -> int:
+    """
+    Write state code -> (parsed JSON, item index, sha256 hex, signature) to path.
+    Written to a temp file and renamed so readers never see a partial snapshot.
+    """
+    string_ids: Dict[str, int] = {}
+    strings: List[bytes] = []
+
+    def intern(s: str) -> int:
+        if s not in string_ids:
+            string_ids[s] = len(strings)
+            strings.append(s.encode("utf-8"))
+        return string_ids[s]
+
+    body = bytearray()
+    for code in sorted(baselines):
+        data, item_index, content_hash, (mtime_ns, size) = baselines[code]
+        body += _STATE.pack(intern(code), mtime_ns, size, bytes.fromhex(content_hash))
+        _encode(data, body, intern)
+        body += _U32.pack(len(item_index))
+        for term, postings in item_index.items():
+            body += _TERM.pack(intern(term), len(postings))
+            for category, weight in postings:
+                body += _POSTING.pack(intern(category), weight)
+
+    path = Path(path)
+    tmp = path.with_suffix(path.suffix + f".{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(strings), len(baselines)))
+        end = 0
+        f.write(_U32.pack(0))
+        for s in strings:
+            end += len(s)
+            f.write(_U32.pack(end))
+        f.write(b"".join(strings))
+        f.write(body)
+    os.replace(tmp, path)
+    return len(baselines)
+
+# -------- Load --------
+def load_snapshot(path: Optional[str] = None) -> Dict[str, SnapshotEntry]:
+    """Decode every state in the snapshot into frozen mappings. Empty if there is no valid snapshot."""
+    path = SNAPSHOT_PATH if path is None else path
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        magic, version, string_count, state_count = _HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            return {}
+
+        # Every string is decoded exactly once and shared by all states
+        offsets_at = _HEADER.size
+        blob_at = offsets_at + (string_count + 1) * _U32.size
+        ends = struct.unpack_from(f"<{string_count + 1}I", mm, offsets_at)
+        strings = [mm[blob_at + ends[i]:blob_at + ends[i + 1]].decode("utf-8") for i in range(string_count)]
+        pos = blob_at + ends[-1]
+
+        def decode(pos: int) -> Tuple[Any, int]:
+            tag = mm[pos]
+            pos += 1
+            if tag == _DICT:
+                n = _U32.unpack_from(mm, pos)[0]
+                pos += 4
+                items = {}
+                for _ in range(n):
+                    key = strings[_U32.unpack_from(mm, pos)[0]]
+                    items[key], pos = decode(pos + 4)
+                return MappingProxyType(items), pos
+            if tag == _LIST:
+                n = _U32.unpack_from(mm, pos)[0]
+                pos += 4
+                values = []
+                for _ in range(n):
+                    value, pos = decode(pos)
+                    values.append(value)
+                return tuple(values), pos
+            if tag == _STR:
+                return strings[_U32.unpack_from(mm, pos)[0]], pos + 4
+            if tag == _INT:
+                return _I64.unpack_from(mm, pos)[0], pos + 8
+            if tag == _FLOAT:
+                return _F64.unpack_from(mm, pos)[0], pos + 8
+            if tag == _TRUE:
+                return True, pos
+            if tag == _FALSE:
+                return False, pos
+            if tag == _NONE:
+                return None, pos
+            raise ValueError(f"Corrupt baseline snapshot at byte {pos - 1}")
+
+        # (category, weight) postings repeat across terms and states; share one tuple each
+        postings: Dict[Tuple[int, int], Tuple[str, int]] = {}
+
+        def posting(cat_id: int, weight: int) -> Tuple[str, int]:
+            key = (cat_id, weight)
+            value = postings.get(key)
+            if value is None:
+                value = postings[key] = (strings[cat_id], weight)
+            return value
+
+        def decode_index(pos: int) -> Tuple[Mapping, int]:
+            index = {}
+            count = _U32.unpack_from(mm, pos)[0]
+            pos += _U32.size
+            for _ in range(count):
+                term_id, n = _TERM.unpack_from(mm, pos)
+                pos += _TERM.size
+                end = pos + n * _POSTING.size
+                index[strings[term_id]] = tuple(posting(*p) for p in _POSTING.iter_unpack(mm[pos:end]))
+                pos = end
+            return MappingProxyType(index), pos
+
+        entries: Dict[str, SnapshotEntry] = {}
+        for _ in range(state_count):
+            code_id, mtime_ns, size, digest = _STATE.unpack_from(mm, pos)
+            data, pos = decode(pos + _STATE.size)
+            item_index, pos = decode_index(pos)
+            entries[strings[code_id]] = SnapshotEntry(data, item_index, digest.hex(), (mtime_ns, size))
+        return entries
+    finally:
+        mm.close()
+
+# -------- CLI --------
+def _build_from_baselines() -> int:
+    import hashlib
+    import json
+    from services.item_index import build_item_index
+    from services.rules_service import BASELINES_DIR, _scan_baselines, _validate_baseline
+
+    baselines = {}
+    for code, (path, signature) in _scan_baselines(BASELINES_DIR).items():
+        raw = path.read_bytes()
+        data = json.loads(raw.decode("utf-8"))
+        _validate_baseline(code, data)
+        baselines[code] = (data, build_item_index(data["rules"]), hashlib.sha256(raw).hexdigest(), signature)
+    return build_snapshot(baselines, Path(SNAPSHOT_PATH))
+
+_BENCH_CHILD = """
+import json
+from services import rules_service
+rss = rules_service._rss_bytes()
+table = rules_service.load_rules_table()
+print(json.dumps({"ms": table.load_ms, "rss": rules_service._rss_bytes() - rss,
+                  "table_bytes": table.table_bytes, "source": table.source}))
+"""
+
+def _bench(runs: int = 10) -> None:
+    import json
+    import statistics
+    import subprocess
+    import sys
+
+    backend_dir = Path(__file__).resolve().parents[1]
+    for label, snapshot_path in (("json", ""), ("snapshot", SNAPSHOT_PATH)):
+        env = {**os.environ, "BASELINE_SNAPSHOT_PATH": snapshot_path}
+        results = [
+            json.loads(subprocess.run([sys.executable, "-c", _BENCH_CHILD], cwd=backend_dir, env=env,
+                                      capture_output=True, text=True, check=True).stdout)
+            for _ in range(runs)
+        ]
+        print(f"{label:>8}: load {statistics.median(r['ms'] for r in results):.2f} ms (median of {runs}), "
+              f"RSS +{statistics.median(r['rss'] for r in results) / 1024:.0f} KB, "
+              f"table ~{results[0]['table_bytes'] / 1024:.0f} KB, source={results[0]['source']}")
+
+if __name__ == "__main__":
+    import sys
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "build"
+    if command == "build":
+        print(f"Compiled {_build_from_baselines()} baselines into {SNAPSHOT_PATH}")
+    elif command == "bench":
+        _bench()
+    else:
+        sys.exit("usage: python -m services.baseline_snapshot [build|bench]")
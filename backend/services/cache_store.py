@@ -0,0 +1,31 @@
+"""
+Helpers shared by the database-backed caches (barcode_cache, image_cache,
+recollect_cache) and schedule_service.
+"""
+from datetime import datetime, timezone
+from typing import Any, Callable
+import logging
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+def utcnow() -> datetime:
+    # Naive UTC, like the DateTime columns in SQLite
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def best_effort_write(session_factory: Callable[[], Session], write: Callable[[Session], Any], what: str) -> bool:
+    """
+    Run write(db) in a fresh session. A cache write must never fail the
+    request it is caching, so database errors are logged and reported as
+    False instead of raised.
+    """
+    db = session_factory()
+    try:
+        write(db)
+        return True
+    except SQLAlchemyError as exc:
+        logger.warning("Could not cache %s: %s", what, exc)
+        return False
+    finally:
+        db.close()
@@ -1,99 +1,129 @@
 import os
+import asyncio
 import base64
+import logging
 from pathlib import Path
 import google.generativeai as genai
 from dotenv import load_dotenv
-import requests
+from scrapers.http_client import get_http_client
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Configure Gemini
 GOOGLE_API_KEY = os.getenv("GOOGLE_GEMINI_API_KEY", "")
 if GOOGLE_API_KEY:
     genai.configure(api_key=GOOGLE_API_KEY)
 
 
-def lookup_barcode_info(barcode: str) -> dict:
+# -------- Product databases --------
+OPEN_FOOD_FACTS_URL = os.getenv("OPEN_FOOD_FACTS_URL", "https://world.openfoodfacts.org")
+OPEN_PRODUCTS_FACTS_URL = os.getenv("OPEN_PRODUCTS_FACTS_URL", "https://world.openproductsfacts.org")
+UPCITEMDB_URL = os.getenv("UPCITEMDB_URL", "https://api.upcitemdb.com")
+BARCODE_LOOKUP_TIMEOUT = float(os.getenv("BARCODE_LOOKUP_TIMEOUT", "5"))
+
+# A database that failed to answer, as opposed to one that does not know the product
+SOURCE_ERROR = {"found": False, "error": True}
+
+def _open_facts_product(source: str):
+    def parse(data: dict) -> dict | None:
+        if data.get("status") != 1:  # Product not found
+            return None
+        product = data.get("product", {})
+        product_name = product.get("product_name", "")
+        if not product_name:  # Only use if we got a real name
+            return None
+        return {
+            "found": True,
+            "product_name": product_name,
+            "brands": product.get("brands", ""),
+            "categories": product.get("categories", ""),
+            "packaging": product.get("packaging", ""),
+            "materials": product.get("packaging_materials", ""),
+            "quantity": product.get("quantity", ""),
+            "image_url": product.get("image_url", ""),
+            "source": source
+        }
+    return parse
+
+def _upcitemdb_product(data: dict) -> dict | None:
+    if not data.get("items"):
+        return None
+    item = data["items"][0]
+    return {
+        "found": True,
+        "product_name": item.get("title", "Unknown"),
+        "brands": item.get("brand", ""),
+        "categories": item.get("category", ""),
+        "packaging": "",
+        "materials": "",
+        "quantity": "",
+        "image_url": item.get("images", [None])[0] if item.get("images") else "",
+        "source": "UPC Item DB"
+    }
+
+def product_sources(barcode: str) -> list:
+    """(url, parser) for each product database, highest priority first."""
+    return [
+        # 1. Open Food Facts (food products)
+        (f"{OPEN_FOOD_FACTS_URL}/api/v0/product/{barcode}.json", _open_facts_product("Open Food Facts")),
+        # 2. Open Products Facts (non-food: electronics, beauty, pet food, etc.)
+        (f"{OPEN_PRODUCTS_FACTS_URL}/api/v0/product/{barcode}.json", _open_facts_product("Open Products Facts")),
+        # 3. UPC Item DB (general products database)
+        (f"{UPCITEMDB_URL}/prod/trial/lookup?upc={barcode}", _upcitemdb_product),
+    ]
+
+async def _query_source(url: str, parse) -> dict | None:
+    """
+    The product from one database, None if it does not have it, or
+    SOURCE_ERROR if it failed (non-200, timeout, unreadable payload).
+    """
+    # Shared pooled client per database host (scrapers.http_client); a 404
+    # says the database does not have the code
+    try:
+        response = await get_http_client(url).get(url, timeout=BARCODE_LOOKUP_TIMEOUT)
+        if response.status_code == 404:
+            return None
+        if response.status_code != 200:
+            logger.warning("Barcode lookup failed for %s: HTTP %s", url, response.status_code)
+            return SOURCE_ERROR
+        data = response.json()
+        if not isinstance(data, dict):
+            raise ValueError(f"expected a JSON object, got {type(data).__name__}")
+        return parse(data)
+    except Exception as e:
+        logger.warning("Barcode lookup failed for %s: %s", url, e)
+        return SOURCE_ERROR
+
+async def lookup_barcode_info(barcode: str) -> dict:
     """
     Look up product information from multiple barcode databases.
-    Tries Open Food Facts (food), Open Products Facts (non-food), and UPC Item DB.
+    Queries Open Food Facts (food), Open Products Facts (non-food), and UPC Item DB
+    concurrently, and returns the answer of the highest-priority database that
+    found the product: a hit is returned once every database ahead of it has
+    missed, and the lookups still running are cancelled.
     
     Args:
         barcode: UPC/EAN/ISBN barcode number
     
     Returns:
-        dict with product details from the database
+        dict with product details from the database; {"found": False} if every
+        database answered without the product, {"found": False, "error": True}
+        if none had it and at least one failed to answer
     """
+    tasks = [asyncio.ensure_future(_query_source(url, parse)) for url, parse in product_sources(barcode)]
     try:
-        # 1. Try Open Food Facts (food products)
-        url = f"https://world.openfoodfacts.org/api/v0/product/{barcode}.json"
-        response = requests.get(url, timeout=5)
-        
-        if response.status_code == 200:
-            data = response.json()
-            if data.get("status") == 1:  # Product found
-                product = data.get("product", {})
-                product_name = product.get("product_name", "")
-                if product_name:  # Only use if we got a real name
-                    return {
-                        "found": True,
-                        "product_name": product_name,
-                        "brands": product.get("brands", ""),
-                        "categories": product.get("categories", ""),
-                        "packaging": product.get("packaging", ""),
-                        "materials": product.get("packaging_materials", ""),
-                        "quantity": product.get("quantity", ""),
-                        "image_url": product.get("image_url", ""),
-                        "source": "Open Food Facts"
-                    }
-        
-        # 2. Try Open Products Facts (non-food: electronics, beauty, pet food, etc.)
-        url2 = f"https://world.openproductsfacts.org/api/v0/product/{barcode}.json"
-        response2 = requests.get(url2, timeout=5)
-        
-        if response2.status_code == 200:
-            data2 = response2.json()
-            if data2.get("status") == 1:
-                product = data2.get("product", {})
-                product_name = product.get("product_name", "")
-                if product_name:
-                    return {
-                        "found": True,
-                        "product_name": product_name,
-                        "brands": product.get("brands", ""),
-                        "categories": product.get("categories", ""),
-                        "packaging": product.get("packaging", ""),
-                        "materials": product.get("packaging_materials", ""),
-                        "quantity": product.get("quantity", ""),
-                        "image_url": product.get("image_url", ""),
-                        "source": "Open Products Facts"
-                    }
-        
-        # 3. Try UPC Item DB (general products database)
-        url3 = f"https://api.upcitemdb.com/prod/trial/lookup?upc={barcode}"
-        response3 = requests.get(url3, timeout=5)
-        
-        if response3.status_code == 200:
-            data3 = response3.json()
-            if data3.get("items"):
-                item = data3["items"][0]
-                return {
-                    "found": True,
-                    "product_name": item.get("title", "Unknown"),
-                    "brands": item.get("brand", ""),
-                    "categories": item.get("category", ""),
-                    "packaging": "",
-                    "materials": "",
-                    "quantity": "",
-                    "image_url": item.get("images", [None])[0] if item.get("images") else "",
-                    "source": "UPC Item DB"
-                }
-        
-        return {"found": False}
-        
-    except Exception as e:
-        print(f"Barcode lookup error: {e}")
-        return {"found": False}
+        failed = False
+        for task in tasks:
+            result = await task
+            if result and result.get("found"):
+                return result
+            failed = failed or result is SOURCE_ERROR
+        return dict(SOURCE_ERROR) if failed else {"found": False}
+    finally:
+        for task in tasks:
+            task.cancel()
 
 def identify_product_with_gemini(image_bytes: bytes, barcode: str = None) -> dict:
     """
@@ -177,7 +207,7 @@ Be specific and provide practical recycling advice based on common California re
         }
 
 
-def get_recycling_info_from_barcode(barcode: str) -> dict:
+async def get_recycling_info_from_barcode(barcode: str) -> dict:
     """
     Use barcode lookup API + Gemini to get accurate recycling information.
     
@@ -191,7 +221,7 @@ def get_recycling_info_from_barcode(barcode: str) -> dict:
         raise ValueError("GOOGLE_GEMINI_API_KEY environment variable not set")
     
     # First, lookup the product in barcode database
-    product_info = lookup_barcode_info(barcode)
+    product_info = await lookup_barcode_info(barcode)
     
     model = genai.GenerativeModel('gemini-2.5-flash')
     
@@ -241,7 +271,8 @@ The barcode was not found in product databases. Please try to identify what prod
     "special_notes": "Note: Product not found in database, information may be uncertain"
 }}"""
 
-    response = model.generate_content(prompt)
+    # The Gemini client blocks; keep it off the event loop
+    response = await asyncio.to_thread(model.generate_content, prompt)
     
     try:
         import json
@@ -268,6 +299,10 @@ The barcode was not found in product databases. Please try to identify what prod
             result["data_source"] = product_info.get("source", "Barcode Database")
         else:
             result["data_source"] = "Gemini Vision AI"
+        # A barcode-only guess made because the databases were down, not because
+        # they lack the product (services.barcode_cache keeps it only briefly)
+        if product_info.get("error"):
+            result["lookup_error"] = True
         
         return result
     except Exception as e:
@@ -0,0 +1,175 @@
+"""
+Near-duplicate cache for Gemini identifications of photos without a barcode.
+
+Photos are keyed by their 64-bit dHash (services.barcode_reader.dhash). A new
+photo whose hash is within IMAGE_HASH_MAX_DISTANCE bits (Hamming distance) of
+a stored one gets that photo's classification instead of a Gemini call.
+
+Results are stored in the image_results table and indexed in memory with
+multi-index hashing, which compares a query only against entries that share
+an exact chunk of bits with it (9-10 bits at the default threshold) instead
+of every stored hash. Each
+lookup first pulls rows other workers stored since the last one, so every
+worker sees every result. Expired entries are dropped from the index every
+IMAGE_CACHE_PRUNE_MINUTES.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+import copy
+import os
+import threading
+from database.db import SessionLocal
+from repositories import image_repository
+from services.cache_store import best_effort_write, utcnow as _utcnow
+
+# -------- Config --------
+IMAGE_HASH_MAX_DISTANCE = int(os.getenv("IMAGE_HASH_MAX_DISTANCE", "6"))
+IMAGE_CACHE_TTL_HOURS = float(os.getenv("IMAGE_CACHE_TTL_HOURS", "720"))
+IMAGE_CACHE_PRUNE_MINUTES = float(os.getenv("IMAGE_CACHE_PRUNE_MINUTES", "60"))
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+class MultiIndexHash:
+    """
+    Multi-index hashing over 64-bit hashes for radius-r queries. Each hash is
+    split into r + 1 disjoint bit ranges and filed under each range's value;
+    two hashes within r bits must agree exactly on at least one range
+    (pigeonhole), so only entries sharing a bucket with the query are compared.
+    """
+    def __init__(self, max_distance: int, bits: int = 64):
+        chunks = min(max_distance + 1, bits)
+        bounds = [round(i * bits / chunks) for i in range(chunks + 1)]
+        self.max_distance = max_distance
+        self._ranges = [(lo, (1 << (hi - lo)) - 1) for lo, hi in zip(bounds, bounds[1:])]
+        self._tables: List[Dict[int, List[int]]] = [{} for _ in self._ranges]
+        self._entries: List[Tuple[int, Any]] = []
+
+    @property
+    def size(self) -> int:
+        return len(self._entries)
+
+    def add(self, key: int, value: Any) -> None:
+        index = len(self._entries)
+        self._entries.append((key, value))
+        for table, (shift, mask) in zip(self._tables, self._ranges):
+            table.setdefault((key >> shift) & mask, []).append(index)
+
+    def prune(self, keep) -> int:
+        """Rebuild the index with only the entries whose value passes keep; returns how many were dropped."""
+        entries = [(key, value) for key, value in self._entries if keep(value)]
+        dropped = len(self._entries) - len(entries)
+        if dropped:
+            self._tables = [{} for _ in self._ranges]
+            self._entries = []
+            for key, value in entries:
+                self.add(key, value)
+        return dropped
+
+    def nearest(self, key: int, accept=lambda value: True) -> Tuple[Optional[Tuple[int, Any]], int]:
+        """((distance, value) of the closest accepted entry within max_distance, or None; candidates compared)."""
+        candidates = set()
+        for table, (shift, mask) in zip(self._tables, self._ranges):
+            candidates.update(table.get((key >> shift) & mask, ()))
+        best: Optional[Tuple[int, Any]] = None
+        for index in candidates:
+            stored, value = self._entries[index]
+            d = hamming(key, stored)
+            if d <= self.max_distance and (best is None or d < best[0]) and accept(value):
+                best = (d, value)
+        return best, len(candidates)
+
+# -------- Index --------
+_index = MultiIndexHash(IMAGE_HASH_MAX_DISTANCE)
+_last_id = 0
+_lock = threading.Lock()
+_next_prune = datetime.min
+_stats = {
+    "lookups": 0, "hits": 0, "misses": 0, "stored": 0, "gemini_calls_saved": 0,
+    "hashes_compared": 0, "hit_distance_total": 0, "pruned": 0,
+}
+
+def _sync(now: datetime) -> None:
+    """Add rows stored since the last sync (by this or another worker) to the index, and drop expired ones."""
+    global _last_id, _next_prune
+    if now >= _next_prune:
+        _stats["pruned"] += _index.prune(lambda entry: entry["expires_at"] > now)
+        _next_prune = now + timedelta(minutes=IMAGE_CACHE_PRUNE_MINUTES)
+    db = SessionLocal()
+    try:
+        rows = image_repository.get_results_since(db, _last_id, now)
+        for row in rows:
+            _index.add(int(row.dhash, 16), {"result": row.result, "expires_at": row.expires_at})
+            _last_id = row.id
+    finally:
+        db.close()
+
+# -------- Public API --------
+def find_similar(image_hash: int) -> Optional[Dict[str, Any]]:
+    """A copy of the stored result for the nearest unexpired photo within the threshold, else None."""
+    now = _utcnow()
+    with _lock:
+        _sync(now)
+        match, compared = _index.nearest(image_hash, lambda entry: entry["expires_at"] > now)
+        _stats["lookups"] += 1
+        _stats["hashes_compared"] += compared
+        if match is None:
+            _stats["misses"] += 1
+            return None
+        _stats["hits"] += 1
+        _stats["gemini_calls_saved"] += 1
+        _stats["hit_distance_total"] += match[0]
+        return copy.deepcopy(match[1]["result"])
+
+def store_result(image_hash: int, result: Dict[str, Any]) -> None:
+    fetched_at = _utcnow()
+    row = {
+        "dhash": f"{image_hash:016x}",
+        "result": copy.deepcopy(result),
+        "fetched_at": fetched_at,
+        "expires_at": fetched_at + timedelta(hours=IMAGE_CACHE_TTL_HOURS),
+    }
+    if not best_effort_write(SessionLocal, lambda db: image_repository.save_result(db, row), "image result"):
+        return
+    with _lock:
+        # The next lookup's sync adds it to the index
+        _stats["stored"] += 1
+
+def get_image_cache_stats() -> Dict[str, Any]:
+    with _lock:
+        stats = dict(_stats)
+        stats["entries"] = _index.size
+        stats["max_distance"] = IMAGE_HASH_MAX_DISTANCE
+        stats["hit_ratio"] = round(stats["hits"] / stats["lookups"], 4) if stats["lookups"] else 0.0
+        stats["mean_hashes_compared"] = round(stats["hashes_compared"] / stats["lookups"], 1) if stats["lookups"] else None
+        stats["mean_hit_distance"] = round(stats["hit_distance_total"] / stats["hits"], 2) if stats["hits"] else None
+    return stats
+
+# -------- Bench --------
+def _bench(entries: int = 100_000, queries: int = 1_000) -> None:
+    """Multi-index hashing vs. linear scan for nearest-hash lookups over random 64-bit hashes."""
+    import random
+    import time
+
+    rng = random.Random(0)
+    hashes = [rng.getrandbits(64) for _ in range(entries)]
+    index = MultiIndexHash(IMAGE_HASH_MAX_DISTANCE)
+    for h in hashes:
+        index.add(h, h)
+    # Half near-duplicates of stored hashes, half unrelated photos
+    probes = [rng.choice(hashes) ^ (1 << rng.randrange(64)) ^ (1 << rng.randrange(64)) for _ in range(queries // 2)]
+    probes += [rng.getrandbits(64) for _ in range(queries // 2)]
+
+    started = time.perf_counter()
+    compared = sum(index.nearest(p)[1] for p in probes)
+    index_ms = (time.perf_counter() - started) * 1000 / queries
+    started = time.perf_counter()
+    for p in probes:
+        min(hashes, key=lambda h: hamming(p, h))
+    scan_ms = (time.perf_counter() - started) * 1000 / queries
+    print(f"{entries} hashes, max distance {IMAGE_HASH_MAX_DISTANCE}")
+    print(f"  multi-index: {index_ms:.3f} ms/lookup, {compared / queries:.0f} hashes compared")
+    print(f"  linear:      {scan_ms:.3f} ms/lookup, {entries} hashes compared")
+
+if __name__ == "__main__":
+    _bench()
@@ -0,0 +1,105 @@
+"""
+Bounded worker pool for CPU-heavy image work (decoding uploads, barcode
+detection), kept off the uvicorn event loop.
+
+Threads rather than processes: cv2.imdecode and zxingcpp.read_barcodes both
+release the GIL, and threads avoid pickling multi-megabyte images between
+processes. At most IMAGE_WORKERS jobs run at once and IMAGE_QUEUE_DEPTH more
+may wait; beyond that run() raises ImagePoolBusyError, which the scanner
+router turns into a 503 so a burst of uploads cannot pile up unbounded work.
+
+    result = await get_image_pool().run(read_barcode, image_bytes)
+
+Stage timings (decode, detect, and the network stages in the router) are
+recorded with record_stage() and reported with p50/p95 in stats().
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import os
+import threading
+import time
+from services.timing_window import TimingWindow
+
+# -------- Config --------
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", str(min(4, os.cpu_count() or 1))))
+IMAGE_QUEUE_DEPTH = int(os.getenv("IMAGE_QUEUE_DEPTH", "8"))
+
+class ImagePoolBusyError(RuntimeError):
+    """Every worker is busy and the queue is full."""
+
+class ImagePool:
+    def __init__(self, workers: int = IMAGE_WORKERS, queue_depth: int = IMAGE_QUEUE_DEPTH):
+        self.workers = max(workers, 1)
+        self.queue_depth = max(queue_depth, 0)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="image")
+        # Running + queued jobs; released when the worker finishes, not when the caller stops waiting
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._stages: Dict[str, TimingWindow] = {}
+        self.completed = 0
+        self.rejected = 0
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        with self._lock:
+            if self._pending >= self.workers + self.queue_depth:
+                self.rejected += 1
+                raise ImagePoolBusyError(f"{self._pending} image jobs pending")
+            self._pending += 1
+        queued_at = time.perf_counter()
+
+        def job():
+            # Time spent waiting for a worker, measured on the worker thread
+            self.record_stage("queue", (time.perf_counter() - queued_at) * 1000)
+            return fn(*args)
+
+        try:
+            future = self._executor.submit(job)
+        except RuntimeError:  # executor shut down
+            with self._lock:
+                self._pending -= 1
+            raise
+        # A caller cancelled mid-job (client disconnect) leaves the job running
+        # on its worker; the slot stays taken until the worker is done with it
+        future.add_done_callback(self._done)
+        return await asyncio.wrap_future(future)
+
+    def _done(self, future) -> None:
+        with self._lock:
+            self._pending -= 1
+            self.completed += 1
+
+    def record_stage(self, stage: str, ms: float) -> None:
+        # Worker threads record directly; setdefault keeps racing first samples in one window
+        samples = self._stages.get(stage)
+        if samples is None:
+            samples = self._stages.setdefault(stage, TimingWindow())
+        samples.add(ms)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "pending": self._pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "stages_ms": {stage: samples.summary() for stage, samples in sorted(self._stages.items())},
+        }
+
+# -------- Shared instance --------
+_pool: Optional[ImagePool] = None
+
+def get_image_pool() -> ImagePool:
+    global _pool
+    if _pool is None:
+        _pool = ImagePool()
+    return _pool
+
+def close_image_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
@@ -0,0 +1,29 @@
+"""
+Read-only views for data shared between requests.
+
+Rule sets are built once and handed to every request, so they are frozen:
+mappings become MappingProxyType views and lists become tuples. Nobody can
+mutate a shared baseline by accident, and derived rule sets can safely
+reuse (structurally share) any part they do not override.
+"""
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Any
+
+EMPTY: Mapping = MappingProxyType({})
+
+def freeze(obj: Any) -> Any:
+    """Recursively convert dicts to read-only mappings and lists to tuples."""
+    if isinstance(obj, MappingProxyType):
+        return obj
+    if isinstance(obj, Mapping):
+        return MappingProxyType({k: freeze(v) for k, v in obj.items()})
+    if isinstance(obj, (list, tuple)):
+        return tuple(freeze(v) for v in obj)
+    return obj
+
+def json_default(obj: Any) -> Any:
+    """`default=` hook so json.dumps can encode frozen mappings."""
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
\ No newline at end of file
@@ -0,0 +1,97 @@
+"""
+Inverted index from item terms to rule categories, for "which bin does X go
+in" lookups.
+
+Each rule set gets its own index, built once when the rule set is built:
+normalized terms from the category name, guidance and notes map to the
+categories that mention them. Category-name terms weigh more than terms that
+only appear in the free text.
+"""
+from collections.abc import Mapping
+from typing import Any, Dict, List, Tuple
+import re
+
+from services.immutable import freeze
+
+# -------- Constants --------
+CATEGORY_WEIGHT = 3
+TEXT_WEIGHT = 1
+
+STOPWORDS = frozenset("""
+a an and are as at be by check do does for from generally if in into is it its
+local may most must no not of often on or other others per some such that the their
+them then these this those to under use used via where which while with without your
+""".split())
+
+# Common item words that never appear in the baseline text
+SYNONYMS = {
+    "soda": "beverage", "drink": "beverage", "water": "beverage", "beer": "beverage",
+    "phone": "electronic", "laptop": "electronic", "computer": "electronic",
+    "tv": "electronic", "television": "electronic", "monitor": "electronic",
+    "newspaper": "paper", "magazine": "paper", "box": "cardboard",
+    "bag": "film", "wrap": "film",
+    "couch": "bulky", "sofa": "bulky", "mattress": "bulky", "furniture": "bulky",
+    "compost": "organic", "banana": "food", "peel": "food", "leaf": "yard", "grass": "yard",
+    "tin": "metal", "foil": "aluminum",
+}
+
+# Citation markers left over in some baseline text
+_CITATION = re.compile(r":contentReference\[[^\]]*\]\{[^}]*\}")
+_WORD = re.compile(r"[a-z]+")
+
+# -------- Helpers --------
+def normalize_term(word: str) -> str:
+    """Lowercase and strip simple English plurals ("batteries" -> "battery", "boxes" -> "box")."""
+    w = word.lower()
+    if len(w) > 4 and w.endswith("ies"):
+        w = w[:-3] + "y"
+    elif len(w) > 4 and w.endswith(("ches", "shes", "sses", "xes")):
+        w = w[:-2]
+    elif len(w) > 3 and w.endswith("s") and not w.endswith(("ss", "us", "is")):
+        w = w[:-1]
+    return SYNONYMS.get(w, w)
+
+def tokenize(text: str) -> List[str]:
+    text = _CITATION.sub(" ", text or "")
+    return [normalize_term(w) for w in _WORD.findall(text.lower()) if w not in STOPWORDS and len(w) > 1]
+
+# -------- Public API --------
+def build_item_index(rules: Mapping) -> Mapping:
+    """Map term -> ((category, weight), ...) over one rule set, best weight per category."""
+    weights: Dict[str, Dict[str, int]] = {}
+    for category, rule in rules.items():
+        if not isinstance(rule, Mapping):
+            continue
+        terms = [(t, CATEGORY_WEIGHT) for t in tokenize(category.replace("_", " "))]
+        terms += [(t, TEXT_WEIGHT) for t in tokenize(rule.get("guidance", ""))]
+        terms += [(t, TEXT_WEIGHT) for t in tokenize(rule.get("notes", ""))]
+        for term, weight in terms:
+            per_category = weights.setdefault(term, {})
+            per_category[category] = max(per_category.get(category, 0), weight)
+    return freeze({term: tuple(cats.items()) for term, cats in weights.items()})
+
+def search_item_index(index: Mapping, rules: Mapping, item: str, limit: int = 3) -> List[Dict[str, Any]]:
+    """
+    Rank categories for a free-text item. Categories matching more distinct
+    query terms come first, then higher total weight.
+    """
+    scores: Dict[str, List[int]] = {}
+    for term in dict.fromkeys(tokenize(item)):
+        for category, weight in index.get(term, ()):
+            score = scores.setdefault(category, [0, 0])
+            score[0] += 1
+            score[1] += weight
+
+    ranked: List[Tuple[str, List[int]]] = sorted(scores.items(), key=lambda kv: (-kv[1][0], -kv[1][1], kv[0]))
+    matches = []
+    for category, (terms_matched, score) in ranked[:limit]:
+        rule = rules[category]
+        matches.append({
+            "category": category,
+            "bin": rule.get("bin"),
+            "guidance": rule.get("guidance"),
+            "notes": rule.get("notes"),
+            "score": score,
+            "terms_matched": terms_matched,
+        })
+    return matches
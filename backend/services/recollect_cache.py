@@ -0,0 +1,67 @@
+"""
+Two-level cache in front of the Recollect API, persisted in the database.
+
+    address  -> place_id   RECOLLECT_PLACE_TTL_HOURS (default 30 days)
+    place_id -> events     RECOLLECT_CALENDAR_TTL_HOURS (default 24 hours)
+
+Many addresses share a place (a collection route), so a new address on a
+known route costs only the suggest call, and a known address costs nothing.
+"""
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+import os
+from database.db import SessionLocal
+from repositories import recollect_repository
+from services.address_normalizer import normalize_address
+from services.cache_store import best_effort_write, utcnow as _utcnow
+
+# -------- Config --------
+RECOLLECT_PLACE_TTL_HOURS = float(os.getenv("RECOLLECT_PLACE_TTL_HOURS", "720"))
+RECOLLECT_CALENDAR_TTL_HOURS = float(os.getenv("RECOLLECT_CALENDAR_TTL_HOURS", "24"))
+
+_stats: Dict[str, int] = {"place_hits": 0, "place_misses": 0, "calendar_hits": 0, "calendar_misses": 0}
+
+def _address_key(area_id: str, address: str) -> str:
+    return f"{area_id}:{normalize_address(address)}"
+
+# -------- Public API --------
+def get_place_id(area_id: str, address: str) -> Optional[str]:
+    db = SessionLocal()
+    try:
+        row = recollect_repository.get_place(db, _address_key(area_id, address), _utcnow())
+    finally:
+        db.close()
+    _stats["place_hits" if row else "place_misses"] += 1
+    return row.place_id if row else None
+
+def put_place_id(area_id: str, address: str, place_id: str) -> None:
+    now = _utcnow()
+    key, expires_at = _address_key(area_id, address), now + timedelta(hours=RECOLLECT_PLACE_TTL_HOURS)
+    best_effort_write(
+        SessionLocal, lambda db: recollect_repository.save_place(db, key, place_id, now, expires_at), f"place for {address}"
+    )
+
+def get_calendar(place_id: str) -> Optional[List[Dict]]:
+    """
+    Cached upcoming events for a place; events that have already passed are
+    dropped. None (a miss) when there is no entry or every event has passed.
+    """
+    db = SessionLocal()
+    try:
+        row = recollect_repository.get_calendar(db, place_id, _utcnow())
+    finally:
+        db.close()
+    today = date.today().isoformat()
+    events = [e for e in row.events if e.get("date", "") >= today] if row else []
+    _stats["calendar_hits" if events else "calendar_misses"] += 1
+    return events or None
+
+def put_calendar(place_id: str, events: List[Dict]) -> None:
+    now = _utcnow()
+    expires_at = now + timedelta(hours=RECOLLECT_CALENDAR_TTL_HOURS)
+    best_effort_write(
+        SessionLocal, lambda db: recollect_repository.save_calendar(db, place_id, events, now, expires_at), f"calendar for {place_id}"
+    )
+
+def get_recollect_cache_stats() -> Dict[str, Any]:
+    return dict(_stats)
@@ -0,0 +1,167 @@
+"""
+Local rule overlays layered on top of the state baselines.
+
+Each file in data/overlays/ describes one overlay:
+
+    {
+        "level": "city",               # county | city | zip_prefix | zip
+        "state": "CA",
+        "name": "San Jose",            # county or city name, label for ZIP overlays
+        "zip_prefixes": ["951"],       # zip_prefix level only
+        "zips": ["95112"],             # zip level only
+        "summary": "Applied San Jose residential rules.",  # optional
+        "last_verified_at": "2025-10-01",                   # optional
+        "rules": { "<category>": { "guidance": ..., "bin": ..., ... } }
+    }
+
+Overlays apply from least to most specific: state, county, city, ZIP
+prefixes (shortest first), exact ZIP. County and city overlays are keyed by
+normalized (state, name); ZIP overlays live in a digit trie so finding every
+overlay for a ZIP is at most five dict steps.
+"""
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+import hashlib
+import json
+import logging
+import unicodedata
+from services.immutable import freeze
+
+logger = logging.getLogger(__name__)
+
+# -------- Paths --------
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+OVERLAYS_DIR = DATA_DIR / "overlays"
+
+# -------- Constants --------
+LEVELS = ("state", "county", "city", "zip_prefix", "zip")
+
+# -------- Models --------
+class Overlay:
+    def __init__(self, overlay_id: str, data: Dict[str, Any], content_hash: str):
+        self.id = overlay_id
+        self.level = data["level"]
+        self.state = data["state"]
+        self.name = data.get("name") or overlay_id
+        self.zip_prefixes = tuple(data.get("zip_prefixes") or ())
+        self.zips = tuple(data.get("zips") or ())
+        self.summary = data.get("summary") or f"Applied {self.name} {self.level.replace('_', ' ')} rules."
+        self.last_verified_at = data.get("last_verified_at")
+        self.rules = freeze(data["rules"])
+        self.content_hash = content_hash
+
+class _TrieNode:
+    __slots__ = ("children", "overlays")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.overlays: List[Overlay] = []
+
+class OverlayIndex:
+    def __init__(self, overlays: List[Overlay]):
+        self.overlays = overlays
+        self.counties: Dict[Tuple[str, str], Overlay] = {}
+        self.cities: Dict[Tuple[str, str], Overlay] = {}
+        self.trie = _TrieNode()
+
+        for overlay in overlays:
+            if overlay.level == "county":
+                self.counties[(overlay.state, normalize_place(overlay.name))] = overlay
+            elif overlay.level == "city":
+                self.cities[(overlay.state, normalize_place(overlay.name))] = overlay
+            else:
+                keys = overlay.zip_prefixes if overlay.level == "zip_prefix" else overlay.zips
+                for key in keys:
+                    self._insert(key, overlay)
+
+    def _insert(self, key: str, overlay: Overlay) -> None:
+        node = self.trie
+        for digit in key:
+            node = node.children.setdefault(digit, _TrieNode())
+        node.overlays.append(overlay)
+
+    def chain(self, state: str, county: Optional[str], city: Optional[str], zip_code: str) -> Tuple[Overlay, ...]:
+        """Every overlay that applies to a ZIP, least specific first."""
+        chain: List[Overlay] = []
+        if county:
+            overlay = self.counties.get((state, normalize_place(county)))
+            if overlay:
+                chain.append(overlay)
+        if city:
+            overlay = self.cities.get((state, normalize_place(city)))
+            if overlay:
+                chain.append(overlay)
+
+        node = self.trie
+        for digit in zip_code:
+            node = node.children.get(digit)
+            if node is None:
+                break
+            chain.extend(o for o in node.overlays if o.state == state)
+        return tuple(chain)
+
+# -------- Helpers --------
+def normalize_place(name: str) -> str:
+    """Case-, accent- and whitespace-insensitive key for city and county names."""
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(c for c in name if not unicodedata.combining(c))
+    name = " ".join(name.casefold().split())
+    return name.removesuffix(" county")
+
+def _validate_overlay(data: Any) -> None:
+    if not isinstance(data, dict):
+        raise ValueError("overlay must be a JSON object")
+    level = data.get("level")
+    if level not in LEVELS[1:]:
+        raise ValueError(f"'level' must be one of {LEVELS[1:]}, got {level!r}")
+    state = data.get("state")
+    if not isinstance(state, str) or len(state) != 2:
+        raise ValueError("'state' must be a two-letter state code")
+    if level in ("county", "city") and not data.get("name"):
+        raise ValueError(f"{level} overlay needs a 'name'")
+    if level == "zip_prefix":
+        prefixes = data.get("zip_prefixes")
+        if not prefixes or not all(isinstance(p, str) and p.isdigit() and 1 <= len(p) <= 4 for p in prefixes):
+            raise ValueError("'zip_prefixes' must list 1-4 digit prefixes")
+    if level == "zip":
+        zips = data.get("zips")
+        if not zips or not all(isinstance(z, str) and z.isdigit() and len(z) == 5 for z in zips):
+            raise ValueError("'zips' must list 5-digit ZIP codes")
+    rules = data.get("rules")
+    if not isinstance(rules, dict) or not rules:
+        raise ValueError("'rules' must be a non-empty object")
+    for category, rule in rules.items():
+        if not isinstance(rule, dict):
+            raise ValueError(f"rule {category!r} must be an object")
+
+def load_overlay_file(path: Path) -> Overlay:
+    raw = path.read_bytes()
+    data = json.loads(raw.decode("utf-8"))
+    _validate_overlay(data)
+    return Overlay(path.stem, data, hashlib.sha256(raw).hexdigest())
+
+def scan_overlays(overlays_dir: Path) -> Dict[str, Tuple[Path, Tuple[int, int]]]:
+    """Map overlay id -> (path, (mtime_ns, size)) for every overlay file on disk."""
+    found = {}
+    if not overlays_dir.is_dir():
+        return found
+    for path in sorted(overlays_dir.glob("*.json")):
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        found[path.stem] = (path, (st.st_mtime_ns, st.st_size))
+    return found
+
+def load_overlays(overlays_dir: Path, errors: Dict[str, str]) -> Tuple[List[Overlay], Dict[str, Tuple[int, int]]]:
+    """Load every overlay in overlays_dir. Invalid files are logged, recorded in errors and skipped."""
+    overlays: List[Overlay] = []
+    signatures: Dict[str, Tuple[int, int]] = {}
+    for overlay_id, (path, signature) in scan_overlays(overlays_dir).items():
+        signatures[overlay_id] = signature
+        try:
+            overlays.append(load_overlay_file(path))
+        except (OSError, ValueError) as e:
+            errors[f"overlays/{overlay_id}"] = str(e)
+            logger.error("Skipping invalid overlay %s: %s", path.name, e)
+    return overlays, signatures
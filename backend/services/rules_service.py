@@ -1,817 +1,565 @@
-from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Dict, Any
+from collections.abc import Mapping
+from typing import Optional, Dict, Any, Iterator, List, Tuple
+import hashlib
 import json
-import pgeocode
+import logging
+import os
+import struct
+import sys
+import threading
+import time
+from services import baseline_snapshot
+from services.immutable import EMPTY, freeze
+from services.item_index import build_item_index, search_item_index
+from services.rule_overlays import OVERLAYS_DIR, Overlay, OverlayIndex, load_overlays, scan_overlays
+from services.zip_index import lookup_zip
+
+logger = logging.getLogger(__name__)
 
 # -------- Paths --------
 DATA_DIR = Path(__file__).resolve().parents[1] / "data"
-CA_BASELINE_PATH = DATA_DIR / "state_baselines" / "CA.json"
-OR_baseline_PATH = DATA_DIR / "state_baselines" / "OR.json"
-TX_baseline_PATH = DATA_DIR / "state_baselines" / "TX.json"
-WA_baseline_PATH = DATA_DIR / "state_baselines" / "WA.json"
-ID_baseline_PATH = DATA_DIR / "state_baselines" / "ID.json"
-NV_baseline_PATH = DATA_DIR / "state_baselines" / "NV.json"
-UT_baseline_PATH = DATA_DIR / "state_baselines" / "UT.json"
-AZ_baseline_PATH = DATA_DIR / "state_baselines" / "AZ.json"
-WY_baseline_PATH = DATA_DIR / "state_baselines" / "WY.json"
-MT_baseline_PATH = DATA_DIR / "state_baselines" / "MT.json"
-CO_baseline_PATH = DATA_DIR / "state_baselines" / "CO.json"
-NM_baseline_PATH = DATA_DIR / "state_baselines" / "NM.json"
-ND_baseline_PATH = DATA_DIR / "state_baselines" / "ND.json"
-SD_baseline_PATH = DATA_DIR / "state_baselines" / "SD.json"
-NE_baseline_PATH = DATA_DIR / "state_baselines" / "NE.json"
-KS_baseline_PATH = DATA_DIR / "state_baselines" / "KS.json"
-OK_baseline_PATH = DATA_DIR / "state_baselines" / "OK.json"
-AK_baseline_PATH = DATA_DIR / "state_baselines" / "AK.json"
-HI_baseline_PATH = DATA_DIR / "state_baselines" / "HI.json"
-WI_baseline_PATH = DATA_DIR / "state_baselines" / "WI.json"
-MN_baseline_PATH = DATA_DIR / "state_baselines" / "MN.json"
-IL_baseline_PATH = DATA_DIR / "state_baselines" / "IL.json"
-IN_baseline_PATH = DATA_DIR / "state_baselines" / "IN.json"
-OH_baseline_PATH = DATA_DIR / "state_baselines" / "OH.json"
-IA_baseline_PATH = DATA_DIR / "state_baselines" / "IA.json"
-MO_baseline_PATH = DATA_DIR / "state_baselines" / "MO.json"
-MI_baseline_PATH = DATA_DIR / "state_baselines" / "MI.json"
-AL_baseline_PATH = DATA_DIR / "state_baselines" / "AL.json"
-AR_baseline_PATH = DATA_DIR / "state_baselines" / "AR.json"
-FL_baseline_PATH = DATA_DIR / "state_baselines" / "FL.json"
-GA_baseline_PATH = DATA_DIR / "state_baselines" / "GA.json"
-KY_baseline_PATH = DATA_DIR / "state_baselines" / "KY.json"
-LA_baseline_PATH = DATA_DIR / "state_baselines" / "LA.json"
-MS_baseline_PATH = DATA_DIR / "state_baselines" / "MS.json"
-NC_baseline_PATH = DATA_DIR / "state_baselines" / "NC.json"
-SC_baseline_PATH = DATA_DIR / "state_baselines" / "SC.json"
-TN_baseline_PATH = DATA_DIR / "state_baselines" / "TN.json"
-VA_baseline_PATH = DATA_DIR / "state_baselines" / "VA.json"
-WV_baseline_PATH = DATA_DIR / "state_baselines" / "WV.json"
-PA_baseline_PATH = DATA_DIR / "state_baselines" / "PA.json"
-NY_baseline_PATH = DATA_DIR / "state_baselines" / "NY.json"
-NJ_baseline_PATH = DATA_DIR / "state_baselines" / "NJ.json"
-CT_baseline_PATH = DATA_DIR / "state_baselines" / "CT.json"
-RI_baseline_PATH = DATA_DIR / "state_baselines" / "RI.json"
-MA_baseline_PATH = DATA_DIR / "state_baselines" / "MA.json"
-VT_baseline_PATH = DATA_DIR / "state_baselines" / "VT.json"
-NH_baseline_PATH = DATA_DIR / "state_baselines" / "NH.json"
-ME_baseline_PATH = DATA_DIR / "state_baselines" / "ME.json"
-MD_baseline_PATH = DATA_DIR / "state_baselines" / "MD.json"
-DE_baseline_PATH = DATA_DIR / "state_baselines" / "DE.json"
-DC_baseline_PATH = DATA_DIR / "state_baselines" / "DC.json"
+BASELINES_DIR = DATA_DIR / "state_baselines"
 
+# -------- Constants --------
+STATE_NAMES = {
+    "AK": "Alaska", "AL": "Alabama", "AR": "Arkansas", "AZ": "Arizona",
+    "CA": "California", "CO": "Colorado", "CT": "Connecticut",
+    "DC": "District of Columbia", "DE": "Delaware", "FL": "Florida",
+    "GA": "Georgia", "HI": "Hawaii", "IA": "Iowa", "ID": "Idaho",
+    "IL": "Illinois", "IN": "Indiana", "KS": "Kansas", "KY": "Kentucky",
+    "LA": "Louisiana", "MA": "Massachusetts", "MD": "Maryland", "ME": "Maine",
+    "MI": "Michigan", "MN": "Minnesota", "MO": "Missouri", "MS": "Mississippi",
+    "MT": "Montana", "NC": "North Carolina", "ND": "North Dakota",
+    "NE": "Nebraska", "NH": "New Hampshire", "NJ": "New Jersey",
+    "NM": "New Mexico", "NV": "Nevada", "NY": "New York", "OH": "Ohio",
+    "OK": "Oklahoma", "OR": "Oregon", "PA": "Pennsylvania",
+    "RI": "Rhode Island", "SC": "South Carolina", "SD": "South Dakota",
+    "TN": "Tennessee", "TX": "Texas", "UT": "Utah", "VA": "Virginia",
+    "VT": "Vermont", "WA": "Washington", "WI": "Wisconsin",
+    "WV": "West Virginia", "WY": "Wyoming",
+}
 
 # -------- Models --------
 class RegionInfo:
-    def __init__(self, zip_code: str, state_code: str, city: Optional[str]):
+    def __init__(self, zip_code: str, state_code: str, city: Optional[str], county: Optional[str] = None):
         self.zip_code = zip_code
         self.state_code = state_code
         self.city = city
+        self.county = county
+
+class RulesTable:
+    """
+    Every state baseline found in BASELINES_DIR and every overlay in
+    OVERLAYS_DIR, parsed and validated once. `rulesets` holds the finished
+    state-level rule set for each state; `chains` memoizes the flattened rule
+    set for each (state, overlay chain) the first time a ZIP needs it, so a
+    lookup is a single dict access. Apart from that memo, tables are never
+    modified after they are installed; a reload builds a new table and swaps
+    the reference.
+    """
+    def __init__(self, baselines: Dict[str, Mapping], rulesets: Dict[str, Mapping], overlays: Optional[OverlayIndex] = None):
+        self.baselines = baselines
+        self.rulesets = rulesets
+        self.overlays = overlays or OverlayIndex([])
+        self.chains: Dict[Tuple[str, ...], Mapping] = {}
+        self.baselines_dir = BASELINES_DIR
+        self.overlays_dir = OVERLAYS_DIR
+        self.signatures: Dict[str, Tuple[int, int]] = {}
+        self.overlay_signatures: Dict[str, Tuple[int, int]] = {}
+        self.load_ms = 0.0
+        self.table_bytes = 0
+        self.rss_bytes = 0
+        self.rss_delta_bytes = 0
+        self.errors: Dict[str, str] = {}
+        self.source = "json"
+        self.version = 0
+
+_table: Optional[RulesTable] = None
+_table_lock = threading.Lock()
+_table_version = 0
+
+# -------- Config --------
+BASELINE_RELOAD_INTERVAL = float(os.getenv("BASELINE_RELOAD_INTERVAL", "5"))  # seconds, 0 disables
+
+_reload_stats: Dict[str, Any] = {
+    "checks": 0,
+    "reloads": 0,
+    "reloaded_files": 0,
+    "failures": 0,
+    "last_reload_ms": None,
+    "last_reload_at": None,
+    "last_error": None,
+}
+_watcher: Optional["BaselineWatcher"] = None
 
 # -------- Helpers --------
-@lru_cache(maxsize=1)
-def _load_ca_baseline() -> Dict[str, Any]:
-    if not CA_BASELINE_PATH.exists():
-        raise FileNotFoundError(f"CA baseline not found at {CA_BASELINE_PATH}")
-    return json.loads(CA_BASELINE_PATH.read_text(encoding="utf-8"))
-
-# for OR
-@lru_cache(maxsize=1)
-def _load_or_baseline() -> Dict[str, Any]:
-    if not OR_baseline_PATH.exists():
-        raise FileNotFoundError(f"OR baseline not found at {OR_baseline_PATH}")
-    return json.loads(OR_baseline_PATH.read_text(encoding="utf-8"))
-
-# for TX
-@lru_cache(maxsize=1)
-def _load_tx_baseline() -> Dict[str, Any]:
-    if not TX_baseline_PATH.exists():
-        raise FileNotFoundError(f"TX baseline not found at {TX_baseline_PATH}")
-    return json.loads(TX_baseline_PATH.read_text(encoding="utf-8"))
-
-# for WA
-@lru_cache(maxsize=1)
-def _load_wa_baseline() -> Dict[str, Any]:
-    if not WA_baseline_PATH.exists():
-        raise FileNotFoundError(f"WA baseline not found at {WA_baseline_PATH}")
-    return json.loads(WA_baseline_PATH.read_text(encoding="utf-8"))
-
-# for ID
-@lru_cache(maxsize=1)
-def _load_id_baseline() -> Dict[str, Any]: 
-    if not ID_baseline_PATH.exists():
-        raise FileNotFoundError(f"ID baseline not found at {ID_baseline_PATH}")
-    return json.loads(ID_baseline_PATH.read_text(encoding="utf-8"))
-
-# for NV
-@lru_cache(maxsize=1)
-def _load_nv_baseline() -> Dict[str, Any]:
-    if not NV_baseline_PATH.exists():
-        raise FileNotFoundError(f"NV baseline not found at {NV_baseline_PATH}")
-    return json.loads(NV_baseline_PATH.read_text(encoding="utf-8"))
-
-# for UT
-@lru_cache(maxsize=1)
-def _load_ut_baseline() -> Dict[str, Any]:
-    if not UT_baseline_PATH.exists():
-        raise FileNotFoundError(f"UT baseline not found at {UT_baseline_PATH}")
-    return json.loads(UT_baseline_PATH.read_text(encoding="utf-8")) 
-
-# for AZ
-@lru_cache(maxsize=1)
-def _load_az_baseline() -> Dict[str, Any]:
-    if not AZ_baseline_PATH.exists():
-        raise FileNotFoundError(f"AZ baseline not found at {AZ_baseline_PATH}")
-    return json.loads(AZ_baseline_PATH.read_text(encoding="utf-8"))
-# for WY
-@lru_cache(maxsize=1)
-def _load_wy_baseline() -> Dict[str, Any]:
-    if not WY_baseline_PATH.exists():
-        raise FileNotFoundError(f"WY baseline not found at {WY_baseline_PATH}")
-    return json.loads(WY_baseline_PATH.read_text(encoding="utf-8")) 
-
-# for MT
-@lru_cache(maxsize=1)
-def _load_mt_baseline() -> Dict[str, Any]:
-    if not MT_baseline_PATH.exists():
-        raise FileNotFoundError(f"MT baseline not found at {MT_baseline_PATH}")
-    return json.loads(MT_baseline_PATH.read_text(encoding="utf-8"))
-
-# for CO
-@lru_cache(maxsize=1)      
-def _load_co_baseline() -> Dict[str, Any]:
-    if not CO_baseline_PATH.exists():
-        raise FileNotFoundError(f"CO baseline not found at {CO_baseline_PATH}")
-    return json.loads(CO_baseline_PATH.read_text(encoding="utf-8"))
-# for NM
-@lru_cache(maxsize=1)
-def _load_nm_baseline() -> Dict[str, Any]:
-    if not NM_baseline_PATH.exists():
-        raise FileNotFoundError(f"NM baseline not found at {NM_baseline_PATH}")
-    return json.loads(NM_baseline_PATH.read_text(encoding="utf-8"))
-# for ND
-@lru_cache(maxsize=1)
-def _load_nd_baseline() -> Dict[str, Any]:
-    if not ND_baseline_PATH.exists():
-        raise FileNotFoundError(f"ND baseline not found at {ND_baseline_PATH}")
-    return json.loads(ND_baseline_PATH.read_text(encoding="utf-8"))
-# for SD
-@lru_cache(maxsize=1)
-def _load_sd_baseline() -> Dict[str, Any]:  
-    if not SD_baseline_PATH.exists():
-        raise FileNotFoundError(f"SD baseline not found at {SD_baseline_PATH}")
-    return json.loads(SD_baseline_PATH.read_text(encoding="utf-8"))
-# for NE
-@lru_cache(maxsize=1)
-def _load_ne_baseline() -> Dict[str, Any]:
-    if not NE_baseline_PATH.exists():
-        raise FileNotFoundError(f"NE baseline not found at {NE_baseline_PATH}")
-    return json.loads(NE_baseline_PATH.read_text(encoding="utf-8"))
-# for KS
-@lru_cache(maxsize=1)
-def _load_ks_baseline() -> Dict[str, Any]:
-    if not KS_baseline_PATH.exists():
-        raise FileNotFoundError(f"KS baseline not found at {KS_baseline_PATH}")
-    return json.loads(KS_baseline_PATH.read_text(encoding="utf-8"))
-# for OK
-@lru_cache(maxsize=1)
-def _load_ok_baseline() -> Dict[str, Any]:          
-    if not OK_baseline_PATH.exists():
-        raise FileNotFoundError(f"OK baseline not found at {OK_baseline_PATH}")
-    return json.loads(OK_baseline_PATH.read_text(encoding="utf-8"))
-# for AK
-@lru_cache(maxsize=1)
-def _load_ak_baseline() -> Dict[str, Any]:  
-    if not AK_baseline_PATH.exists():
-        raise FileNotFoundError(f"AK baseline not found at {AK_baseline_PATH}")
-    return json.loads(AK_baseline_PATH.read_text(encoding="utf-8"))
-# for HI
-@lru_cache(maxsize=1)
-def _load_hi_baseline() -> Dict[str, Any]:          
-    if not HI_baseline_PATH.exists():
-        raise FileNotFoundError(f"HI baseline not found at {HI_baseline_PATH}")
-    return json.loads(HI_baseline_PATH.read_text(encoding="utf-8"))     
-# for WI
-@lru_cache(maxsize=1)
-def _load_wi_baseline() -> Dict[str, Any]:        
-    if not WI_baseline_PATH.exists():
-        raise FileNotFoundError(f"WI baseline not found at {WI_baseline_PATH}")
-    return json.loads(WI_baseline_PATH.read_text(encoding="utf-8")) 
-# for MN
-@lru_cache(maxsize=1)
-def _load_mn_baseline() -> Dict[str, Any]:
-    if not MN_baseline_PATH.exists():
-        raise FileNotFoundError(f"MN baseline not found at {MN_baseline_PATH}")
-    return json.loads(MN_baseline_PATH.read_text(encoding="utf-8"))
-# for IL
-@lru_cache(maxsize=1)
-def _load_il_baseline() -> Dict[str, Any]:          
-    if not IL_baseline_PATH.exists():
-        raise FileNotFoundError(f"IL baseline not found at {IL_baseline_PATH}")
-    return json.loads(IL_baseline_PATH.read_text(encoding="utf-8"))
-# for IN
-@lru_cache(maxsize=1)
-def _load_in_baseline() -> Dict[str, Any]:
-    if not IN_baseline_PATH.exists():
-        raise FileNotFoundError(f"IN baseline not found at {IN_baseline_PATH}")
-    return json.loads(IN_baseline_PATH.read_text(encoding="utf-8"))
-# for OH
-@lru_cache(maxsize=1)
-def _load_oh_baseline() -> Dict[str, Any]:
-    if not OH_baseline_PATH.exists():
-        raise FileNotFoundError(f"OH baseline not found at {OH_baseline_PATH}")
-    return json.loads(OH_baseline_PATH.read_text(encoding="utf-8"))
-# for IA
-@lru_cache(maxsize=1)
-def _load_ia_baseline() -> Dict[str, Any]:  
-    if not IA_baseline_PATH.exists():
-        raise FileNotFoundError(f"IA baseline not found at {IA_baseline_PATH}")
-    return json.loads(IA_baseline_PATH.read_text(encoding="utf-8"))
-# for MO
-@lru_cache(maxsize=1)
-def _load_mo_baseline() -> Dict[str, Any]:
-    if not MO_baseline_PATH.exists():
-        raise FileNotFoundError(f"MO baseline not found at {MO_baseline_PATH}")
-    return json.loads(MO_baseline_PATH.read_text(encoding="utf-8"))
-# for MI
-@lru_cache(maxsize=1)
-def _load_mi_baseline() -> Dict[str, Any]:  
-    if not MI_baseline_PATH.exists():
-        raise FileNotFoundError(f"MI baseline not found at {MI_baseline_PATH}")
-    return json.loads(MI_baseline_PATH.read_text(encoding="utf-8"))     
-# for AL
-@lru_cache(maxsize=1)
-def _load_al_baseline() -> Dict[str, Any]:  
-    if not AL_baseline_PATH.exists():
-        raise FileNotFoundError(f"AL baseline not found at {AL_baseline_PATH}")
-    return json.loads(AL_baseline_PATH.read_text(encoding="utf-8"))     
-# for AR
-@lru_cache(maxsize=1)
-def _load_ar_baseline() -> Dict[str, Any]:
-    if not AR_baseline_PATH.exists():
-        raise FileNotFoundError(f"AR baseline not found at {AR_baseline_PATH}")
-    return json.loads(AR_baseline_PATH.read_text(encoding="utf-8"))     
-# for FL
-@lru_cache(maxsize=1)
-def _load_fl_baseline() -> Dict[str, Any]:  
-    if not FL_baseline_PATH.exists():
-        raise FileNotFoundError(f"FL baseline not found at {FL_baseline_PATH}")
-    return json.loads(FL_baseline_PATH.read_text(encoding="utf-8"))         
-# for GA
-@lru_cache(maxsize=1)
-def _load_ga_baseline() -> Dict[str, Any]:  
-    if not GA_baseline_PATH.exists():
-        raise FileNotFoundError(f"GA baseline not found at {GA_baseline_PATH}")
-    return json.loads(GA_baseline_PATH.read_text(encoding="utf-8"))     
-# for KY
-@lru_cache(maxsize=1)
-def _load_ky_baseline() -> Dict[str, Any]:  
-    if not KY_baseline_PATH.exists():
-        raise FileNotFoundError(f"KY baseline not found at {KY_baseline_PATH}")
-    return json.loads(KY_baseline_PATH.read_text(encoding="utf-8"))     
-# for LA
-@lru_cache(maxsize=1)               
-def _load_la_baseline() -> Dict[str, Any]:          
-    if not LA_baseline_PATH.exists():
-        raise FileNotFoundError(f"LA baseline not found at {LA_baseline_PATH}")
-    return json.loads(LA_baseline_PATH.read_text(encoding="utf-8"))     
-# for MS
-@lru_cache(maxsize=1)
-def _load_ms_baseline() -> Dict[str, Any]:          
-    if not MS_baseline_PATH.exists():
-        raise FileNotFoundError(f"MS baseline not found at {MS_baseline_PATH}")
-    return json.loads(MS_baseline_PATH.read_text(encoding="utf-8"))    
-# for NC                
-@lru_cache(maxsize=1)
-def _load_nc_baseline() -> Dict[str, Any]:          
-    if not NC_baseline_PATH.exists():
-        raise FileNotFoundError(f"NC baseline not found at {NC_baseline_PATH}")
-    return json.loads(NC_baseline_PATH.read_text(encoding="utf-8"))     
-# for SC
-@lru_cache(maxsize=1)               
-def _load_sc_baseline() -> Dict[str, Any]:  
-    if not SC_baseline_PATH.exists():
-        raise FileNotFoundError(f"SC baseline not found at {SC_baseline_PATH}")
-    return json.loads(SC_baseline_PATH.read_text(encoding="utf-8"))
-# for TN
-@lru_cache(maxsize=1)               
-def _load_tn_baseline() -> Dict[str, Any]:  
-    if not TN_baseline_PATH.exists():
-        raise FileNotFoundError(f"TN baseline not found at {TN_baseline_PATH}")
-    return json.loads(TN_baseline_PATH.read_text(encoding="utf-8"))     
-# for VA
-@lru_cache(maxsize=1)               
-def _load_va_baseline() -> Dict[str, Any]:  
-    if not VA_baseline_PATH.exists():
-        raise FileNotFoundError(f"VA baseline not found at {VA_baseline_PATH}")
-    return json.loads(VA_baseline_PATH.read_text(encoding="utf-8"))     
-# for WV
-@lru_cache(maxsize=1)               
-def _load_wv_baseline() -> Dict[str, Any]:  
-    if not WV_baseline_PATH.exists():
-        raise FileNotFoundError(f"WV baseline not found at {WV_baseline_PATH}")
-    return json.loads(WV_baseline_PATH.read_text(encoding="utf-8"))     
-# for PA
-@lru_cache(maxsize=1)               
-def _load_pa_baseline() -> Dict[str, Any]:  
-    if not PA_baseline_PATH.exists():
-        raise FileNotFoundError(f"PA baseline not found at {PA_baseline_PATH}")
-    return json.loads(PA_baseline_PATH.read_text(encoding="utf-8"))
-# for NY
-@lru_cache(maxsize=1)            
-def _load_ny_baseline() -> Dict[str, Any]:  
-    if not NY_baseline_PATH.exists():
-        raise FileNotFoundError(f"NY baseline not found at {NY_baseline_PATH}")
-    return json.loads(NY_baseline_PATH.read_text(encoding="utf-8"))    
-# for NJ
-@lru_cache(maxsize=1)               
-def _load_nj_baseline() -> Dict[str, Any]:  
-    if not NJ_baseline_PATH.exists():
-        raise FileNotFoundError(f"NJ baseline not found at {NJ_baseline_PATH}")
-    return json.loads(NJ_baseline_PATH.read_text(encoding="utf-8"))     
-# for CT
-@lru_cache(maxsize=1)               
-def _load_ct_baseline() -> Dict[str, Any]:  
-    if not CT_baseline_PATH.exists():
-        raise FileNotFoundError(f"CT baseline not found at {CT_baseline_PATH}")
-    return json.loads(CT_baseline_PATH.read_text(encoding="utf-8"))     
-# for RI
-@lru_cache(maxsize=1)               
-def _load_ri_baseline() -> Dict[str, Any]:          
-    if not RI_baseline_PATH.exists():
-        raise FileNotFoundError(f"RI baseline not found at {RI_baseline_PATH}")
-    return json.loads(RI_baseline_PATH.read_text(encoding="utf-8"))    
-# for MA
-@lru_cache(maxsize=1)               
-def _load_ma_baseline() -> Dict[str, Any]:          
-    if not MA_baseline_PATH.exists():
-        raise FileNotFoundError(f"MA baseline not found at {MA_baseline_PATH}")
-    return json.loads(MA_baseline_PATH.read_text(encoding="utf-8"))     
-# for VT
-@lru_cache(maxsize=1)               
-def _load_vt_baseline() -> Dict[str, Any]:  
-    if not VT_baseline_PATH.exists():
-        raise FileNotFoundError(f"VT baseline not found at {VT_baseline_PATH}")
-    return json.loads(VT_baseline_PATH.read_text(encoding="utf-8"))    
-# for NH
-@lru_cache(maxsize=1)               
-def _load_nh_baseline() -> Dict[str, Any]:  
-    if not NH_baseline_PATH.exists():
-        raise FileNotFoundError(f"NH baseline not found at {NH_baseline_PATH}")
-    return json.loads(NH_baseline_PATH.read_text(encoding="utf-8"))
-# for ME
-@lru_cache(maxsize=1)               
-def _load_me_baseline() -> Dict[str, Any]:              
-    if not ME_baseline_PATH.exists():
-        raise FileNotFoundError(f"ME baseline not found at {ME_baseline_PATH}")
-    return json.loads(ME_baseline_PATH.read_text(encoding="utf-8"))     
-# for MD
-@lru_cache(maxsize=1)               
-def _load_md_baseline() -> Dict[str, Any]:  
-    if not MD_baseline_PATH.exists():
-        raise FileNotFoundError(f"MD baseline not found at {MD_baseline_PATH}")
-    return json.loads(MD_baseline_PATH.read_text(encoding="utf-8"))     
-# for DE
-@lru_cache(maxsize=1)               
-def _load_de_baseline() -> Dict[str, Any]:  
-    if not DE_baseline_PATH.exists():
-        raise FileNotFoundError(f"DE baseline not found at {DE_baseline_PATH}")
-    return json.loads(DE_baseline_PATH.read_text(encoding="utf-8"))     
-# for DC
-@lru_cache(maxsize=1)               
-def _load_dc_baseline() -> Dict[str, Any]:  
-    if not DC_baseline_PATH.exists():
-        raise FileNotFoundError(f"DC baseline not found at {DC_baseline_PATH}")
-    return json.loads(DC_baseline_PATH.read_text(encoding="utf-8"))     
-
-
-# ----Finish adding the states here----
+def _rss_bytes() -> int:
+    """Current resident set size of this process (0 if unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        try:
+            import resource
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # ru_maxrss is bytes on macOS, kilobytes on Linux
+            return peak if sys.platform == "darwin" else peak * 1024
+        except ImportError:
+            return 0
+
+def _deep_sizeof(obj: Any, seen: Optional[set] = None) -> int:
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, Mapping):
+        size += sum(_deep_sizeof(k, seen) + _deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(_deep_sizeof(v, seen) for v in obj)
+    return size
+
+def _validate_baseline(state_code: str, data: Any) -> None:
+    if not isinstance(data, dict):
+        raise ValueError("baseline must be a JSON object")
+    if data.get("state") != state_code:
+        raise ValueError(f"'state' is {data.get('state')!r}, expected {state_code!r}")
+    rules = data.get("rules")
+    if not isinstance(rules, dict) or not rules:
+        raise ValueError("'rules' must be a non-empty object")
+    for category, rule in rules.items():
+        if not isinstance(rule, dict):
+            raise ValueError(f"rule {category!r} must be an object")
+
+def _load_baseline_file(path: Path) -> Tuple[Mapping, str]:
+    """Parse, validate and freeze one baseline. Returns the data and a hash of the file contents."""
+    state_code = path.stem.upper()
+    raw = path.read_bytes()
+    data = json.loads(raw.decode("utf-8"))
+    _validate_baseline(state_code, data)
+    return freeze(data), hashlib.sha256(raw).hexdigest()
+
+def _build_state_ruleset(state_code: str, baseline: Mapping, content_hash: str, item_index: Optional[Mapping] = None) -> Mapping:
+    name = STATE_NAMES.get(state_code, state_code)
+    return freeze({
+        "match_level": "state",
+        "match_name": state_code,
+        "summary": f"Applied {name} statewide baseline.",
+        # Shared with the frozen baseline, not copied
+        "rules": baseline["rules"],
+        "item_index": item_index if item_index is not None else build_item_index(baseline["rules"]),
+        # Validators for HTTP caching, not part of the response payload
+        "content_hash": content_hash,
+        "last_verified_at": baseline.get("last_verified_at"),
+    })
+
+def _scan_baselines(baselines_dir: Path) -> Dict[str, Tuple[Path, Tuple[int, int]]]:
+    """Map state code -> (path, (mtime_ns, size)) for every baseline file on disk."""
+    found = {}
+    for path in sorted(baselines_dir.glob("*.json")):
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        found[path.stem.upper()] = (path, (st.st_mtime_ns, st.st_size))
+    return found
+
+def _finish_table(table: RulesTable, started: float, rss_before: int) -> RulesTable:
+    table.load_ms = (time.perf_counter() - started) * 1000
+    table.table_bytes = _deep_sizeof(table.baselines) + _deep_sizeof(table.rulesets)
+    table.rss_bytes = _rss_bytes()
+    table.rss_delta_bytes = max(table.rss_bytes - rss_before, 0)
+    return table
+
+def load_rules_table(
+    baselines_dir: Optional[Path] = None,
+    overlays_dir: Optional[Path] = None,
+    snapshot_path: Optional[str] = None,
+) -> RulesTable:
+    """
+    Discover and load every <STATE>.json in baselines_dir and every overlay
+    in overlays_dir. Invalid files are logged and skipped.
+
+    States whose JSON is unchanged since the compiled snapshot was built are
+    taken from the snapshot instead of being parsed. The default snapshot only
+    applies to the default baselines directory.
+    """
+    if snapshot_path is None and baselines_dir in (None, BASELINES_DIR):
+        snapshot_path = baseline_snapshot.SNAPSHOT_PATH
+    baselines_dir = baselines_dir or BASELINES_DIR
+    overlays_dir = overlays_dir or OVERLAYS_DIR
+    started = time.perf_counter()
+    rss_before = _rss_bytes()
+
+    try:
+        snapshot = baseline_snapshot.load_snapshot(snapshot_path) if snapshot_path else {}
+    except (OSError, ValueError, struct.error) as e:
+        logger.warning("Ignoring unreadable baseline snapshot %s: %s", snapshot_path, e)
+        snapshot = {}
+
+    baselines: Dict[str, Mapping] = {}
+    rulesets: Dict[str, Mapping] = {}
+    signatures: Dict[str, Tuple[int, int]] = {}
+    errors: Dict[str, str] = {}
+    from_snapshot = 0
+    for state_code, (path, signature) in _scan_baselines(baselines_dir).items():
+        signatures[state_code] = signature
+        entry = snapshot.get(state_code)
+        if entry is not None and entry.signature == signature:
+            baselines[state_code] = entry.data
+            rulesets[state_code] = _build_state_ruleset(state_code, entry.data, entry.content_hash, entry.item_index)
+            from_snapshot += 1
+            continue
+        try:
+            baseline, content_hash = _load_baseline_file(path)
+        except (OSError, ValueError) as e:
+            errors[state_code] = str(e)
+            logger.error("Skipping invalid baseline %s: %s", path.name, e)
+            continue
+        baselines[state_code] = baseline
+        rulesets[state_code] = _build_state_ruleset(state_code, baseline, content_hash)
+    overlays, overlay_signatures = load_overlays(overlays_dir, errors)
+
+    table = RulesTable(baselines, rulesets, OverlayIndex(overlays))
+    table.baselines_dir = baselines_dir
+    table.overlays_dir = overlays_dir
+    table.signatures = signatures
+    table.overlay_signatures = overlay_signatures
+    table.errors = errors
+    if from_snapshot:
+        table.source = "snapshot" if from_snapshot == len(signatures) else "mixed"
+    _finish_table(table, started, rss_before)
+    logger.info(
+        "Loaded %d state baselines (%d from snapshot) and %d overlays in %.1f ms (table ~%d KB, RSS %d MB)",
+        len(baselines), from_snapshot, len(overlays), table.load_ms, table.table_bytes // 1024,
+        table.rss_bytes // (1024 * 1024),
+    )
+    return table
+
+def _install_table(table: RulesTable) -> RulesTable:
+    # Callers hold _table_lock. Every installed table gets a new version so
+    # anything derived from an older table can tell it is stale.
+    global _table, _table_version
+    _table_version += 1
+    table.version = _table_version
+    _table = table
+    return table
+
+def get_rules_table() -> RulesTable:
+    """Return the in-memory rules table, loading it on first use."""
+    if _table is None:
+        with _table_lock:
+            if _table is None:
+                _install_table(load_rules_table())
+    return _table
+
+def reload_rules_table() -> RulesTable:
+    """Re-read every baseline and swap the new table in."""
+    with _table_lock:
+        if _table is None:
+            return _install_table(load_rules_table())
+        return _install_table(load_rules_table(_table.baselines_dir, _table.overlays_dir))
 
+def reload_changed_baselines() -> int:
+    """
+    Re-parse only the baseline files whose mtime or size changed since the
+    current table was built, then swap in a new table. Overlays are small, so
+    any overlay change reloads the overlay set. A file that fails validation
+    keeps its last good rules. Returns the number of files reloaded.
+    """
+    get_rules_table()
+    with _table_lock:
+        current = _table
+        _reload_stats["checks"] += 1
+        on_disk = _scan_baselines(current.baselines_dir)
+        changed = [code for code, (_, sig) in on_disk.items() if current.signatures.get(code) != sig]
+        removed = [code for code in current.signatures if code not in on_disk]
+        overlays_on_disk = scan_overlays(current.overlays_dir)
+        overlays_changed = {k: sig for k, (_, sig) in overlays_on_disk.items()} != current.overlay_signatures
+        if not changed and not removed and not overlays_changed:
+            return 0
+
+        started = time.perf_counter()
+        rss_before = _rss_bytes()
+        baselines = dict(current.baselines)
+        rulesets = dict(current.rulesets)
+        signatures = dict(current.signatures)
+        errors = dict(current.errors)
+        reloaded = 0
+
+        for code in removed:
+            baselines.pop(code, None)
+            rulesets.pop(code, None)
+            signatures.pop(code, None)
+            errors.pop(code, None)
+
+        for code in changed:
+            path, signature = on_disk[code]
+            signatures[code] = signature
+            try:
+                baseline, content_hash = _load_baseline_file(path)
+            except (OSError, ValueError) as e:
+                errors[code] = str(e)
+                _reload_stats["failures"] += 1
+                _reload_stats["last_error"] = f"{path.name}: {e}"
+                logger.error("Keeping previous %s baseline, reload failed: %s", code, e)
+                continue
+            baselines[code] = baseline
+            rulesets[code] = _build_state_ruleset(code, baseline, content_hash)
+            errors.pop(code, None)
+            reloaded += 1
+
+        overlay_index = current.overlays
+        overlay_signatures = current.overlay_signatures
+        if overlays_changed:
+            for key in [k for k in errors if k.startswith("overlays/")]:
+                del errors[key]
+            overlays, overlay_signatures = load_overlays(current.overlays_dir, errors)
+            loaded = {o.id for o in overlays}
+            for old in current.overlays.overlays:
+                # Keep the last good version of an overlay that now fails validation
+                if old.id not in loaded and f"overlays/{old.id}" in errors:
+                    overlays.append(old)
+                    _reload_stats["failures"] += 1
+                    _reload_stats["last_error"] = f"overlays/{old.id}: {errors[f'overlays/{old.id}']}"
+            overlay_index = OverlayIndex(overlays)
+            reloaded += len(loaded)
+
+        table = RulesTable(baselines, rulesets, overlay_index)
+        table.baselines_dir = current.baselines_dir
+        table.overlays_dir = current.overlays_dir
+        table.signatures = signatures
+        table.overlay_signatures = overlay_signatures
+        table.errors = errors
+        table.source = "mixed" if current.source != "json" and (changed or removed) else current.source
+        _finish_table(table, started, rss_before)
+        _install_table(table)
+
+        _reload_stats["reloads"] += 1
+        _reload_stats["reloaded_files"] += reloaded
+        _reload_stats["last_reload_ms"] = round(table.load_ms, 3)
+        _reload_stats["last_reload_at"] = time.time()
+        logger.info(
+            "Reloaded baselines %s (removed %s) in %.1f ms, version %d",
+            changed, removed, table.load_ms, table.version,
+        )
+        return reloaded
+
+class BaselineWatcher(threading.Thread):
+    """Polls BASELINES_DIR and hot-swaps changed baselines into the live table."""
+    def __init__(self, interval: float = BASELINE_RELOAD_INTERVAL):
+        super().__init__(name="baseline-watcher", daemon=True)
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                reload_changed_baselines()
+            except Exception as e:
+                _reload_stats["failures"] += 1
+                _reload_stats["last_error"] = str(e)
+                logger.exception("Baseline reload failed: %s", e)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+def start_baseline_watcher(interval: float = BASELINE_RELOAD_INTERVAL) -> Optional[BaselineWatcher]:
+    global _watcher
+    if interval <= 0 or _watcher is not None:
+        return _watcher
+    _watcher = BaselineWatcher(interval)
+    _watcher.start()
+    return _watcher
+
+def stop_baseline_watcher() -> None:
+    global _watcher
+    if _watcher is not None:
+        _watcher.stop()
+        _watcher.join(timeout=5)
+        _watcher = None
+
+def get_rules_table_stats() -> Dict[str, Any]:
+    table = get_rules_table()
+    return {
+        "states": len(table.baselines),
+        "overlays": len(table.overlays.overlays),
+        "chains": len(table.chains),
+        "version": table.version,
+        "source": table.source,
+        "load_ms": round(table.load_ms, 3),
+        "table_bytes": table.table_bytes,
+        "rss_bytes": table.rss_bytes,
+        "rss_delta_bytes": table.rss_delta_bytes,
+        "errors": table.errors,
+        "reload": dict(_reload_stats),
+    }
 
 def resolve_region(zip_code: str) -> Optional[RegionInfo]:
     z = zip_code.strip()
     if not z.isdigit() or len(z) != 5:
         return None
 
-    # Geocode ZIP
-    rec = pgeocode.Nominatim("us").query_postal_code(z)
-    if rec is None or rec.empty:
+    # Look up ZIP in the shared index
+    rec = lookup_zip(z)
+    if rec is None:
         return None
 
-    # Extract state and city from record
-    state_code = rec.get("state_code") if "state_code" in rec else None
-    city = rec.get("city") if "city" in rec else None
+    return RegionInfo(zip_code=z, state_code=rec.state_code, city=rec.city, county=rec.county)
 
-    if not state_code:
-        return None
-
-    return RegionInfo(zip_code=z, state_code=state_code, city=city)
-
-def _merge_rules(dest: Dict[str, Any], src: Dict[str, Any]) -> None:
+def _merge_rules(base: Mapping, src: Mapping) -> Mapping:
+    """
+    Return a new frozen rule set with src layered over base. Neither input is
+    modified: categories only in base are shared as-is, and only categories
+    that src overrides get a new (shallow) mapping.
+    """
     if not src: # nothing to merge
-        return
-    
-    # Merge rules
+        return base
+
+    merged = dict(base)
     for k, v in src.items():
-        # If key exists in destination with dest[k] is a dict and v is a dict
-        # dest[k] dict, v dict -> key exists in both dest and src -> merge
-        if k in dest and isinstance(dest[k], dict) and isinstance(v, dict):
-            dest[k].update(v)
+        # Key exists in both and both are mappings -> override field by field
+        if k in merged and isinstance(merged[k], Mapping) and isinstance(v, Mapping):
+            merged[k] = freeze({**merged[k], **v})
         else:
-            dest[k] = v
+            merged[k] = v
+    return freeze(merged)
 
-# -------- Public API --------
-def extract_rules_for_zip(zip_code: str) -> Dict[str, Any]:
-    region = resolve_region(zip_code) # Get region for ZIP
-    if not region:
-        return {
-            "zip": zip_code,
+def _invalid_zip_payload(zip_code: str) -> Dict[str, Any]:
+    return {
+        "zip": zip_code,
+        "match_level": None,
+        "region": None,
+        "rules": None,
+        "summary": "Invalid or unknown ZIP."
+    }
+
+def _state_ruleset(table: RulesTable, state_code: str) -> Mapping:
+    ruleset = table.rulesets.get(state_code)
+    if ruleset is None:
+        ruleset = {
             "match_level": None,
-            "region": None,
+            "match_name": None,
+            "summary": f"No baseline rules for state {state_code}.",
             "rules": None,
-            "summary": "Invalid or unknown ZIP."
         }
+    return ruleset
 
-    merged_rules: Dict[str, Any] = {}
-    summary_parts = []
-    match_level = None
-    match_name = None
-
-    # Apply statewide baseline
-    match region.state_code:
-        case  "CA": # California
-            ca = _load_ca_baseline()
-            if ca and ca.get("rules"):
-                _merge_rules(merged_rules, ca["rules"]) # Merge ca rules to merged_rules
-                summary_parts.append("Applied California statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "CA" # Set match name
-        case "OR": # Oregon
-            ore = _load_or_baseline()
-            if ore and ore.get("rules"):
-                _merge_rules(merged_rules, ore["rules"]) # Merge or rules to merged_rules
-                summary_parts.append("Applied Oregon statewide bsaeline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "OR" # Set match name
-        # TODO: Add other states here
-        case "TX": # Texas
-            tx = _load_tx_baseline()
-            if tx and tx.get("rules"):
-                _merge_rules(merged_rules, tx["rules"]) # Merge tx rules to merged_rules
-                summary_parts.append("Applied Texas statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "TX" # Set match name
-        case "WA": # Washington
-            wa = _load_wa_baseline()
-            if wa and wa.get("rules"):
-                _merge_rules(merged_rules, wa["rules"]) # Merge wa rules to merged_rules
-                summary_parts.append("Applied Washington statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "WA" # Set match name
-        case "ID": # Idaho
-            id = _load_id_baseline()
-            if id and id.get("rules"):  # Merge id rules to merged_rules
-                _merge_rules(merged_rules, id["rules"]) 
-                summary_parts.append("Applied Idaho statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "ID" # Set match name
-        case "NV": # Nevada
-            nv = _load_nv_baseline()
-            if nv and nv.get("rules"):  # Merge nv rules to merged_rules
-                _merge_rules(merged_rules, nv["rules"]) 
-                summary_parts.append("Applied Nevada statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "NV" # Set match name
-        case "UT": # Utah
-            ut = _load_ut_baseline()
-            if ut and ut.get("rules"):  # Merge ut rules to merged_rules
-                _merge_rules(merged_rules, ut["rules"]) 
-                summary_parts.append("Applied Utah statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "UT" # Set match name
-        case "AZ": # Arizona
-            az = _load_az_baseline()
-            if az and az.get("rules"):  # Merge az rules to merged_rules        
-                _merge_rules(merged_rules, az["rules"]) 
-                summary_parts.append("Applied Arizona statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "AZ" # Set match name
-        case "WY": # Wyoming
-            wy = _load_wy_baseline()
-            if wy and wy.get("rules"):  # Merge wy rules to merged_rules        
-                _merge_rules(merged_rules, wy["rules"]) 
-                summary_parts.append("Applied Wyoming statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "WY" # Set match name
-        case "MT": # Montana
-            mt = _load_mt_baseline()
-            if mt and mt.get("rules"):  # Merge mt rules to merged_rules                
-                _merge_rules(merged_rules, mt["rules"]) 
-                summary_parts.append("Applied Montana statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "MT" # Set match name
-        case "CO": # Colorado
-            co = _load_co_baseline()
-            if co and co.get("rules"):  # Merge co rules to merged_rules                
-                _merge_rules(merged_rules, co["rules"]) 
-                summary_parts.append("Applied Colorado statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "CO" # Set match name
-        case "NM": # New Mexico
-            nm = _load_nm_baseline()        
-            if nm and nm.get("rules"):  # Merge nm rules to merged_rules                
-                _merge_rules(merged_rules, nm["rules"]) 
-                summary_parts.append("Applied New Mexico statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "NM" # Set match name
-        case "ND": # North Dakota
-            nd = _load_nd_baseline()        
-            if nd and nd.get("rules"):  # Merge nd rules to merged_rules                
-                _merge_rules(merged_rules, nd["rules"]) 
-                summary_parts.append("Applied North Dakota statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "ND" # Set match name
-        case "SD": # South Dakota
-            sd = _load_sd_baseline()        
-            if sd and sd.get("rules"):  # Merge sd rules to merged_rules        
-                _merge_rules(merged_rules, sd["rules"]) 
-                summary_parts.append("Applied South Dakota statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "SD" # Set match name      
-        case "NE": # Nebraska
-            ne = _load_ne_baseline()        
-            if ne and ne.get("rules"):  # Merge ne rules to merged_rules            
-                _merge_rules(merged_rules, ne["rules"]) 
-                summary_parts.append("Applied Nebraska statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "NE" # Set match name
-        case "KS": # Kansas
-            ks = _load_ks_baseline()        
-            if ks and ks.get("rules"):  # Merge ks rules to merged_rules            
-                _merge_rules(merged_rules, ks["rules"]) 
-                summary_parts.append("Applied Kansas statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "KS" # Set match name
-        case "OK": # Oklahoma
-            ok = _load_ok_baseline()        
-            if ok and ok.get("rules"):  # Merge ok rules to merged_rules        
-                _merge_rules(merged_rules, ok["rules"]) 
-                summary_parts.append("Applied Oklahoma statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "OK" # Set match name          
-        case "AK": # Alaska
-            ak = _load_ak_baseline()        
-            if ak and ak.get("rules"):  # Merge ak rules to merged_rules    
-                _merge_rules(merged_rules, ak["rules"]) 
-                summary_parts.append("Applied Alaska statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "AK" # Set match name          
-        case "HI": # Hawaii
-            hi = _load_hi_baseline()        
-            if hi and hi.get("rules"):  # Merge hi rules to merged_rules        
-                _merge_rules(merged_rules, hi["rules"]) 
-                summary_parts.append("Applied Hawaii statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "HI" # Set match name  
-        case "WI": # Wisconsin
-            wi = _load_wi_baseline()        
-            if wi and wi.get("rules"):  # Merge wi rules to merged_rules        
-                _merge_rules(merged_rules, wi["rules"]) 
-                summary_parts.append("Applied Wisconsin statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "WI" # Set match name  
-        case "MN": # Minnesota
-            mn = _load_mn_baseline()        
-            if mn and mn.get("rules"):  # Merge mn rules to merged_rules                
-                _merge_rules(merged_rules, mn["rules"]) 
-                summary_parts.append("Applied Minnesota statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "MN" # Set match name  
-        case "IL": # Illinois
-            il = _load_il_baseline()        
-            if il and il.get("rules"):  # Merge il rules to merged_rules        
-                _merge_rules(merged_rules, il["rules"]) 
-                summary_parts.append("Applied Illinois statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "IL" # Set match name              
-
-        case "IN": # Indiana    
-            ind = _load_in_baseline()        
-            if ind and ind.get("rules"):  # Merge in rules to merged_rules        
-                _merge_rules(merged_rules, ind["rules"]) 
-                summary_parts.append("Applied Indiana statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "IN" # Set match name          
-        case "OH": # Ohio    
-            oh = _load_oh_baseline()
-            if oh and oh.get("rules"):  # Merge oh rules to merged_rules        
-                _merge_rules(merged_rules, oh["rules"]) 
-                summary_parts.append("Applied Ohio statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "OH" # Set match name                            
-        case "IA": # Iowa    
-            ia = _load_ia_baseline()        
-            if ia and ia.get("rules"):  # Merge ia rules to merged_rules    
-                _merge_rules(merged_rules, ia["rules"]) 
-                summary_parts.append("Applied Iowa statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "IA" # Set match name      
-        case "MO": # Missouri    
-            mo = _load_mo_baseline()        
-            if mo and mo.get("rules"):  # Merge mo rules to merged_rules        
-                _merge_rules(merged_rules, mo["rules"]) 
-                summary_parts.append("Applied Missouri statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "MO" # Set match name
-        case "MI": # Michigan    
-            mi = _load_mi_baseline()        
-            if mi and mi.get("rules"):  # Merge mi rules to merged_rules    
-                _merge_rules(merged_rules, mi["rules"]) 
-                summary_parts.append("Applied Michigan statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "MI" # Set match name      
-        case "AL": # Alabama    
-            al = _load_al_baseline()        
-            if al and al.get("rules"):  # Merge al rules to merged_rules        
-                _merge_rules(merged_rules, al["rules"]) 
-                summary_parts.append("Applied Alabama statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "AL" # Set match name      
-        case "AR": # Arkansas    
-            ar = _load_ar_baseline()        
-            if ar and ar.get("rules"):  # Merge ar rules to merged_rules    
-                _merge_rules(merged_rules, ar["rules"]) 
-                summary_parts.append("Applied Arkansas statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "AR" # Set match name
-        case "FL": # Florida    
-            fl = _load_fl_baseline()        
-            if fl and fl.get("rules"):  # Merge fl rules to merged_rules    
-                _merge_rules(merged_rules, fl["rules"]) 
-                summary_parts.append("Applied Florida statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "FL" # Set match name      
-        case "GA": # Georgia    
-            ga = _load_ga_baseline()
-            if ga and ga.get("rules"):  # Merge ga rules to merged_rules        
-                _merge_rules(merged_rules, ga["rules"]) 
-                summary_parts.append("Applied Georgia statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "GA" # Set match name    
-        case "KY": # Kentucky   
-            ky = _load_ky_baseline()        
-            if ky and ky.get("rules"):  # Merge ky rules to merged_rules    
-                _merge_rules(merged_rules, ky["rules"]) 
-                summary_parts.append("Applied Kentucky statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "KY" # Set match name
-        case "LA": # Louisiana
-            la = _load_la_baseline()        
-            if la and la.get("rules"):  # Merge la rules to merged_rules    
-                _merge_rules(merged_rules, la["rules"]) 
-                summary_parts.append("Applied Louisiana statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "LA" # Set match name
-        case "MS": # Mississippi
-            ms = _load_ms_baseline()        
-            if ms and ms.get("rules"):  # Merge ms rules to merged_rules
-                _merge_rules(merged_rules, ms["rules"]) 
-                summary_parts.append("Applied Mississippi statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "MS" # Set match name
-        case "NC": # North Carolina
-            nc = _load_nc_baseline()
-
-            if nc and nc.get("rules"):  # Merge nc rules to merged_rules    
-                _merge_rules(merged_rules, nc["rules"]) 
-                summary_parts.append("Applied North Carolina statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "NC" # Set match name
-        case "SC": # South Carolina
-            sc = _load_sc_baseline()        
-            if sc and sc.get("rules"):  # Merge sc rules to merged_rules    
-                _merge_rules(merged_rules, sc["rules"]) 
-                summary_parts.append("Applied South Carolina statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "SC" # Set match name
-        case "TN": # Tennessee
-            tn = _load_tn_baseline()        
-            if tn and tn.get("rules"):  # Merge tn rules to merged_rules        
-                _merge_rules(merged_rules, tn["rules"]) 
-                summary_parts.append("Applied Tennessee statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "TN" # Set match name
-        case "VA": # Virginia   
-            va = _load_va_baseline()        
-            if va and va.get("rules"):  # Merge va rules to merged_rules    
-                _merge_rules(merged_rules, va["rules"]) 
-                summary_parts.append("Applied Virginia statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "VA" # Set match name
-        case "WV": # West Virginia
-            wv = _load_wv_baseline()        
-            if wv and wv.get("rules"):  # Merge wv rules to merged  
-                _merge_rules(merged_rules, wv["rules"]) 
-                summary_parts.append("Applied West Virginia statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "WV" # Set match name
-        case "PA": # Pennsylvania
-            pa = _load_pa_baseline()        
-            if pa and pa.get("rules"):  # Merge pa rules to merged_rules    
-                _merge_rules(merged_rules, pa["rules"]) 
-                summary_parts.append("Applied Pennsylvania statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "PA" # Set match name  
-        case "NY": # New York
-            ny = _load_ny_baseline()        
-            if ny and ny.get("rules"):  # Merge ny rules to merged_rules        
-                _merge_rules(merged_rules, ny["rules"]) 
-                summary_parts.append("Applied New York statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "NY" # Set match name
-        case "NJ": # New Jersey
-            nj = _load_nj_baseline()        
-            if nj and nj.get("rules"):  # Merge nj rules to merged_rules    
-                _merge_rules(merged_rules, nj["rules"]) 
-                summary_parts.append("Applied New Jersey statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "NJ" # Set match name
-        case "CT": # Connecticut
-            ct = _load_ct_baseline()        
-            if ct and ct.get("rules"):  # Merge ct rules to merged_rules    
-                _merge_rules(merged_rules, ct["rules"]) 
-                summary_parts.append("Applied Connecticut statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "CT" # Set match name      
-        case "RI": # Rhode Island   
-            ri = _load_ri_baseline()        
-            if ri and ri.get("rules"):  # Merge ri rules to merged_rules    
-                _merge_rules(merged_rules, ri["rules"]) 
-                summary_parts.append("Applied Rhode Island statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "RI" # Set match name  
-        case "MA": # Massachusetts
-            ma = _load_ma_baseline()        
-            if ma and ma.get("rules"):  # Merge ma rules to merged_rules        
-                _merge_rules(merged_rules, ma["rules"]) 
-                summary_parts.append("Applied Massachusetts statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "MA" # Set match name      
-        case "VT": # Vermont
-            vt = _load_vt_baseline()        
-            if vt and vt.get("rules"):  # Merge vt rules to merged_rules            
-                _merge_rules(merged_rules, vt["rules"]) 
-                summary_parts.append("Applied Vermont statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "VT" # Set match name    
-        case "NH": # New Hampshire      
-            nh = _load_nh_baseline()        
-            if nh and nh.get("rules"):  # Merge nh rules to merged_rules        
-                _merge_rules(merged_rules, nh["rules"]) 
-                summary_parts.append("Applied New Hampshire statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "NH" # Set match name      
-        case "ME": # Maine
-            me = _load_me_baseline()        
-            if me and me.get("rules"):  # Merge me rules to merged_rules        
-                _merge_rules(merged_rules, me["rules"]) 
-                summary_parts.append("Applied Maine statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "ME" # Set match name      
-        case "MD": # Maryland       
-            md = _load_md_baseline()        
-            if md and md.get("rules"):  # Merge md rules to merged_rules        
-                _merge_rules(merged_rules, md["rules"]) 
-                summary_parts.append("Applied Maryland statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "MD" # Set match name  
-        case "DE": # Delaware
-            de = _load_de_baseline()        
-            if de and de.get("rules"):  # Merge de rules to merged_rules        
-                _merge_rules(merged_rules, de["rules"]) 
-                summary_parts.append("Applied Delaware statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "DE" # Set match name  
-        case "DC": # District of Columbia
-            dc = _load_dc_baseline()        
-            if dc and dc.get("rules"):  # Merge dc rules to merged_rules    
-                _merge_rules(merged_rules, dc["rules"]) 
-                summary_parts.append("Applied District of Columbia statewide baseline.") # Add to summary
-                match_level = "state" # Set match level
-                match_name = "DC" # Set match name      
-
-        case _: # Invalid state code
-            summary_parts.append(f"No baseline rules for state {region.state_code}.")
-
-        
-
-    # Final payload
-    return {
-        "zip": region.zip_code,
+def _build_chain_ruleset(table: RulesTable, state_code: str, chain: Tuple[Overlay, ...]) -> Mapping:
+    """Flatten a state baseline and its overlays (least specific first) into one rule set."""
+    base = table.rulesets.get(state_code)
+    merged_rules: Mapping = base["rules"] if base else EMPTY
+    summary_parts = [base["summary"]] if base else []
+    hashes = [base["content_hash"]] if base else []
+    dates = [base["last_verified_at"]] if base and base.get("last_verified_at") else []
+    match_level = base["match_level"] if base else None
+    match_name = base["match_name"] if base else None
+
+    for overlay in chain:
+        merged_rules = _merge_rules(merged_rules, overlay.rules)
+        summary_parts.append(overlay.summary)
+        hashes.append(overlay.content_hash)
+        if overlay.last_verified_at:
+            dates.append(overlay.last_verified_at)
+        match_level = overlay.level
+        match_name = overlay.name
+
+    return freeze({
         "match_level": match_level,
         "match_name": match_name,
+        "summary": " ".join(summary_parts),
+        "rules": merged_rules,
+        "item_index": build_item_index(merged_rules),
+        "content_hash": hashlib.sha256("|".join(hashes).encode()).hexdigest(),
+        "last_verified_at": max(dates) if dates else None,
+    })
+
+def _ruleset_for_region(table: RulesTable, region: RegionInfo) -> Mapping:
+    chain = table.overlays.chain(region.state_code, region.county, region.city, region.zip_code)
+    if not chain:
+        return _state_ruleset(table, region.state_code)
+
+    key = (region.state_code,) + tuple(o.id for o in chain)
+    ruleset = table.chains.get(key)
+    if ruleset is None:
+        ruleset = table.chains.setdefault(key, _build_chain_ruleset(table, region.state_code, chain))
+    return ruleset
+
+def _rules_payload(region: RegionInfo, ruleset: Mapping) -> Dict[str, Any]:
+    return {
+        "zip": region.zip_code,
+        "match_level": ruleset["match_level"],
+        "match_name": ruleset["match_name"],
+        "region": {
+            "state": region.state_code,
+            "city": region.city
+        },
+        "summary": ruleset["summary"],
+        "rules": ruleset["rules"] or None
+    }
+
+# -------- Public API --------
+def extract_rules_for_zip(zip_code: str, table: Optional[RulesTable] = None) -> Dict[str, Any]:
+    region = resolve_region(zip_code) # Get region for ZIP
+    if not region:
+        return _invalid_zip_payload(zip_code)
+
+    # Apply statewide baseline and any local overlays
+    table = table or get_rules_table()
+    return _rules_payload(region, _ruleset_for_region(table, region))
+
+def rules_validators(zip_code: str, table: Optional[RulesTable] = None) -> Optional[Dict[str, Any]]:
+    """
+    Cache validators for a ZIP's rules without building the payload: a strong
+    ETag derived from the ZIP and the baseline content hash, and the
+    baseline's last_verified_at date. None when the ZIP has no rules.
+    """
+    region = resolve_region(zip_code)
+    if not region:
+        return None
+    table = table or get_rules_table()
+    ruleset = _ruleset_for_region(table, region)
+    if not ruleset["rules"]:
+        return None
+    digest = hashlib.sha256(f"{ruleset['content_hash']}:{region.zip_code}".encode()).hexdigest()
+    return {"etag": f'"{digest[:32]}"', "last_verified_at": ruleset.get("last_verified_at")}
+
+def lookup_item_for_zip(zip_code: str, item: str, limit: int = 3, table: Optional[RulesTable] = None) -> Dict[str, Any]:
+    """Which rule categories (and bins) apply to an item at this ZIP, best match first."""
+    region = resolve_region(zip_code)
+    if not region:
+        return {**_invalid_zip_payload(zip_code), "item": item, "matches": None}
+
+    table = table or get_rules_table()
+    ruleset = _ruleset_for_region(table, region)
+    matches = None
+    if ruleset["rules"]:
+        matches = search_item_index(ruleset["item_index"], ruleset["rules"], item, limit)
+    return {
+        "zip": region.zip_code,
+        "item": item,
+        "match_level": ruleset["match_level"],
+        "match_name": ruleset["match_name"],
         "region": {
             "state": region.state_code,
             "city": region.city
         },
-        "summary": " ".join(summary_parts) or None,
-        "rules": merged_rules or None
+        "summary": ruleset["summary"],
+        "matches": matches,
     }
+
+def extract_rules_for_zips(zip_codes: List[str], table: Optional[RulesTable] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Same result as extract_rules_for_zip for each ZIP, in input order.
+    ZIPs that share a state and overlay chain share one flattened rule set,
+    which is merged only the first time it is needed.
+    """
+    table = table or get_rules_table()
+    for zip_code in zip_codes:
+        region = resolve_region(zip_code)
+        if not region:
+            yield _invalid_zip_payload(zip_code)
+        else:
+            yield _rules_payload(region, _ruleset_for_region(table, region))
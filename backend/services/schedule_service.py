@@ -1,18 +1,341 @@
 from repositories import schedule_repository
 from database.db import SessionLocal
+from scrapers.registry import ScrapeFailedError, get_adapter
+from services.address_normalizer import normalize_address
+from services.cache_store import utcnow as _utcnow
+from services.single_flight import SingleFlight
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional, Set
+import asyncio
 import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# -------- Config --------
+SCHEDULE_TTL_HOURS = float(os.getenv("SCHEDULE_TTL_HOURS", "168"))
+# Floor so a schedule whose last event is today is not re-scraped on every request
+SCHEDULE_MIN_TTL_HOURS = float(os.getenv("SCHEDULE_MIN_TTL_HOURS", "1"))
+SCHEDULE_SWEEP_INTERVAL = float(os.getenv("SCHEDULE_SWEEP_INTERVAL", "3600"))  # seconds, 0 disables
+SCHEDULE_SWEEP_LOOKAHEAD_HOURS = float(os.getenv("SCHEDULE_SWEEP_LOOKAHEAD_HOURS", "24"))
+SCHEDULE_SWEEP_BATCH = int(os.getenv("SCHEDULE_SWEEP_BATCH", "100"))
+SCHEDULE_REFRESH_CONCURRENCY = int(os.getenv("SCHEDULE_REFRESH_CONCURRENCY", "2"))
+# How long a sweeping worker holds a row it is refreshing; longer than any scrape timeout
+SCHEDULE_SWEEP_LEASE_MINUTES = float(os.getenv("SCHEDULE_SWEEP_LEASE_MINUTES", "15"))
+# Negative caching: how long "no schedule" and "upstream failed" outcomes are remembered
+SCHEDULE_NOT_FOUND_TTL_MINUTES = float(os.getenv("SCHEDULE_NOT_FOUND_TTL_MINUTES", "360"))
+SCHEDULE_ERROR_TTL_MINUTES = float(os.getenv("SCHEDULE_ERROR_TTL_MINUTES", "10"))
+
+STATUS_OK = "ok"
+STATUS_NOT_FOUND = "not_found"
+STATUS_ERROR = "error"
+
+# One scrape per (address, zip) at a time in this worker
+schedule_flights = SingleFlight()
+
+_background: Set[asyncio.Task] = set()
+_refresh_stats: Dict[str, Any] = {
+    "stale_served": 0,
+    "background_refreshes": 0,
+    "refresh_failures": 0,
+    "sweeps": 0,
+    "swept": 0,
+    "claimed_elsewhere": 0,
+    "last_sweep_at": None,
+    "last_error": None,
+}
+_negative_stats: Dict[str, int] = {"not_found_stored": 0, "errors_stored": 0, "scrapes_avoided": 0}
+_sweeper: Optional[asyncio.Task] = None
+
+class UnsupportedCityError(ValueError):
+    pass
+
+class ScheduleUnavailableError(LookupError):
+    """No schedule for the address: status is "not_found" or "error" (upstream failed)."""
+    def __init__(self, status: str):
+        super().__init__(status)
+        self.status = status
 
 def get_schedule_by_address_and_zip(address: str, zip_code: str):
+    # "200 East Santa Clara Street" finds the row stored for "200 E Santa Clara St"
+    address_key, zip_code = schedule_key(address, zip_code)
     db = SessionLocal()
     try:
-        result = schedule_repository.get_by_address_and_zip(db, address, zip_code)
+        result = schedule_repository.get_by_address_key(db, address_key, zip_code)
         return result
     finally:
         db.close()
 
 def add_schedule(data: dict):
+    address_key, zip_code = schedule_key(data.get("address") or "", data.get("zip_code"))
     db = SessionLocal()
     try:
-        return schedule_repository.create_schedule(db, data)
+        return schedule_repository.create_schedule(db, {**data, "address_key": address_key, "zip_code": zip_code})
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def update_schedule(schedule_id: int, data: dict):
+    db = SessionLocal()
+    try:
+        return schedule_repository.update_schedule(db, schedule_id, data)
+    finally:
+        db.close()
+
+def get_stored_events(address: str, zip_code: str, start: Optional[date] = None, end: Optional[date] = None, limit: Optional[int] = None):
+    """
+    (row, events) for a stored event-list schedule, reading only the events in
+    [start, end] from the events table; the JSON blob is not loaded. None if
+    the address has no stored events.
+    """
+    address_key, zip_code = schedule_key(address, zip_code)
+    db = SessionLocal()
+    try:
+        rows = schedule_repository.get_events_by_address_key(db, address_key, zip_code, start, end, limit)
+        if not rows:
+            return None
+        row = rows[0]
+        if row.date is None and not schedule_repository.has_events(db, row.id):
+            return None
+        return row, [{"date": r.date.isoformat(), "type": r.type} for r in rows if r.date is not None]
+    finally:
+        db.close()
+
+def filter_events(schedule, start: Optional[date] = None, end: Optional[date] = None, limit: Optional[int] = None):
+    """The same range filter applied to an in-memory event list (fresh scrapes)."""
+    if not isinstance(schedule, list):
+        return schedule
+    events = sorted(
+        (e for e in schedule
+         if isinstance(e, dict) and isinstance(e.get("date"), str)
+         and (start is None or e["date"] >= start.isoformat())
+         and (end is None or e["date"] <= end.isoformat())),
+        key=lambda e: e["date"],
+    )
+    return events[:limit] if limit is not None else events
+
+def schedule_key(address: str, zip_code: str | None) -> tuple[str, str]:
+    """
+    (USPS-normalized address, ZIP): the unique key of a stored schedule. A
+    missing ZIP is "", not NULL, since the unique index treats NULLs as distinct.
+    """
+    return normalize_address(address), (zip_code or "").strip()
+
+# -------- Freshness --------
+def _last_event_date(schedule) -> Optional[date]:
+    if not isinstance(schedule, list):
+        return None
+    dates = []
+    for event in schedule:
+        try:
+            dates.append(date.fromisoformat(event["date"]))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return max(dates, default=None)
+
+def schedule_expiry(schedule, fetched_at: datetime, ttl_hours: float = SCHEDULE_TTL_HOURS) -> datetime:
+    """
+    A schedule expires after ttl_hours (the city adapter's result TTL), or
+    sooner once its last known event has passed (end of the scraped month or
+    calendar year).
+    """
+    expires_at = fetched_at + timedelta(hours=ttl_hours)
+    last = _last_event_date(schedule)
+    if last is not None:
+        expires_at = min(expires_at, datetime.combine(last + timedelta(days=1), datetime.min.time()))
+    return max(expires_at, fetched_at + timedelta(hours=SCHEDULE_MIN_TTL_HOURS))
+
+def is_fresh(row, now: Optional[datetime] = None) -> bool:
+    return row.expires_at is not None and row.expires_at > (now or _utcnow())
+
+def cached_negative_status(row, now: Optional[datetime] = None) -> Optional[str]:
+    """
+    The status of a row that caches a negative outcome and has not expired,
+    else None. Each hit is a scrape avoided.
+    """
+    if row is None or row.status not in (STATUS_NOT_FOUND, STATUS_ERROR) or not is_fresh(row, now):
+        return None
+    _negative_stats["scrapes_avoided"] += 1
+    return row.status
+
+def _negative_expiry(status: str, fetched_at: datetime) -> datetime:
+    minutes = SCHEDULE_NOT_FOUND_TTL_MINUTES if status == STATUS_NOT_FOUND else SCHEDULE_ERROR_TTL_MINUTES
+    return fetched_at + timedelta(minutes=minutes)
+
+# -------- Scraping --------
+def result_ttl_hours(city: str | None, state: str | None) -> float:
+    adapter = get_adapter(city, state)
+    return adapter.ttl_hours if adapter else SCHEDULE_TTL_HOURS
+
+async def scrape_schedule(address: str, city: str | None, state: str | None = None):
+    # Cities are registered in scrapers.registry
+    adapter = get_adapter(city, state)
+    if adapter is None:
+        raise UnsupportedCityError(city)
+    return await adapter.fetch(address)
+
+async def fetch_and_store_schedule(
+    address: str, zip_code: str | None, city: str | None, state: str | None, force: bool = False
+):
+    """
+    Scrape the schedule for an address and store it with fresh expiry
+    metadata, updating the existing row if there is one. Concurrent calls for
+    the same normalized (address, zip) share a single scrape and write.
+
+    If the scrape comes back empty or fails, the previously stored schedule is
+    kept and its next retry is pushed SCHEDULE_MIN_TTL_HOURS out, so a failing
+    source is not re-scraped on every request or sweep. With nothing stored,
+    the outcome itself is stored as "not_found" or "error" for a short TTL and
+    ScheduleUnavailableError is raised; until it expires, lookups for the
+    address get the same answer without a scrape.
+    """
+    async def scrape_and_store():
+        # Another request or worker may have refreshed it in the meantime
+        existing = get_schedule_by_address_and_zip(address, zip_code)
+        if existing and not force:
+            if existing.schedule and is_fresh(existing):
+                return existing.schedule
+            negative = cached_negative_status(existing)
+            if negative:
+                raise ScheduleUnavailableError(negative)
+        try:
+            schedule = await scrape_schedule(address, city, state)
+            status = STATUS_OK if schedule else STATUS_NOT_FOUND
+        except ScrapeFailedError:
+            schedule, status = None, STATUS_ERROR
+        if status != STATUS_OK:
+            if existing and existing.schedule:
+                retry_at = _utcnow() + timedelta(hours=SCHEDULE_MIN_TTL_HOURS)
+                update_schedule(existing.id, {
+                    "schedule": existing.schedule,
+                    "fetched_at": existing.fetched_at,
+                    "expires_at": max(existing.expires_at or retry_at, retry_at),
+                })
+                return existing.schedule
+            _store_negative(existing, address, zip_code, city, state, status)
+            raise ScheduleUnavailableError(status)
+
+        fetched_at = _utcnow()
+        freshness = {"fetched_at": fetched_at, "expires_at": schedule_expiry(schedule, fetched_at, result_ttl_hours(city, state))}
+        if existing:
+            update_schedule(existing.id, {"schedule": schedule, **freshness})
+        else:
+            add_schedule({
+                "address": address,
+                "city": city,
+                "state": state,
+                "zip_code": zip_code,
+                "schedule": schedule,
+                **freshness
+            })
+        return schedule
+
+    return await schedule_flights.do(schedule_key(address, zip_code), scrape_and_store)
+
+def _store_negative(existing, address: str, zip_code: str | None, city: str | None, state: str | None, status: str) -> None:
+    fetched_at = _utcnow()
+    outcome = {"schedule": None, "status": status, "fetched_at": fetched_at, "expires_at": _negative_expiry(status, fetched_at)}
+    if existing:
+        update_schedule(existing.id, outcome)
+    else:
+        add_schedule({"address": address, "city": city, "state": state, "zip_code": zip_code, **outcome})
+    _negative_stats["not_found_stored" if status == STATUS_NOT_FOUND else "errors_stored"] += 1
+
+async def _refresh(address: str, zip_code: str | None, city: str | None, state: str | None, force: bool = False) -> None:
+    try:
+        await fetch_and_store_schedule(address, zip_code, city, state, force)
+    except Exception as e:
+        _refresh_stats["refresh_failures"] += 1
+        _refresh_stats["last_error"] = f"{address}: {e}"
+        logger.warning("Schedule refresh failed for %s: %s", address, e)
+
+def refresh_in_background(address: str, zip_code: str | None, city: str | None, state: str | None) -> None:
+    """Re-scrape a stale row without making the caller wait for it."""
+    _refresh_stats["stale_served"] += 1
+    if schedule_key(address, zip_code) in schedule_flights:
+        return
+    _refresh_stats["background_refreshes"] += 1
+    task = asyncio.get_running_loop().create_task(_refresh(address, zip_code, city, state))
+    # Keep a reference until it finishes so the task is not garbage collected
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+# -------- Sweeper --------
+async def sweep_expiring_schedules(
+    lookahead_hours: float = SCHEDULE_SWEEP_LOOKAHEAD_HOURS,
+    limit: int = SCHEDULE_SWEEP_BATCH,
+    concurrency: int = SCHEDULE_REFRESH_CONCURRENCY,
+) -> int:
+    """
+    Refresh rows that expire within lookahead_hours, at most `concurrency`
+    scrapes at a time. Every worker sweeps, so each row is claimed with a
+    lease (schedule_repository.claim_for_refresh) right before its scrape;
+    rows another worker claimed first are skipped. The lease pushes
+    expires_at past the lookahead, and a successful scrape replaces it. If
+    the worker dies mid-scrape, the row is due again once the lease runs out.
+    Returns the number of rows this worker refreshed.
+    """
+    db = SessionLocal()
+    try:
+        rows = schedule_repository.get_due_for_refresh(db, _utcnow() + timedelta(hours=lookahead_hours), limit)
+        due = [(row.id, row.expires_at, (row.address, row.zip_code, row.city, row.state)) for row in rows if row.address]
+    finally:
+        db.close()
+
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    def claim(schedule_id, expires_at) -> bool:
+        lease_until = _utcnow() + timedelta(hours=lookahead_hours, minutes=SCHEDULE_SWEEP_LEASE_MINUTES)
+        db = SessionLocal()
+        try:
+            return schedule_repository.claim_for_refresh(db, schedule_id, expires_at, lease_until)
+        finally:
+            db.close()
+
+    async def refresh(schedule_id, expires_at, args) -> bool:
+        async with semaphore:
+            if not claim(schedule_id, expires_at):
+                _refresh_stats["claimed_elsewhere"] += 1
+                return False
+            # The leased row looks fresh, so bypass the freshness check
+            await _refresh(*args, force=True)
+            return True
+
+    swept = sum(await asyncio.gather(*(refresh(*row) for row in due)))
+    _refresh_stats["sweeps"] += 1
+    _refresh_stats["swept"] += swept
+    _refresh_stats["last_sweep_at"] = _utcnow().isoformat()
+    return swept
+
+async def _sweep_forever(interval: float) -> None:
+    while True:
+        # Sleep first so worker startup does not wait on a sweep
+        await asyncio.sleep(interval)
+        try:
+            await sweep_expiring_schedules()
+        except Exception as e:
+            _refresh_stats["last_error"] = str(e)
+            logger.exception("Schedule sweep failed: %s", e)
+
+def start_schedule_sweeper(interval: float = SCHEDULE_SWEEP_INTERVAL) -> Optional[asyncio.Task]:
+    global _sweeper
+    if interval <= 0 or _sweeper is not None:
+        return _sweeper
+    _sweeper = asyncio.get_running_loop().create_task(_sweep_forever(interval))
+    return _sweeper
+
+async def stop_schedule_sweeper() -> None:
+    global _sweeper
+    tasks = list(_background)
+    if _sweeper is not None:
+        tasks.append(_sweeper)
+        _sweeper = None
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+def get_refresh_stats() -> Dict[str, Any]:
+    return {**_refresh_stats, "refreshing": len(_background), "sweeper_running": _sweeper is not None}
+
+def get_negative_cache_stats() -> Dict[str, Any]:
+    return dict(_negative_stats)
@@ -0,0 +1,52 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one execution.
+
+    The first caller for a key starts the work as a task; callers that arrive
+    while it is running await that same task. Every caller awaits it through
+    asyncio.shield, so a disconnecting client cannot cancel a scrape other
+    requests are waiting on. Results and exceptions are shared; nothing is
+    kept once the flight lands.
+    """
+    def __init__(self):
+        self._flights: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self.calls = 0
+        self.executions = 0
+        self.shared = 0        # flights that served more than one caller
+        self.deduplicated = 0  # callers that joined a flight instead of starting one
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        task = self._flights.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._flights[key] = task
+            self._waiters[key] = 1
+            task.add_done_callback(lambda _: self._land(key))
+        else:
+            self.deduplicated += 1
+            self._waiters[key] += 1
+            if self._waiters[key] == 2:
+                self.shared += 1
+        return await asyncio.shield(task)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._flights
+
+    def _land(self, key: Hashable) -> None:
+        self._flights.pop(key, None)
+        self._waiters.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._flights),
+            "calls": self.calls,
+            "executions": self.executions,
+            "shared": self.shared,
+            "deduplicated": self.deduplicated,
+        }
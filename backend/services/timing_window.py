@@ -0,0 +1,28 @@
+from collections import deque
+from typing import Dict, Optional
+
+TIMING_WINDOW = 200
+
+class TimingWindow:
+    """
+    The most recent timings (ms) of one stage, for p50/p95 in stats
+    endpoints. add() is a single deque.append, so worker threads can record
+    without a lock.
+    """
+    def __init__(self, size: int = TIMING_WINDOW):
+        self._samples = deque(maxlen=size)
+
+    def add(self, ms: float) -> None:
+        self._samples.append(ms)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 1)
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        return {"count": len(self._samples), "p50": self.percentile(0.5), "p95": self.percentile(0.95)}
@@ -0,0 +1,177 @@
+"""
+Compact ZIP -> (state, city, county, lat, lon) index.
+
+The index is a single binary file built once from the pgeocode (GeoNames) US
+dataset and memory-mapped by every worker, so lookups are a binary search
+over fixed-width records with no pandas on the request path.
+
+Build it ahead of time with:
+    python -m services.zip_index
+"""
+from pathlib import Path
+from typing import Optional, Iterable, NamedTuple, Tuple, Dict, List
+import logging
+import mmap
+import os
+import struct
+import threading
+
+logger = logging.getLogger(__name__)
+
+# -------- Paths --------
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+ZIP_INDEX_PATH = Path(os.getenv("ZIP_INDEX_PATH", str(DATA_DIR / "zip_index.bin")))
+
+# -------- Format --------
+# header:  magic, format version, record count, offset of the string table
+# record:  zip, state, city string id, county string id, latitude, longitude
+# strings: count, (count + 1) end offsets, utf-8 blob
+MAGIC = b"EHZI"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sHII")
+_RECORD = struct.Struct("<I2sIIff")
+_ZIP = struct.Struct("<I")
+_U32 = struct.Struct("<I")
+
+# -------- Models --------
+class ZipRecord(NamedTuple):
+    zip_code: str
+    state_code: str
+    city: Optional[str]
+    county: Optional[str]
+    latitude: float
+    longitude: float
+
+class ZipIndex:
+    """Read-only view over a memory-mapped index file."""
+    def __init__(self, path: Path = ZIP_INDEX_PATH):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, strings_offset = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self._mm.close()
+            raise ValueError(f"{self.path} is not a v{FORMAT_VERSION} ZIP index")
+        self._count = count
+        self._records_offset = _HEADER.size
+        self._string_count = _U32.unpack_from(self._mm, strings_offset)[0]
+        self._string_offsets = strings_offset + _U32.size
+        self._string_blob = self._string_offsets + (self._string_count + 1) * _U32.size
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def _zip_at(self, i: int) -> int:
+        return _ZIP.unpack_from(self._mm, self._records_offset + i * _RECORD.size)[0]
+
+    def _string(self, string_id: int) -> Optional[str]:
+        if string_id == 0:
+            return None
+        start, end = struct.unpack_from("<II", self._mm, self._string_offsets + (string_id - 1) * _U32.size)
+        return self._mm[self._string_blob + start:self._string_blob + end].decode("utf-8")
+
+    def lookup(self, zip_code: str) -> Optional[ZipRecord]:
+        z = zip_code.strip()
+        if not z.isdigit() or len(z) != 5:
+            return None
+        target = int(z)
+
+        # Binary search over the sorted ZIP column
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._zip_at(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == self._count or self._zip_at(lo) != target:
+            return None
+
+        _, state, city_id, county_id, lat, lon = _RECORD.unpack_from(self._mm, self._records_offset + lo * _RECORD.size)
+        return ZipRecord(z, state.decode("ascii"), self._string(city_id), self._string(county_id), lat, lon)
+
+# -------- Build --------
+Row = Tuple[str, str, Optional[str], Optional[str], float, float]
+
+def build_zip_index(rows: Iterable[Row], path: Path = ZIP_INDEX_PATH) -> int:
+    """
+    Write (zip, state, city, county, lat, lon) rows to an index file.
+    The file is written to a temp path and renamed so concurrent readers never
+    see a partial index. Returns the number of records written.
+    """
+    string_ids: Dict[str, int] = {}
+    strings: List[bytes] = []
+
+    def intern(value: Optional[str]) -> int:
+        if not value:
+            return 0
+        if value not in string_ids:
+            strings.append(value.encode("utf-8"))
+            string_ids[value] = len(strings)
+        return string_ids[value]
+
+    records: Dict[int, bytes] = {}
+    for zip_code, state, city, county, lat, lon in rows:
+        z = str(zip_code).strip().zfill(5)
+        if not z.isdigit() or len(z) != 5 or not state or len(state) != 2:
+            continue
+        records[int(z)] = _RECORD.pack(int(z), state.encode("ascii"), intern(city), intern(county), lat, lon)
+
+    path = Path(path)
+    tmp = path.with_suffix(path.suffix + f".{os.getpid()}.tmp")
+    records_bytes = b"".join(records[z] for z in sorted(records))
+    strings_offset = _HEADER.size + len(records_bytes)
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(records), strings_offset))
+        f.write(records_bytes)
+        f.write(_U32.pack(len(strings)))
+        end = 0
+        f.write(_U32.pack(0))
+        for s in strings:
+            end += len(s)
+            f.write(_U32.pack(end))
+        f.write(b"".join(strings))
+    os.replace(tmp, path)
+    return len(records)
+
+def _pgeocode_rows() -> Iterable[Row]:
+    import pgeocode  # only needed at build time
+
+    df = pgeocode.Nominatim("us")._data_frame
+    for rec in df.itertuples(index=False):
+        city = rec.place_name if isinstance(rec.place_name, str) else None
+        county = rec.county_name if isinstance(rec.county_name, str) else None
+        state = rec.state_code if isinstance(rec.state_code, str) else None
+        if not state or rec.latitude != rec.latitude:  # skip rows without state or coordinates (NaN)
+            continue
+        yield rec.postal_code, state, city, county, float(rec.latitude), float(rec.longitude)
+
+def build_from_pgeocode(path: Path = ZIP_INDEX_PATH) -> int:
+    count = build_zip_index(_pgeocode_rows(), path)
+    logger.info("Built ZIP index with %d records at %s", count, path)
+    return count
+
+# -------- Shared instance --------
+_index: Optional[ZipIndex] = None
+_index_lock = threading.Lock()
+
+def get_zip_index() -> ZipIndex:
+    """Open the shared index, building it from pgeocode on first use if the file is missing."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                if not ZIP_INDEX_PATH.exists():
+                    build_from_pgeocode(ZIP_INDEX_PATH)
+                _index = ZipIndex(ZIP_INDEX_PATH)
+    return _index
+
+def lookup_zip(zip_code: str) -> Optional[ZipRecord]:
+    return get_zip_index().lookup(zip_code)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(f"Wrote {build_from_pgeocode()} ZIP codes to {ZIP_INDEX_PATH}")
@@ -0,0 +1,19 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from database.migrations import migrate
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    """
+    sqlite_db(*modules): a migrated SQLite database in tmp_path, patched in
+    as SessionLocal of every given module. Returns its session factory.
+    """
+    def use(*modules):
+        engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False})
+        migrate(engine)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        for module in modules:
+            monkeypatch.setattr(module, "SessionLocal", Session)
+        return Session
+    return use
@@ -0,0 +1,103 @@
+import asyncio
+from datetime import timedelta
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
+from repositories import barcode_repository
+from routers import scanner
+from services import barcode_cache
+from services.cache_service import LRUCache
+
+COKE = {"product_name": "Coca-Cola 500ml", "material": "plastic", "data_source": "Open Food Facts"}
+
+@pytest.fixture
+def upstream(sqlite_db, monkeypatch):
+    sqlite_db(barcode_cache)
+    monkeypatch.setattr(barcode_cache, "_memory", LRUCache(maxsize=8))
+    monkeypatch.setattr(barcode_cache, "_stats", dict.fromkeys(barcode_cache._stats, 0))
+    calls = []
+
+    async def fetch(barcode):
+        calls.append(barcode)
+        return dict(COKE)
+
+    monkeypatch.setattr(barcode_cache, "get_recycling_info_from_barcode", fetch)
+    return calls
+
+def _get(barcode, **kwargs):
+    return asyncio.run(barcode_cache.get_recycling_info(barcode, **kwargs))
+
+def test_normalize_barcode_to_gtin14():
+    assert barcode_cache.normalize_barcode("049000050103") == "00049000050103"
+    assert barcode_cache.normalize_barcode(" 0049000050103 ") == "00049000050103"
+    assert barcode_cache.normalize_barcode("9783-9813-05449") == "09783981305449"
+    assert barcode_cache.normalize_barcode("96385074") == "00000096385074"  # EAN-8
+    assert barcode_cache.normalize_barcode("https://example.com/qr") == "https://example.com/qr"
+
+def test_memory_then_database_tiers(upstream):
+    assert _get("049000050103") == COKE
+    # Same product as EAN-13, served from memory
+    assert _get("0049000050103") == COKE
+    # Another worker (empty memory) reads the shared table
+    barcode_cache._memory.clear()
+    assert _get("049000050103") == COKE
+    assert upstream == ["049000050103"]
+
+    stats = barcode_cache.get_barcode_cache_stats()
+    assert (stats["lookups"], stats["memory_hits"], stats["db_hits"], stats["misses"]) == (3, 1, 1, 1)
+    assert stats["hit_ratio"] == round(2 / 3, 4)
+    # Three product databases and Gemini per miss
+    assert (stats["est_upstream_calls"], stats["est_upstream_calls_saved"]) == (4, 8)
+
+def test_results_are_copies(upstream):
+    _get("049000050103")["places"] = ["somewhere"]
+    assert "places" not in _get("049000050103")
+
+def test_expired_and_unparsed_results_are_fetched_again(upstream, monkeypatch):
+    _get("049000050103")
+    later = barcode_cache._utcnow() + timedelta(hours=barcode_cache.BARCODE_CACHE_TTL_HOURS + 1)
+    monkeypatch.setattr(barcode_cache, "_utcnow", lambda: later)
+    _get("049000050103")
+    assert len(upstream) == 2
+
+    async def parse_error(code):
+        return {"product_name": "Unknown", "data_source": "Parse error"}
+
+    _get("5449000009067", fetch=parse_error)
+    assert barcode_cache.get_barcode_cache_stats()["memory"]["size"] == 1
+
+def test_guesses_made_during_a_database_outage_expire_quickly(upstream, monkeypatch):
+    async def outage(code):
+        upstream.append(code)
+        return {"product_name": "Soda bottle", "data_source": "Gemini Vision AI", "lookup_error": True}
+
+    _get("049000050103", fetch=outage)
+    _get("049000050103", fetch=outage)
+    assert len(upstream) == 1
+    later = barcode_cache._utcnow() + timedelta(minutes=barcode_cache.BARCODE_CACHE_ERROR_TTL_MINUTES + 1)
+    monkeypatch.setattr(barcode_cache, "_utcnow", lambda: later)
+    # Neither tier keeps it, so the next scan asks the databases again
+    assert _get("049000050103") == COKE
+    assert len(upstream) == 2
+
+def test_failed_cache_write_does_not_fail_the_scan(upstream, monkeypatch):
+    def locked(*args):
+        raise OperationalError("INSERT", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(barcode_repository, "save_result", locked)
+    assert _get("049000050103") == COKE
+    # Still served from memory
+    assert _get("049000050103") == COKE
+    assert len(upstream) == 1
+
+def test_scanbarcode_endpoint_uses_the_cache(upstream, monkeypatch):
+    monkeypatch.setattr(scanner, "find_recycling_places", lambda query, zip_code: [query])
+    app = FastAPI()
+    app.include_router(scanner.router, prefix="/api")
+    client = TestClient(app)
+    for _ in range(3):
+        body = client.post("/api/scanner/scanbarcode/?zip_code=95113&barcode=049000050103").json()
+        assert body == {**COKE, "places": ["recycling center for plastic"]}
+    assert len(upstream) == 1
+    assert client.get("/api/scanner/stats").json()["barcode_cache"]["est_upstream_calls_saved"] == 8
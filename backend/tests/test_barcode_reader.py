@@ -0,0 +1,48 @@
+from pathlib import Path
+import cv2
+import numpy as np
+from services import barcode_reader
+from services.barcode_reader import image_size, read_barcode, reduction_factor
+
+BARCODE_PNG = Path(__file__).resolve().parents[1] / "data" / "barcodes" / "test_bc.png"
+
+def _photo(width=4000, height=3000) -> bytes:
+    photo = np.full((height, width, 3), 128, np.uint8)
+    photo[1000:1900, 1500:2850] = cv2.resize(cv2.imread(str(BARCODE_PNG)), (1350, 900))
+    return cv2.imencode(".jpg", photo, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+
+def test_image_size_from_headers():
+    assert image_size(BARCODE_PNG.read_bytes()) == (900, 600)
+    assert image_size(_photo()) == (4000, 3000)
+    assert image_size(b"not an image") is None
+
+def test_reduction_factor_bounds_the_longest_side():
+    assert reduction_factor((900, 600)) == 1
+    assert reduction_factor((4000, 3000), max_side=1600) == 4
+    assert reduction_factor((3000, 2000), max_side=1600) == 2
+    assert reduction_factor(None) == 1
+
+def test_large_photo_is_decoded_reduced_and_found_on_the_pyramid():
+    read = read_barcode(_photo())
+    assert read["barcode"] == "9783981305449"
+    assert read["level"].startswith("level_")
+    assert read["jpeg"] is None
+    assert "decode_full" not in read["timings"]
+
+def test_full_resolution_fallback(monkeypatch):
+    detect = barcode_reader._detect
+    # Pretend the barcode only resolves at the original 4000x3000
+    monkeypatch.setattr(barcode_reader, "_detect", lambda img: detect(img) if img.shape[1] == 4000 else None)
+    read = read_barcode(_photo())
+    assert (read["barcode"], read["level"]) == ("9783981305449", "full")
+    assert barcode_reader.get_preprocess_stats()["levels"]["full"]["hits"] >= 1
+
+def test_gemini_gets_a_bounded_jpeg_when_no_barcode_is_found(monkeypatch):
+    monkeypatch.setattr(barcode_reader, "_detect", lambda img: None)
+    data = _photo()
+    read = read_barcode(data)
+    assert read["barcode"] is None and read["decoded"]
+    sent = cv2.imdecode(np.frombuffer(read["jpeg"], np.uint8), cv2.IMREAD_COLOR)
+    assert max(sent.shape[:2]) <= barcode_reader.GEMINI_IMAGE_MAX_SIDE
+    assert len(read["jpeg"]) <= barcode_reader.GEMINI_IMAGE_MAX_BYTES
+    assert read_barcode(b"not an image")["decoded"] is False
@@ -0,0 +1,113 @@
+import asyncio
+import os
+from pathlib import Path
+import pytest
+from scrapers import san_jose
+from scrapers.browser_pool import BrowserPool
+
+STUB_PAGE = Path(__file__).resolve().parents[1] / "mock_data" / "san_jose_311.html"
+
+class FakeContext:
+    async def close(self):
+        pass
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.closed = False
+        self.contexts = 0
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self, **options):
+        self.contexts += 1
+        return FakeContext()
+
+    async def close(self):
+        self.closed = True
+        self.connected = False
+
+def _fake_pool(**kwargs):
+    browsers = []
+
+    async def launch():
+        browsers.append(FakeBrowser())
+        return browsers[-1]
+
+    return BrowserPool(launch=launch, **kwargs), browsers
+
+def test_pool_reuses_browsers_and_recycles_after_max_uses():
+    pool, browsers = _fake_pool(size=1, max_uses=3)
+
+    async def main():
+        for _ in range(4):
+            async with pool.context():
+                pass
+
+    asyncio.run(main())
+    assert len(browsers) == 2
+    assert browsers[0].contexts == 3 and browsers[0].closed
+    assert pool.stats()["recycled"] == 1
+
+def test_pool_replaces_crashed_browsers():
+    pool, browsers = _fake_pool(size=1)
+
+    async def main():
+        with pytest.raises(RuntimeError):
+            async with pool.context():
+                browsers[0].connected = False
+                raise RuntimeError("Target closed")
+        async with pool.context():
+            pass
+
+    asyncio.run(main())
+    assert len(browsers) == 2
+    assert pool.stats()["crashed"] == 1
+
+def test_pool_caps_concurrency_and_reports_queue_wait():
+    pool, browsers = _fake_pool(size=2)
+    peak = 0
+
+    async def scrape():
+        nonlocal peak
+        async with pool.context():
+            peak = max(peak, pool.stats()["in_use"])
+            await asyncio.sleep(0.02)
+
+    async def main():
+        await asyncio.gather(*(scrape() for _ in range(6)))
+
+    asyncio.run(main())
+    stats = pool.stats()
+    assert peak == 2
+    assert len(browsers) == 2
+    assert stats["scrapes"] == 6 and stats["in_use"] == 0 and stats["idle"] == 2
+    assert stats["max_wait_ms"] >= 30
+
+@pytest.fixture(scope="session")
+def chromium():
+    # Checked only when a test asks for it, and without launching a browser
+    try:
+        from playwright.sync_api import sync_playwright
+        with sync_playwright() as p:
+            path = p.chromium.executable_path
+    except Exception as e:
+        pytest.skip(f"Playwright is not available: {e}")
+    if not os.path.exists(path):
+        pytest.skip("Chromium is not installed")
+
+def test_san_jose_scraper_against_stub_page(chromium, monkeypatch):
+    pool = BrowserPool(size=1)
+    monkeypatch.setattr(san_jose, "get_browser_pool", lambda: pool)
+
+    async def main():
+        try:
+            return await san_jose.get_san_jose_schedule("200 E Santa Clara St", url=STUB_PAGE.as_uri() + "?delay=50")
+        finally:
+            await pool.close()
+
+    schedule = asyncio.run(main())
+    assert schedule[0] == {"date": "2025-10-06", "type": "Garbage, Recycling"}
+    assert {"date": "2025-10-13", "type": "Yard waste, Garbage"} in schedule
+    assert pool.stats()["launched"] == 1
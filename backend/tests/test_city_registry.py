@@ -0,0 +1,63 @@
+import asyncio
+import pytest
+from scrapers import registry
+from scrapers.registry import CityAdapter, ScrapeFailedError
+
+def test_lookup_is_keyed_by_normalized_state_and_city():
+    adapter = registry.get_adapter("San Jose", "CA")
+    assert adapter is not None and adapter.name == "san_jose"
+    assert registry.get_adapter("  san  JOSÉ ", "ca") is adapter
+    # The state may be omitted when the city name is unambiguous
+    assert registry.get_adapter("San José") is adapter
+    assert registry.get_adapter("San Jose", "NV") is None
+    assert registry.get_adapter("Springfield", "CA") is None
+
+def test_adapter_bounds_concurrency_and_records_latency():
+    running = peak = 0
+
+    async def scrape(address):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return [{"date": "2999-01-01", "type": "Garbage"}]
+
+    adapter = CityAdapter("test", scrape, concurrency=2, timeout=5)
+
+    async def main():
+        return await asyncio.gather(*(adapter.fetch(f"{i} Main St") for i in range(6)))
+
+    assert all(asyncio.run(main()))
+    assert peak == 2
+    stats = adapter.stats()
+    assert stats["calls"] == 6 and stats["failures"] == 0 and stats["healthy"]
+    assert stats["latency_ms"]["p50"] >= 10
+
+def test_slow_and_failing_scrapers_become_unhealthy(monkeypatch):
+    async def slow(address):
+        await asyncio.sleep(1)
+
+    async def broken(address):
+        raise RuntimeError("layout changed")
+
+    slow_adapter = CityAdapter("slow", slow, timeout=0.01)
+    broken_adapter = CityAdapter("broken", broken)
+    for _ in range(registry.SCRAPER_UNHEALTHY_AFTER):
+        with pytest.raises(ScrapeFailedError):
+            asyncio.run(slow_adapter.fetch("1 Main St"))
+        with pytest.raises(ScrapeFailedError):
+            asyncio.run(broken_adapter.fetch("1 Main St"))
+    assert slow_adapter.stats()["timeouts"] == registry.SCRAPER_UNHEALTHY_AFTER
+    assert not slow_adapter.healthy
+    assert broken_adapter.stats()["last_error"] == "RuntimeError('layout changed')"
+    assert not broken_adapter.healthy
+
+def test_env_overrides_per_adapter(monkeypatch):
+    async def scrape(address):
+        return "https://example.com"
+
+    monkeypatch.setenv("SCRAPER_DEMO_TIMEOUT", "2.5")
+    monkeypatch.setenv("SCRAPER_DEMO_TTL_HOURS", "12")
+    adapter = CityAdapter("demo", scrape, timeout=30)
+    assert (adapter.timeout, adapter.ttl_hours) == (2.5, 12)
@@ -0,0 +1,90 @@
+from datetime import date, datetime, timedelta
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from routers import collection
+from services import schedule_service
+
+app = FastAPI()
+app.include_router(collection.router, prefix="/api")
+client = TestClient(app)
+
+YEAR = [{"date": (date(2025, 1, 6) + timedelta(weeks=i)).isoformat(), "type": "Garbage"} for i in range(52)]
+
+@pytest.fixture(autouse=True)
+def db(sqlite_db, monkeypatch):
+    sqlite_db(schedule_service)
+    monkeypatch.setattr(collection, "resolve_region", lambda z: ("San Jose", "CA"))
+    schedule_service.add_schedule({
+        "address": "200 E Santa Clara St", "city": "San Jose", "state": "CA", "zip_code": "95113",
+        "schedule": YEAR, "fetched_at": datetime.now(), "expires_at": datetime(2999, 1, 1),
+    })
+
+def _get(**params):
+    return client.get("/api/collection/schedule", params={"address": "200 E Santa Clara St", "zip_code": "95113", **params})
+
+def test_schedule_without_range_returns_every_event():
+    body = _get().json()
+    assert body["schedule"] == YEAR
+    assert body["stale"] is False
+
+def test_schedule_range_reads_only_matching_events(monkeypatch):
+    # The JSON blob must not be needed for a range read
+    monkeypatch.setattr(collection, "get_schedule_by_address_and_zip", None)
+    body = _get(**{"from": "2025-03-01", "limit": 2}).json()
+    assert body["schedule"] == [{"date": "2025-03-03", "type": "Garbage"}, {"date": "2025-03-10", "type": "Garbage"}]
+
+    body = _get(**{"from": "2025-12-01", "to": "2025-12-31"}).json()
+    assert [e["date"] for e in body["schedule"]] == ["2025-12-01", "2025-12-08", "2025-12-15", "2025-12-22", "2025-12-29"]
+
+def test_schedule_range_on_a_fresh_scrape(monkeypatch):
+    async def scrape(address, city, state=None):
+        return YEAR
+
+    monkeypatch.setattr(schedule_service, "scrape_schedule", scrape)
+    body = client.get("/api/collection/schedule", params={"address": "1 Main St", "zip_code": "95113", "limit": 1}).json()
+    assert body["schedule"] == YEAR[:1]
+
+def test_schedule_range_rejects_bad_parameters():
+    assert _get(limit=0).status_code == 422
+    assert _get(**{"from": "not-a-date"}).status_code == 422
+
+def test_not_found_is_cached_and_avoids_rescraping(monkeypatch):
+    scrapes = []
+
+    async def scrape(address, city, state=None):
+        scrapes.append(address)
+        return []
+
+    monkeypatch.setattr(schedule_service, "scrape_schedule", scrape)
+    avoided = schedule_service.get_negative_cache_stats()["scrapes_avoided"]
+    for _ in range(3):
+        body = client.get("/api/collection/schedule", params={"address": "999 Nowhere Ln", "zip_code": "95113"}).json()
+        assert body["status"] == "not_found" and body["schedule"] == []
+    assert len(scrapes) == 1
+    assert schedule_service.get_negative_cache_stats()["scrapes_avoided"] == avoided + 2
+
+def test_upstream_errors_are_cached_briefly_and_reported(monkeypatch):
+    from scrapers.registry import ScrapeFailedError
+    scrapes = []
+
+    async def scrape(address, city, state=None):
+        scrapes.append(address)
+        raise ScrapeFailedError("san_jose: timed out")
+
+    monkeypatch.setattr(schedule_service, "scrape_schedule", scrape)
+    params = {"address": "1 Timeout Ct", "zip_code": "95113"}
+    assert client.get("/api/collection/schedule", params=params).json()["status"] == "error"
+    assert client.get("/api/collection/schedule", params=params).json()["status"] == "error"
+    assert len(scrapes) == 1
+
+    # Once the short error TTL has passed the address is scraped again
+    later = schedule_service._utcnow() + timedelta(minutes=schedule_service.SCHEDULE_ERROR_TTL_MINUTES + 1)
+    monkeypatch.setattr(schedule_service, "_utcnow", lambda: later)
+
+    async def recovered(address, city, state=None):
+        return YEAR
+
+    monkeypatch.setattr(schedule_service, "scrape_schedule", recovered)
+    body = client.get("/api/collection/schedule", params=params).json()
+    assert body["status"] == "ok" and body["schedule"] == YEAR
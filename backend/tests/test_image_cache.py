@@ -0,0 +1,109 @@
+import random
+from datetime import datetime, timedelta
+import cv2
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from routers import scanner
+from services import image_cache, image_pool
+from services.barcode_reader import dhash
+from services.image_cache import MultiIndexHash, hamming
+from services.image_pool import ImagePool
+
+BOTTLE = {"product_name": "Water bottle", "material": "plastic", "data_source": "Gemini Vision AI"}
+
+def _photo(seed=0, size=(1200, 1600)):
+    noise = np.random.default_rng(seed).integers(0, 256, (size[0] // 40, size[1] // 40, 3), dtype=np.uint8)
+    return cv2.resize(noise, (size[1], size[0]), interpolation=cv2.INTER_CUBIC)
+
+@pytest.fixture
+def db(sqlite_db, monkeypatch):
+    sqlite_db(image_cache)
+    monkeypatch.setattr(image_cache, "_index", MultiIndexHash(image_cache.IMAGE_HASH_MAX_DISTANCE))
+    monkeypatch.setattr(image_cache, "_last_id", 0)
+    monkeypatch.setattr(image_cache, "_next_prune", datetime.min)
+    monkeypatch.setattr(image_cache, "_stats", dict.fromkeys(image_cache._stats, 0))
+
+def test_dhash_survives_reencoding_and_resizing():
+    photo = _photo()
+    reencoded = cv2.imdecode(cv2.imencode(".jpg", photo, [cv2.IMWRITE_JPEG_QUALITY, 60])[1], cv2.IMREAD_COLOR)
+    smaller = cv2.resize(photo, (400, 300), interpolation=cv2.INTER_AREA)
+    brighter = cv2.convertScaleAbs(photo, alpha=1.0, beta=20)
+    for variant in (reencoded, smaller, brighter):
+        assert hamming(dhash(photo), dhash(variant)) <= image_cache.IMAGE_HASH_MAX_DISTANCE
+    assert hamming(dhash(photo), dhash(_photo(seed=1))) > 3 * image_cache.IMAGE_HASH_MAX_DISTANCE
+
+def test_multi_index_matches_a_linear_scan():
+    rng = random.Random(0)
+    hashes = [rng.getrandbits(64) for _ in range(2000)]
+    index = MultiIndexHash(max_distance=6)
+    for h in hashes:
+        index.add(h, h)
+    for _ in range(300):
+        flips = rng.sample(range(64), rng.randrange(0, 9))
+        probe = rng.choice(hashes)
+        for bit in flips:
+            probe ^= 1 << bit
+        distance, nearest = min((hamming(probe, h), h) for h in hashes)
+        match, compared = index.nearest(probe)
+        if distance <= 6:
+            assert match[0] == distance
+        else:
+            assert match is None
+        assert compared < len(hashes)
+
+def test_similar_photos_hit_and_expired_entries_do_not(db, monkeypatch):
+    h = dhash(_photo())
+    assert image_cache.find_similar(h) is None
+    image_cache.store_result(h, BOTTLE)
+    assert image_cache.find_similar(h ^ 0b101) == BOTTLE
+    assert image_cache.find_similar(dhash(_photo(seed=1))) is None
+
+    # A worker starting fresh loads the stored rows
+    monkeypatch.setattr(image_cache, "_index", MultiIndexHash(image_cache.IMAGE_HASH_MAX_DISTANCE))
+    monkeypatch.setattr(image_cache, "_last_id", 0)
+    assert image_cache.find_similar(h) == BOTTLE
+
+    later = image_cache._utcnow() + timedelta(hours=image_cache.IMAGE_CACHE_TTL_HOURS + 1)
+    monkeypatch.setattr(image_cache, "_utcnow", lambda: later)
+    assert image_cache.find_similar(h) is None
+    stats = image_cache.get_image_cache_stats()
+    assert (stats["hits"], stats["gemini_calls_saved"], stats["stored"]) == (2, 2, 1)
+    assert stats["mean_hit_distance"] == 1.0
+    # The expired entry is gone from the index, not just skipped
+    assert (stats["entries"], stats["pruned"]) == (0, 1)
+
+def test_prune_rebuilds_the_index():
+    index = MultiIndexHash(max_distance=6)
+    for h in range(100):
+        index.add(h << 32, h)
+    assert index.prune(lambda value: value % 2 == 0) == 50
+    assert index.size == 50
+    assert index.nearest(4 << 32)[0] == (0, 4)
+    assert index.nearest(5 << 32)[0][1] != 5
+
+def test_upload_of_a_near_duplicate_skips_gemini(db, monkeypatch):
+    pool = ImagePool(workers=1, queue_depth=1)
+    monkeypatch.setattr(image_pool, "_pool", pool)
+    calls = []
+
+    def identify(image_bytes, barcode=None):
+        calls.append(len(image_bytes))
+        return dict(BOTTLE)
+
+    monkeypatch.setattr(scanner, "identify_product_with_gemini", identify)
+    monkeypatch.setattr(scanner, "find_recycling_places", lambda query, zip_code: [])
+    app = FastAPI()
+    app.include_router(scanner.router, prefix="/api")
+    client = TestClient(app)
+
+    photo = _photo()
+    first = cv2.imencode(".jpg", photo, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+    second = cv2.imencode(".png", cv2.resize(photo, (800, 600)))[1].tobytes()
+    for data, name in ((first, "a.jpg"), (second, "b.png")):
+        resp = client.post("/api/scanner/uploadfile/?zip_code=95113", files={"file": (name, data, "image/jpeg")})
+        assert resp.json() == {**BOTTLE, "places": []}
+    assert len(calls) == 1
+    assert "image_cache" in resp.headers["Server-Timing"] and "gemini" not in resp.headers["Server-Timing"]
+    pool.close()
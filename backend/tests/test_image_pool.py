@@ -0,0 +1,94 @@
+import asyncio
+import threading
+import time
+from pathlib import Path
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from routers import scanner
+from services import image_pool
+from services.image_pool import ImagePool, ImagePoolBusyError
+
+BARCODE_PNG = Path(__file__).resolve().parents[1] / "data" / "barcodes" / "test_bc.png"
+
+app = FastAPI()
+app.include_router(scanner.router, prefix="/api")
+client = TestClient(app)
+
+@pytest.fixture(autouse=True)
+def pool(monkeypatch):
+    pool = ImagePool(workers=1, queue_depth=1)
+    monkeypatch.setattr(image_pool, "_pool", pool)
+    yield pool
+    pool.close()
+
+def test_jobs_run_off_the_event_loop(pool):
+    release = threading.Event()
+
+    def blocking():
+        release.wait(1)
+        return "done"
+
+    async def main():
+        job = asyncio.ensure_future(pool.run(blocking))
+        # The loop keeps ticking while the job blocks its worker
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        ticked = time.perf_counter() - started
+        release.set()
+        return ticked, await job
+
+    ticked, result = asyncio.run(main())
+    assert result == "done"
+    assert ticked < 0.5
+
+def test_saturated_pool_rejects_new_jobs(pool):
+    release = threading.Event()
+
+    async def main():
+        jobs = [asyncio.ensure_future(pool.run(release.wait, 1)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(ImagePoolBusyError):
+            await pool.run(release.wait, 1)
+        release.set()
+        await asyncio.gather(*jobs)
+
+    asyncio.run(main())
+    stats = pool.stats()
+    assert (stats["completed"], stats["rejected"], stats["pending"]) == (2, 1, 0)
+    assert stats["stages_ms"]["queue"]["count"] == 2
+
+def test_cancelled_caller_keeps_its_slot_until_the_worker_finishes(pool):
+    release = threading.Event()
+
+    async def main():
+        job = asyncio.ensure_future(pool.run(release.wait, 1))
+        await asyncio.sleep(0.01)
+        job.cancel()  # e.g. the client disconnected
+        await asyncio.sleep(0.01)
+        # The worker thread is still busy with it
+        assert pool.stats()["pending"] == 1
+        release.set()
+        for _ in range(100):
+            if pool.stats()["pending"] == 0:
+                break
+            await asyncio.sleep(0.01)
+
+    asyncio.run(main())
+    assert pool.stats()["pending"] == 0
+
+def test_upload_detects_barcode_and_reports_timings(monkeypatch):
+    async def lookup(code):
+        return {"product_name": code}
+
+    monkeypatch.setattr(scanner, "get_recycling_info", lookup)
+    resp = client.post("/api/scanner/uploadfile/?zip_code=95113", files={"file": ("bc.png", BARCODE_PNG.read_bytes(), "image/png")})
+    assert resp.json() == {"product_name": "9783981305449"}
+    assert [t.split(";")[0] for t in resp.headers["Server-Timing"].split(", ")] == ["decode", "detect", "lookup"]
+    assert set(client.get("/api/scanner/stats").json()["stages_ms"]) == {"queue", "decode", "detect", "lookup"}
+
+def test_upload_returns_503_when_saturated(monkeypatch, pool):
+    monkeypatch.setattr(pool, "_pending", pool.workers + pool.queue_depth)
+    resp = client.post("/api/scanner/uploadfile/?zip_code=95113", files={"file": ("bc.png", b"...", "image/png")})
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "1"
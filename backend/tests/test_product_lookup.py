@@ -0,0 +1,102 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from scrapers import http_client
+from services import gemini_scanner_service
+
+def _open_facts(name):
+    return {"status": 1, "product": {"product_name": name, "packaging": "PET bottle"}} if name else {"status": 0}
+
+class ProductDbStub(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(self.path)
+        time.sleep(server.delay)
+        data = json.dumps(server.body).encode() if server.body is not None else b"not json"
+        self.send_response(server.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def databases(monkeypatch):
+    servers = {}
+    for name, setting in (("off", "OPEN_FOOD_FACTS_URL"), ("opf", "OPEN_PRODUCTS_FACTS_URL"), ("upc", "UPCITEMDB_URL")):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), ProductDbStub)
+        server.daemon_threads = True
+        server.requests, server.delay, server.status, server.body = [], 0, 200, {}
+        threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+        monkeypatch.setattr(gemini_scanner_service, setting, f"http://127.0.0.1:{server.server_port}")
+        servers[name] = server
+    yield servers
+    for server in servers.values():
+        server.shutdown()
+
+def _lookup(barcode="5449000000996"):
+    async def main():
+        started = time.perf_counter()
+        try:
+            return await gemini_scanner_service.lookup_barcode_info(barcode), time.perf_counter() - started
+        finally:
+            await http_client.close_http_clients()
+
+    return asyncio.run(main())
+
+def test_highest_priority_hit_wins_even_when_slower(databases):
+    databases["off"].body, databases["off"].delay = _open_facts("Coca-Cola"), 0.2
+    databases["opf"].body = _open_facts("Coca-Cola (non-food)")
+    databases["upc"].body = {"items": [{"title": "Coke 500ml", "brand": "Coca-Cola"}]}
+    result, _ = _lookup()
+    assert (result["product_name"], result["source"]) == ("Coca-Cola", "Open Food Facts")
+    assert databases["off"].requests == ["/api/v0/product/5449000000996.json"]
+    assert databases["upc"].requests == ["/prod/trial/lookup?upc=5449000000996"]
+
+def test_databases_are_queried_concurrently(databases):
+    for server in databases.values():
+        server.delay = 0.3
+    databases["off"].body = _open_facts(None)
+    databases["opf"].body = _open_facts("")  # found, but no name
+    databases["upc"].body = {"items": [{"title": "Phone charger", "brand": "Acme", "images": ["https://img"]}]}
+    result, elapsed = _lookup()
+    assert (result["product_name"], result["source"], result["image_url"]) == ("Phone charger", "UPC Item DB", "https://img")
+    # One after another this would take 0.9 s
+    assert elapsed < 0.6
+
+def test_lower_priority_lookups_are_cancelled_after_a_hit(databases):
+    databases["off"].body = _open_facts("Coca-Cola")
+    databases["upc"].delay = 2
+    result, elapsed = _lookup()
+    assert result["source"] == "Open Food Facts"
+    assert elapsed < 1
+
+def test_errors_and_timeouts_are_reported_when_nothing_is_found(databases, monkeypatch):
+    monkeypatch.setattr(gemini_scanner_service, "BARCODE_LOOKUP_TIMEOUT", 0.2)
+    databases["off"].status = 500
+    databases["opf"].body = None  # invalid JSON
+    databases["upc"].delay = 1
+    result, elapsed = _lookup()
+    assert result == {"found": False, "error": True}
+    assert elapsed < 0.8
+
+def test_misses_everywhere_are_not_errors(databases):
+    databases["off"].body = _open_facts(None)
+    databases["opf"].status, databases["opf"].body = 404, {"status": 0}
+    databases["upc"].body = {"items": []}
+    result, _ = _lookup()
+    assert result == {"found": False}
+
+def test_malformed_payload_from_one_database_does_not_abort_the_lookup(databases):
+    databases["off"].body = ["not", "a", "product"]
+    databases["opf"].body = {"status": 1, "product": None}
+    databases["upc"].body = {"items": [{"title": "Coke 500ml", "brand": "Coca-Cola"}]}
+    result, _ = _lookup()
+    assert (result["product_name"], result["source"]) == ("Coke 500ml", "UPC Item DB")
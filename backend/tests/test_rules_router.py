@@ -0,0 +1,106 @@
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from routers import rules
+from services import rules_service
+from services.rules_service import RegionInfo
+
+app = FastAPI()
+app.include_router(rules.router, prefix="/api")
+client = TestClient(app)
+
+REGIONS = {"95112": ("CA", "San Jose"), "97201": ("OR", "Portland"), "29201": ("SC", "Columbia")}
+
+def _resolve_region(zip_code):
+    if zip_code not in REGIONS:
+        return None
+    state, city = REGIONS[zip_code]
+    return RegionInfo(zip_code, state, city)
+
+def setup_function():
+    rules.rules_response_cache.clear()
+
+def test_get_rules_by_zip_is_served_from_cache(monkeypatch):
+    monkeypatch.setattr(rules_service, "resolve_region", _resolve_region)
+    first = client.get("/api/rules/95112")
+    assert first.status_code == 200
+    assert first.json()["match_name"] == "CA"
+
+    hits = rules.rules_response_cache.hits
+    second = client.get("/api/rules/95112")
+    assert second.content == first.content
+    assert rules.rules_response_cache.hits == hits + 1
+
+def test_get_rules_by_zip_not_found(monkeypatch):
+    monkeypatch.setattr(rules_service, "resolve_region", _resolve_region)
+    response = client.get("/api/rules/29201")
+    assert response.status_code == 404
+    assert response.json()["detail"]["payload"]["summary"] == "No baseline rules for state SC."
+
+def test_reload_invalidates_cache(monkeypatch):
+    monkeypatch.setattr(rules_service, "resolve_region", _resolve_region)
+    client.get("/api/rules/97201")
+    rules_service.reload_rules_table()
+    misses = rules.rules_response_cache.misses
+    assert client.get("/api/rules/97201").status_code == 200
+    assert rules.rules_response_cache.misses == misses + 1
+
+def test_batch_streams_ndjson_in_input_order(monkeypatch):
+    monkeypatch.setattr(rules_service, "resolve_region", _resolve_region)
+    response = client.post("/api/rules/batch", json={"zips": ["97201", "bad", "95112", "29201", "97201"]})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["zip"] for line in lines] == ["97201", "bad", "95112", "29201", "97201"]
+    assert lines[0] == json.loads(rules._dumps(rules_service.extract_rules_for_zip("97201")))
+    assert lines[1]["error"] == "Invalid or unknown ZIP."
+    assert lines[2]["match_name"] == "CA"
+    assert lines[3]["error"] == "No baseline rules for state SC."
+
+def test_batch_rejects_oversized_requests():
+    response = client.post("/api/rules/batch", json={"zips": ["95112"] * (rules.RULES_BATCH_MAX + 1)})
+    assert response.status_code == 422
+
+def test_get_rules_by_zip_sets_cache_headers(monkeypatch):
+    monkeypatch.setattr(rules_service, "resolve_region", _resolve_region)
+    response = client.get("/api/rules/95112")
+    etag = response.headers["etag"]
+    assert etag.startswith('"') and etag.endswith('"')
+    assert "max-age=" in response.headers["cache-control"]
+    assert response.headers["last-modified"] == "Mon, 15 Sep 2025 00:00:00 GMT"
+    assert client.get("/api/rules/97201").headers["etag"] != etag
+
+def test_if_none_match_returns_304_without_rendering(monkeypatch):
+    monkeypatch.setattr(rules_service, "resolve_region", _resolve_region)
+    etag = client.get("/api/rules/95112").headers["etag"]
+
+    # Served from the response cache
+    cached = client.get("/api/rules/95112", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+    assert cached.content == b""
+
+    # Not cached: validators alone decide, the payload is never built
+    rules.rules_response_cache.clear()
+    monkeypatch.setattr(rules, "extract_rules_for_zip", lambda *a: pytest.fail("payload was rebuilt"))
+    assert client.get("/api/rules/95112", headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+
+def test_if_none_match_with_stale_etag_returns_body(monkeypatch):
+    monkeypatch.setattr(rules_service, "resolve_region", _resolve_region)
+    response = client.get("/api/rules/95112", headers={"If-None-Match": '"stale"'})
+    assert response.status_code == 200
+    assert response.json()["zip"] == "95112"
+
+def test_lookup_item(monkeypatch):
+    monkeypatch.setattr(rules_service, "resolve_region", _resolve_region)
+    response = client.get("/api/rules/95112/lookup", params={"item": "AA batteries"})
+    assert response.status_code == 200
+    best = response.json()["matches"][0]
+    assert best["category"] == "household_batteries"
+    assert best["bin"] == "HHW / Special Collection"
+
+    assert client.get("/api/rules/95112/lookup", params={"item": "plastic bags"}).json()["matches"][0]["category"] == "plastic_bags_and_film"
+    assert client.get("/api/rules/95112/lookup", params={"item": "xyzzy"}).json()["matches"] == []
+    assert client.get("/api/rules/29201/lookup", params={"item": "glass"}).status_code == 404
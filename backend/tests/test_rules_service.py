@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import pytest
+from services import rules_service
+from services.baseline_snapshot import build_snapshot
+from services.item_index import build_item_index
+from services.rules_service import RegionInfo, load_rules_table, extract_rules_for_zip
+
+def _write_baseline(dir, state, rules):
+    (dir / f"{state}.json").write_text(json.dumps({"state": state, "rules": rules}), encoding="utf-8")
+
+def test_load_rules_table_discovers_all_baselines():
+    table = load_rules_table()
+    files = sorted(p.stem for p in rules_service.BASELINES_DIR.glob("*.json"))
+    assert sorted(table.baselines) == files
+    assert table.rulesets["CA"]["summary"] == "Applied California statewide baseline."
+    assert table.load_ms > 0
+    assert table.table_bytes > 0
+
+def test_load_rules_table_skips_invalid_files(tmp_path):
+    _write_baseline(tmp_path, "CA", {"plastics": {"bin": "Blue"}})
+    _write_baseline(tmp_path, "OR", {})
+    (tmp_path / "TX.json").write_text("{not json", encoding="utf-8")
+    table = load_rules_table(tmp_path)
+    assert list(table.baselines) == ["CA"]
+    assert set(table.errors) == {"OR", "TX"}
+
+def test_extract_rules_for_zip(monkeypatch):
+    monkeypatch.setattr(rules_service, "resolve_region", lambda z: RegionInfo(z, "OR", "Portland"))
+    result = extract_rules_for_zip("97201")
+    assert result["match_level"] == "state"
+    assert result["match_name"] == "OR"
+    assert result["rules"]["plastics"]
+
+def test_extract_rules_for_zip_without_baseline(monkeypatch):
+    monkeypatch.setattr(rules_service, "resolve_region", lambda z: RegionInfo(z, "SC", "Columbia"))
+    result = extract_rules_for_zip("29201")
+    assert result["rules"] is None
+    assert result["summary"] == "No baseline rules for state SC."
+
+def _use_table_from(monkeypatch, dir):
+    monkeypatch.setattr(rules_service, "_table", None)
+    monkeypatch.setattr(rules_service, "BASELINES_DIR", dir)
+    monkeypatch.setattr(rules_service, "_reload_stats", dict(rules_service._reload_stats, failures=0, reloads=0))
+    return rules_service.get_rules_table()
+
+def _touch(path, ns):
+    os.utime(path, ns=(ns, ns))
+
+def test_reload_changed_baselines_swaps_only_changed_files(tmp_path, monkeypatch):
+    _write_baseline(tmp_path, "CA", {"plastics": {"bin": "Blue"}})
+    _write_baseline(tmp_path, "OR", {"plastics": {"bin": "Blue"}})
+    old = _use_table_from(monkeypatch, tmp_path)
+    assert rules_service.reload_changed_baselines() == 0
+
+    _write_baseline(tmp_path, "OR", {"plastics": {"bin": "Yellow"}})
+    _touch(tmp_path / "OR.json", 10**18)
+    assert rules_service.reload_changed_baselines() == 1
+
+    new = rules_service.get_rules_table()
+    assert new.version > old.version
+    assert new.rulesets["OR"]["rules"]["plastics"]["bin"] == "Yellow"
+    assert new.baselines["CA"] is old.baselines["CA"]
+    assert old.rulesets["OR"]["rules"]["plastics"]["bin"] == "Blue"
+
+def test_reload_keeps_last_good_baseline_on_failure(tmp_path, monkeypatch):
+    _write_baseline(tmp_path, "CA", {"plastics": {"bin": "Blue"}})
+    _use_table_from(monkeypatch, tmp_path)
+
+    (tmp_path / "CA.json").write_text("{broken", encoding="utf-8")
+    _touch(tmp_path / "CA.json", 10**18)
+    assert rules_service.reload_changed_baselines() == 0
+
+    table = rules_service.get_rules_table()
+    assert table.rulesets["CA"]["rules"]["plastics"]["bin"] == "Blue"
+    assert "CA" in table.errors
+    assert rules_service.get_rules_table_stats()["reload"]["failures"] == 1
+
+def _write_overlay(dir, overlay_id, **data):
+    dir.mkdir(exist_ok=True)
+    (dir / f"{overlay_id}.json").write_text(json.dumps(data), encoding="utf-8")
+
+def _overlay_table(tmp_path):
+    baselines, overlays = tmp_path / "baselines", tmp_path / "overlays"
+    baselines.mkdir()
+    _write_baseline(baselines, "CA", {"plastics": {"bin": "Blue", "notes": "state"}, "organics": {"bin": "Green"}})
+    _write_overlay(overlays, "santa_clara_county", level="county", state="CA", name="Santa Clara County",
+                   rules={"organics": {"notes": "county"}})
+    _write_overlay(overlays, "san_jose", level="city", state="CA", name="San Jose",
+                   rules={"plastics": {"notes": "city"}})
+    _write_overlay(overlays, "downtown", level="zip_prefix", state="CA", name="Downtown", zip_prefixes=["9511"],
+                   rules={"plastics": {"bin": "Gray"}})
+    _write_overlay(overlays, "95112", level="zip", state="CA", zips=["95112"],
+                   summary="Applied 95112 pilot.", rules={"e_waste": {"bin": "Curbside"}})
+    return load_rules_table(baselines, overlays)
+
+def test_overlays_apply_from_least_to_most_specific(tmp_path):
+    table = _overlay_table(tmp_path)
+    region = RegionInfo("95112", "CA", "San José", "Santa Clara")
+    result = rules_service._rules_payload(region, rules_service._ruleset_for_region(table, region))
+
+    assert result["match_level"] == "zip"
+    assert result["match_name"] == "95112"
+    assert result["summary"] == ("Applied California statewide baseline. Applied Santa Clara County county rules. "
+                                 "Applied San Jose city rules. Applied Downtown zip prefix rules. Applied 95112 pilot.")
+    assert result["rules"]["plastics"] == {"bin": "Gray", "notes": "city"}
+    assert result["rules"]["organics"] == {"bin": "Green", "notes": "county"}
+    assert result["rules"]["e_waste"] == {"bin": "Curbside"}
+    # The shared state rule set is untouched
+    assert table.rulesets["CA"]["rules"]["plastics"] == {"bin": "Blue", "notes": "state"}
+
+def test_overlay_chains_are_flattened_once(tmp_path):
+    table = _overlay_table(tmp_path)
+    city = RegionInfo("95126", "CA", "San Jose", "Santa Clara")
+    first = rules_service._ruleset_for_region(table, city)
+    assert first["match_level"] == "city"
+    assert rules_service._ruleset_for_region(table, RegionInfo("95125", "CA", "san jose", "Santa Clara")) is first
+
+    prefix = rules_service._ruleset_for_region(table, RegionInfo("95113", "CA", "Santa Clara", None))
+    assert prefix["match_level"] == "zip_prefix"
+    assert rules_service._ruleset_for_region(table, RegionInfo("90001", "CA", "Los Angeles", "Los Angeles")) is table.rulesets["CA"]
+
+def test_merged_rule_sets_share_untouched_categories(tmp_path):
+    table = _overlay_table(tmp_path)
+    state = table.rulesets["CA"]
+    city = rules_service._ruleset_for_region(table, RegionInfo("95126", "CA", "San Jose", None))
+
+    assert city["rules"]["organics"] is state["rules"]["organics"]
+    assert city["rules"]["plastics"] is not state["rules"]["plastics"]
+    assert state["rules"]["plastics"]["notes"] == "state"
+
+def test_rule_sets_are_read_only(monkeypatch):
+    monkeypatch.setattr(rules_service, "resolve_region", lambda z: RegionInfo(z, "CA", "San Jose"))
+    result = extract_rules_for_zip("95112")
+    with pytest.raises(TypeError):
+        result["rules"]["plastics"]["bin"] = "Trash"
+    with pytest.raises(TypeError):
+        result["rules"]["new_category"] = {}
+
+def _build_snapshot(baselines_dir, path):
+    entries = {}
+    for code, (file, signature) in rules_service._scan_baselines(baselines_dir).items():
+        raw = file.read_bytes()
+        data = json.loads(raw)
+        entries[code] = (data, build_item_index(data["rules"]), hashlib.sha256(raw).hexdigest(), signature)
+    build_snapshot(entries, path)
+
+def test_snapshot_loads_the_same_table_as_json(tmp_path):
+    snapshot = tmp_path / "baselines.snapshot"
+    _build_snapshot(rules_service.BASELINES_DIR, snapshot)
+    from_json = load_rules_table(rules_service.BASELINES_DIR, snapshot_path="")
+    from_snapshot = load_rules_table(rules_service.BASELINES_DIR, snapshot_path=str(snapshot))
+
+    assert from_json.source == "json"
+    assert from_snapshot.source == "snapshot"
+    assert from_snapshot.rulesets.keys() == from_json.rulesets.keys()
+    for code, ruleset in from_json.rulesets.items():
+        assert dict(from_snapshot.rulesets[code]) == dict(ruleset)
+
+def test_snapshot_entries_for_edited_baselines_are_ignored(tmp_path):
+    _write_baseline(tmp_path, "CA", {"plastics": {"bin": "Blue"}})
+    _write_baseline(tmp_path, "OR", {"plastics": {"bin": "Blue"}})
+    snapshot = tmp_path / "baselines.snapshot"
+    _build_snapshot(tmp_path, snapshot)
+
+    _write_baseline(tmp_path, "OR", {"plastics": {"bin": "Yellow"}})
+    _touch(tmp_path / "OR.json", 10**18)
+    table = load_rules_table(tmp_path, snapshot_path=str(snapshot))
+    assert table.source == "mixed"
+    assert table.rulesets["OR"]["rules"]["plastics"]["bin"] == "Yellow"
+    assert table.rulesets["CA"]["rules"]["plastics"]["bin"] == "Blue"
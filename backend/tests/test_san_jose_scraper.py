@@ -0,0 +1,13 @@
+from datetime import datetime
+from scrapers.san_jose import parse_calendar
+
+def test_parse_calendar_uses_month_header():
+    cells = ["1", "6\nGarbage, Recycling", "13\nYard waste\nGarbage", "20\nHoliday", "31"]
+    assert parse_calendar("October 2025", cells) == [
+        {"date": "2025-10-06", "type": "Garbage, Recycling"},
+        {"date": "2025-10-13", "type": "Yard waste, Garbage"},
+    ]
+
+def test_parse_calendar_falls_back_to_current_month_and_skips_invalid_days():
+    cells = ["30\nRecycling", "31\nRecycling"]
+    assert parse_calendar("", cells, today=datetime(2025, 11, 2)) == [{"date": "2025-11-30", "type": "Recycling"}]
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import threading
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pytest
+from database.models import Schedule
+from scrapers import http_client, santa_clara
+from services import recollect_cache, schedule_service
+from services.single_flight import SingleFlight
+
+NEXT_WEEK = date.today() + timedelta(days=7)
+EVENTS = [{"date": NEXT_WEEK.isoformat(), "type": "Garbage"}, {"date": (NEXT_WEEK + timedelta(days=7)).isoformat(), "type": "recycling"}]
+
+class RecollectStub(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    connections = 0
+    requests = []
+    # Address -> place; addresses not listed get a place of their own
+    places = {"150 Alviso St": "PLACE-1", "152 Alviso St": "PLACE-1"}
+    status = 200
+
+    def setup(self):
+        super().setup()
+        type(self).connections += 1
+
+    def do_GET(self):
+        type(self).requests.append(self.path.split("?")[0])
+        if "address-suggest" in self.path:
+            q = parse_qs(urlparse(self.path).query)["q"][0]
+            body = [{"place_id": self.places.get(q, "PLACE-" + q), "name": q}]
+        else:
+            body = {"events": [{"day": EVENTS[0]["date"], "name": "Garbage"}, {"day": EVENTS[1]["date"], "flags": [{"icon": "recycling"}]}]}
+        data = json.dumps(body).encode()
+        self.send_response(self.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture(autouse=True)
+def db(sqlite_db, monkeypatch):
+    Session = sqlite_db(recollect_cache, schedule_service)
+    monkeypatch.setattr(schedule_service, "schedule_flights", SingleFlight())
+    return Session
+
+@pytest.fixture
+def recollect(monkeypatch):
+    RecollectStub.connections = 0
+    RecollectStub.requests = []
+    RecollectStub.status = 200
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RecollectStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(santa_clara, "API_BASE_URL", f"http://127.0.0.1:{server.server_port}/api")
+    yield RecollectStub
+    server.shutdown()
+
+def _lookup(*addresses):
+    async def main():
+        try:
+            return [await santa_clara.fetch_calendar(a) for a in addresses]
+        finally:
+            await http_client.close_http_clients()
+
+    return asyncio.run(main())
+
+def test_recollect_lookups_reuse_one_pooled_connection(recollect):
+    first, second = _lookup("150 Alviso St", "1 Other Rd")
+    assert first == second == EVENTS
+    assert len(recollect.requests) == 4
+    assert recollect.connections == 1
+
+def test_place_cache_skips_calendar_for_a_known_route(recollect):
+    first, second = _lookup("150 Alviso St", "152 Alviso St")
+    assert first == second == EVENTS
+    # The second address only needs the suggest call
+    assert [p.rsplit("/", 1)[-1] for p in recollect.requests] == ["address-suggest", "events", "address-suggest"]
+
+    # A known address (in any spelling) costs nothing
+    assert _lookup("150 ALVISO STREET") == [EVENTS]
+    assert len(recollect.requests) == 3
+
+def test_expired_entries_are_refetched(recollect, monkeypatch):
+    _lookup("150 Alviso St")
+    later = recollect_cache._utcnow() + timedelta(hours=recollect_cache.RECOLLECT_CALENDAR_TTL_HOURS + 1)
+    monkeypatch.setattr(recollect_cache, "_utcnow", lambda: later)
+    assert _lookup("150 Alviso St") == [EVENTS]
+    # The place mapping outlives the calendar
+    assert [p.rsplit("/", 1)[-1] for p in recollect.requests] == ["address-suggest", "events", "events"]
+
+def test_calendar_whose_events_have_all_passed_is_refetched(recollect):
+    _lookup("150 Alviso St")
+    recollect_cache.put_calendar("PLACE-1", [{"date": "2000-01-03", "type": "Garbage"}])
+    assert _lookup("150 Alviso St") == [EVENTS]
+    assert [p.rsplit("/", 1)[-1] for p in recollect.requests] == ["address-suggest", "events", "events"]
+
+def test_upstream_error_is_stored_as_error_not_as_not_found(recollect, db):
+    recollect.status = 500
+
+    async def main():
+        try:
+            with pytest.raises(schedule_service.ScheduleUnavailableError) as exc:
+                await schedule_service.fetch_and_store_schedule("150 Alviso St", "95050", "Santa Clara", "CA")
+            return exc.value
+        finally:
+            await http_client.close_http_clients()
+
+    assert asyncio.run(main()).status == schedule_service.STATUS_ERROR
+    with db() as session:
+        row = session.query(Schedule).one()
+    assert row.status == schedule_service.STATUS_ERROR and row.schedule is None
+    ttl = row.expires_at - row.fetched_at
+    assert ttl == timedelta(minutes=schedule_service.SCHEDULE_ERROR_TTL_MINUTES)
+    # Nothing was cached from the failed calls
+    assert recollect_cache.get_place_id(santa_clara.AREA_ID, "150 Alviso St") is None
+
+def test_clients_are_shared_per_origin():
+    async def main():
+        a = http_client.get_http_client("https://api.recollect.net/api/areas")
+        b = http_client.get_http_client("https://api.recollect.net/api/places")
+        c = http_client.get_http_client("https://example.com/")
+        assert a is b and a is not c
+        await http_client.close_http_clients()
+        assert a.is_closed and http_client.get_http_client("https://api.recollect.net") is not a
+        await http_client.close_http_clients()
+
+    asyncio.run(main())
+
+def test_per_host_limits(monkeypatch):
+    monkeypatch.setattr(http_client, "_limits_by_host", http_client._host_limits("api.recollect.net=20, bad, x=y"))
+    assert http_client.limits_for("API.recollect.net").max_connections == 20
+    assert http_client.limits_for("example.com").max_connections == http_client.HTTP_MAX_CONNECTIONS_PER_HOST
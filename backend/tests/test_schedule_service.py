@@ -0,0 +1,292 @@
+import asyncio
+import multiprocessing
+import shutil
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from database.migrations import migrate
+from database.models import Base, Schedule
+from repositories import schedule_repository
+from services import schedule_service
+from services.address_normalizer import normalize_address
+from services.single_flight import SingleFlight
+
+def test_single_flight_runs_concurrent_calls_once():
+    flights = SingleFlight()
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(*(flights.do("key", work) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["result"] * 5
+    assert len(runs) == 1
+    assert flights.stats() == {"in_flight": 0, "calls": 5, "executions": 1, "shared": 1, "deduplicated": 4}
+
+def test_single_flight_shares_exceptions_and_forgets_failed_flights():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0)
+        raise RuntimeError("boom")
+
+    async def ok():
+        return "ok"
+
+    async def main():
+        results = await asyncio.gather(flights.do("key", fail), flights.do("key", fail), return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert await flights.do("key", ok) == "ok"
+
+    asyncio.run(main())
+    assert flights.executions == 2
+
+def test_single_flight_survives_a_cancelled_caller():
+    flights = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        return "done"
+
+    async def main():
+        leader = asyncio.ensure_future(flights.do("key", work))
+        follower = asyncio.ensure_future(flights.do("key", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(main()) == "done"
+
+def test_concurrent_misses_scrape_and_store_once(monkeypatch):
+    scrapes, stored = [], []
+
+    async def scrape(address, city, state=None):
+        scrapes.append(address)
+        await asyncio.sleep(0.01)
+        return [{"date": "2025-01-01"}]
+
+    monkeypatch.setattr(schedule_service, "schedule_flights", SingleFlight())
+    monkeypatch.setattr(schedule_service, "scrape_schedule", scrape)
+    monkeypatch.setattr(schedule_service, "get_schedule_by_address_and_zip", lambda a, z: None)
+    monkeypatch.setattr(schedule_service, "add_schedule", stored.append)
+
+    async def main():
+        return await asyncio.gather(
+            schedule_service.fetch_and_store_schedule("200 E Santa Clara St", "95113", "San Jose", "CA"),
+            schedule_service.fetch_and_store_schedule("200 e santa clara st.", "95113", "San Jose", "CA"),
+            schedule_service.fetch_and_store_schedule("200  E Santa Clara St", " 95113", "San Jose", "CA"),
+        )
+
+    assert asyncio.run(main()) == [[{"date": "2025-01-01"}]] * 3
+    assert len(scrapes) == 1
+    assert len(stored) == 1
+
+def test_unsupported_city():
+    with pytest.raises(schedule_service.UnsupportedCityError):
+        asyncio.run(schedule_service.scrape_schedule("1 Main St", "Springfield"))
+
+def test_scrape_uses_the_city_adapter_and_its_ttl():
+    url = asyncio.run(schedule_service.scrape_schedule("1 Main St", "cupertino", "CA"))
+    assert url.endswith("/cupertino/collection-calendar/")
+    assert schedule_service.result_ttl_hours("Cupertino", "CA") == 720
+    assert schedule_service.result_ttl_hours("Springfield", "IL") == schedule_service.SCHEDULE_TTL_HOURS
+
+@pytest.fixture
+def db(sqlite_db, monkeypatch):
+    Session = sqlite_db(schedule_service)
+    monkeypatch.setattr(schedule_service, "schedule_flights", SingleFlight())
+    return Session
+
+def _row(Session, **fields):
+    with Session() as session:
+        data = {"address": "1 Main St", "city": "San Jose", "state": "CA", "zip_code": "95113", **fields}
+        row = schedule_repository.create_schedule(session, {**data, "address_key": normalize_address(data["address"])})
+        return row.id
+
+def _get(Session, row_id):
+    with Session() as session:
+        return session.get(Schedule, row_id)
+
+def test_migrate_adds_new_columns_to_existing_tables(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE schedules (id INTEGER PRIMARY KEY, address VARCHAR, city VARCHAR, state VARCHAR, zip_code VARCHAR, schedule JSON, created_at DATETIME)"))
+        conn.execute(text("INSERT INTO schedules (address, zip_code) VALUES ('1 Main St', '95113')"))
+    migrate(engine)
+    migrate(engine)
+    columns = {c["name"] for c in inspect(engine).get_columns("schedules")}
+    assert {"fetched_at", "expires_at", "address_key"} <= columns
+
+def _migrate_after(barrier, path):
+    barrier.wait()
+    migrate(create_engine(f"sqlite:///{path}", connect_args={"timeout": 30}))
+
+def test_concurrent_worker_migrations_do_not_race(tmp_path):
+    # Every gunicorn worker migrates at startup; none may fail its boot
+    legacy = tmp_path / "legacy.db"
+    with create_engine(f"sqlite:///{legacy}").begin() as conn:
+        conn.execute(text("CREATE TABLE schedules (id INTEGER PRIMARY KEY, address VARCHAR, city VARCHAR, state VARCHAR, zip_code VARCHAR, schedule JSON, created_at DATETIME)"))
+        conn.execute(text("""INSERT INTO schedules (address, zip_code, schedule) VALUES ('1 Main St', '95113', '[{"date": "2025-01-06"}]')"""))
+    context = multiprocessing.get_context("fork")
+    for attempt in range(5):
+        path = tmp_path / f"run{attempt}.db"
+        shutil.copy(legacy, path)
+        barrier = context.Barrier(4)
+        workers = [context.Process(target=_migrate_after, args=(barrier, path)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(60)
+        assert [w.exitcode for w in workers] == [0] * 4
+    tables = set(inspect(create_engine(f"sqlite:///{path}")).get_table_names())
+    assert {t.name for t in Base.metadata.sorted_tables} <= tables
+
+def test_migrate_backfills_address_keys_and_drops_duplicates(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE schedules (id INTEGER PRIMARY KEY, address VARCHAR, city VARCHAR, state VARCHAR, zip_code VARCHAR, schedule JSON, created_at DATETIME)"))
+        conn.execute(text("""INSERT INTO schedules (address, zip_code, schedule, created_at) VALUES
+            ('200 E Santa Clara St', '95113', '[{"date": "2025-01-06"}]', '2025-01-01'),
+            ('200 East Santa Clara Street', '95113', '[{"date": "2025-02-03"}]', '2025-02-01'),
+            ('200 e santa clara st.', '95113', NULL, '2025-03-01'),
+            ('200 E Santa Clara St', '95112', '[]', '2025-01-01')"""))
+    migrate(engine)
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT address_key, zip_code, schedule FROM schedules ORDER BY zip_code")).all()
+    assert [(r[0], r[1]) for r in rows] == [("200 E SANTA CLARA ST", "95112"), ("200 E SANTA CLARA ST", "95113")]
+    assert "2025-02-03" in rows[1][2]
+    assert "ux_schedules_zip_code_address_key" in {ix["name"] for ix in inspect(engine).get_indexes("schedules")}
+
+def test_rows_without_a_zip_are_deduplicated(tmp_path, db):
+    schedule_service.add_schedule({"address": "1 Main St", "schedule": [{"date": "2025-01-06"}]})
+    schedule_service.add_schedule({"address": "1 Main Street", "zip_code": " ", "schedule": [{"date": "2025-02-03"}]})
+    assert schedule_service.get_schedule_by_address_and_zip("1 Main St", None).schedule == [{"date": "2025-02-03"}]
+    with db() as session:
+        assert session.query(Schedule).count() == 1
+
+    # Older databases stored a missing ZIP as NULL, which the unique index lets repeat
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    migrate(engine)
+    with engine.begin() as conn:
+        conn.execute(text("""INSERT INTO schedules (address, address_key, zip_code, schedule, fetched_at) VALUES
+            ('1 Main St', '1 MAIN ST', NULL, '[{"date": "2025-01-06"}]', '2025-01-01'),
+            ('1 Main Street', '1 MAIN ST', NULL, '[{"date": "2025-02-03"}]', '2025-02-01')"""))
+    migrate(engine)
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT zip_code, schedule FROM schedules")).all() == [("", '[{"date": "2025-02-03"}]')]
+
+def test_address_variants_share_one_row(db):
+    schedule_service.add_schedule({"address": "200 East Santa Clara Street", "zip_code": "95113", "schedule": [{"date": "2025-01-06"}]})
+    schedule_service.add_schedule({"address": "200 e. santa clara st", "zip_code": " 95113", "schedule": [{"date": "2025-02-03"}]})
+    row = schedule_service.get_schedule_by_address_and_zip("200 E Santa Clara St, San Jose, CA", "95113")
+    assert row.schedule == [{"date": "2025-02-03"}]
+    with db() as session:
+        assert session.query(Schedule).count() == 1
+
+def test_unit_words_in_the_street_name_are_not_units():
+    assert normalize_address("100 Space Park Drive") == normalize_address("100 Space Park Dr") == "100 SPACE PARK DR"
+    assert normalize_address("12 Lot Street") == "12 LOT ST"
+    assert normalize_address("100 Space Park Drive Space 12") == "100 SPACE PARK DR SPC 12"
+    assert normalize_address("200 Main Street North Apartment 5") == "200 MAIN ST N APT 5"
+    assert normalize_address("200 Main, Suite 5, San Jose") == normalize_address("200 Main Ste 5") == "200 MAIN STE 5"
+    assert normalize_address("200 Main St # 5") == "200 MAIN ST #5"
+
+def test_comma_free_units_and_city_tails():
+    assert normalize_address("200 Main Suite 5") == normalize_address("200 Main Ste 5") == "200 MAIN STE 5"
+    assert normalize_address("200 Main St San Jose CA 95113") == normalize_address("200 Main St") == "200 MAIN ST"
+    assert normalize_address("200 Main St San Jose, CA 95113") == "200 MAIN ST"
+    assert normalize_address("200 Main St Apt 5 San Jose CA 95113-1234") == "200 MAIN ST APT 5"
+    assert normalize_address("1 Main St N Apt 5 Santa Clara CA") == "1 MAIN ST N APT 5"
+
+def test_schedule_expiry_is_bounded_by_ttl_and_last_event():
+    fetched = datetime(2025, 12, 20)
+    events = [{"date": "2025-12-24", "type": "Garbage"}, {"date": "2025-12-31", "type": "Recycling"}]
+    assert schedule_service.schedule_expiry(events, fetched) == datetime(2025, 12, 27)  # 7-day TTL
+    assert schedule_service.schedule_expiry(events, datetime(2025, 12, 29)) == datetime(2026, 1, 1)
+    assert schedule_service.schedule_expiry(events, datetime(2026, 1, 5)) == datetime(2026, 1, 5, 1)
+    assert schedule_service.schedule_expiry("https://example.com", fetched) == datetime(2025, 12, 27)
+
+def test_stale_rows_are_refreshed_in_background(db, monkeypatch):
+    row_id = _row(db, schedule=[{"date": "2020-01-06", "type": "Garbage"}], expires_at=datetime(2020, 1, 7))
+    fresh = [{"date": "2999-01-04", "type": "Garbage"}]
+
+    async def scrape(address, city, state=None):
+        return fresh
+
+    monkeypatch.setattr(schedule_service, "scrape_schedule", scrape)
+
+    async def main():
+        schedule_service.refresh_in_background("1 Main St", "95113", "San Jose", "CA")
+        await asyncio.gather(*schedule_service._background)
+
+    assert not schedule_service.is_fresh(_get(db, row_id))
+    asyncio.run(main())
+    row = _get(db, row_id)
+    assert row.schedule == fresh
+    assert schedule_service.is_fresh(row)
+
+def test_sweeper_refreshes_expiring_rows_with_bounded_concurrency(db, monkeypatch):
+    soon = datetime.now() + timedelta(hours=1)
+    for i in range(5):
+        _row(db, address=f"{i} Main St", schedule=[{"date": "2999-01-01", "type": "Garbage"}], expires_at=soon)
+    _row(db, address="9 Main St", schedule=[{"date": "2999-01-01", "type": "Garbage"}], expires_at=datetime(2999, 1, 1))
+    running = peak = 0
+
+    async def scrape(address, city, state=None):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return [{"date": "2999-06-01", "type": "Recycling"}]
+
+    # Cached negative outcomes are not swept
+    _row(db, address="8 Main St", schedule=None, status="not_found", expires_at=soon)
+
+    monkeypatch.setattr(schedule_service, "scrape_schedule", scrape)
+    assert asyncio.run(schedule_service.sweep_expiring_schedules(lookahead_hours=24, concurrency=2)) == 5
+    assert peak == 2
+    with db() as session:
+        refreshed = [r for r in session.query(Schedule) if r.schedule and r.schedule[0]["date"] == "2999-06-01"]
+    assert len(refreshed) == 5
+
+def test_workers_sweeping_together_scrape_each_row_once(db, monkeypatch):
+    soon = datetime.now() + timedelta(hours=1)
+    for i in range(3):
+        _row(db, address=f"{i} Main St", schedule=[{"date": "2999-01-01", "type": "Garbage"}], expires_at=soon)
+    scraped = []
+
+    async def scrape(address, city, state=None):
+        scraped.append(address)
+        return [{"date": "2999-06-01", "type": "Recycling"}]
+
+    # Both workers read the due rows before either one claims them
+    with db() as session:
+        due = schedule_repository.get_due_for_refresh(session, datetime.now() + timedelta(hours=24), 100)
+        session.expunge_all()
+    monkeypatch.setattr(schedule_repository, "get_due_for_refresh", lambda *args: due)
+    monkeypatch.setattr(schedule_service, "scrape_schedule", scrape)
+
+    async def main():
+        return [await schedule_service.sweep_expiring_schedules(lookahead_hours=24) for _worker in range(2)]
+
+    assert asyncio.run(main()) == [3, 0]
+    assert sorted(scraped) == ["0 Main St", "1 Main St", "2 Main St"]
+    assert schedule_service.get_refresh_stats()["claimed_elsewhere"] >= 3
+
+def test_failed_refresh_keeps_schedule_and_backs_off(db, monkeypatch):
+    old = [{"date": "2020-01-06", "type": "Garbage"}]
+    row_id = _row(db, schedule=old, expires_at=datetime(2020, 1, 7))
+
+    async def scrape(address, city, state=None):
+        return None
+
+    monkeypatch.setattr(schedule_service, "scrape_schedule", scrape)
+    assert asyncio.run(schedule_service.fetch_and_store_schedule("1 Main St", "95113", "San Jose", "CA")) == old
+    row = _get(db, row_id)
+    assert row.schedule == old
+    assert schedule_service.is_fresh(row)
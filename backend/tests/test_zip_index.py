@@ -0,0 +1,35 @@
+from services.zip_index import ZipIndex, build_zip_index
+
+ROWS = [
+    ("95112", "CA", "San Jose", "Santa Clara", 37.3483, -121.8852),
+    ("00501", "NY", "Holtsville", "Suffolk", 40.8154, -73.0451),
+    ("95050", "CA", "Santa Clara", "Santa Clara", 37.3502, -121.9517),
+    ("99950", "AK", "Ketchikan", None, 55.5422, -131.4327),
+]
+
+def test_build_and_lookup(tmp_path):
+    path = tmp_path / "zip_index.bin"
+    assert build_zip_index(ROWS, path) == 4
+    index = ZipIndex(path)
+    assert len(index) == 4
+
+    rec = index.lookup("95112")
+    assert rec.state_code == "CA"
+    assert rec.city == "San Jose"
+    assert rec.county == "Santa Clara"
+    assert abs(rec.latitude - 37.3483) < 1e-4
+
+    assert index.lookup("00501").city == "Holtsville"
+    assert index.lookup("99950").county is None
+    index.close()
+
+def test_lookup_misses(tmp_path):
+    path = tmp_path / "zip_index.bin"
+    build_zip_index(ROWS, path)
+    index = ZipIndex(path)
+    assert index.lookup("95113") is None
+    assert index.lookup("00000") is None
+    assert index.lookup("99999") is None
+    assert index.lookup("abcde") is None
+    assert index.lookup("9511") is None
+    index.close()